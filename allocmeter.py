@@ -0,0 +1,135 @@
+"""Opt-in per-stage heap allocation meter.
+
+install() wraps the same stage functions as profiler.py and charges the heap
+bytes each one allocates to its stage. On MicroPython this is the
+gc.mem_alloc() delta, which counts every allocation as long as automatic
+collection is off (MANUAL_GC in the game, or heap.begin()). Desktop Python
+has no gc.mem_alloc, so there the meter uses the tracemalloc peak above the
+stage's starting point. That catches containers built during a stage but
+not floats or small tuples, which CPython recycles from free lists. The
+"other" column is only measured on MicroPython.
+"""
+
+import gc
+
+import assets
+from profiler import STAGES, COLUMNS, OTHER, FRAME
+
+try:
+    _mem_alloc = gc.mem_alloc
+    tracemalloc = None
+except AttributeError:
+    _mem_alloc = None
+    import tracemalloc
+
+last = None  # Bytes per column for the newest frame
+peak = None  # Largest value seen per column
+frames = 0
+_current = None
+_chord = ()
+_chord_held = False
+_overhead = 0  # Bytes the tracemalloc readings themselves allocate
+
+
+def install(namespace, chord=()):
+    """Wrap the stage functions in namespace (a module's globals()) with meters.
+
+    chord is a sequence of buttons that, held together, print report().
+    """
+    global last, peak, frames, _current, _chord, _chord_held, _overhead
+    last = assets.zeros("I", len(COLUMNS))
+    peak = assets.zeros("I", len(COLUMNS))
+    _current = assets.zeros("I", len(COLUMNS))
+    frames = 0
+    _chord = tuple(chord)
+    _chord_held = False
+    if tracemalloc is not None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _overhead = 0
+        _current[0] = 0
+        _wrap_stage(0, lambda: None)()
+        _overhead = _current[0]
+    for index, (_, names) in enumerate(STAGES):
+        for name in names:
+            if name in namespace:
+                namespace[name] = _wrap_stage(index, namespace[name])
+    namespace["game_frame"] = _wrap_frame(namespace["game_frame"])
+
+
+def reset():
+    """Forget the recorded peaks."""
+    global frames
+    for i in range(len(COLUMNS)):
+        peak[i] = 0
+    frames = 0
+
+
+def _wrap_stage(index, fn):
+    if tracemalloc is None:
+        def metered(*args):
+            before = _mem_alloc()
+            result = fn(*args)
+            used = _mem_alloc() - before
+            if used > 0:
+                _current[index] += used
+            return result
+    else:
+        def metered(*args):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = fn(*args)
+            used = tracemalloc.get_traced_memory()[1] - before - _overhead
+            if used > 0:
+                _current[index] += used
+            return result
+    return metered
+
+
+def _wrap_frame(fn):
+    def frame(*args):
+        for i in range(len(_current)):
+            _current[i] = 0
+        before = _mem_alloc() if tracemalloc is None else 0
+        result = fn(*args)
+        _record(_mem_alloc() - before if tracemalloc is None else -1)
+        _poll_chord()
+        return result
+    return frame
+
+
+def _record(total):
+    global frames
+    staged = 0
+    for i in range(OTHER):
+        staged += _current[i]
+    if total < 0:
+        total = staged  # No whole-frame figure on the desktop
+    _current[OTHER] = max(0, total - staged)
+    _current[FRAME] = max(total, staged)
+    for i in range(len(COLUMNS)):
+        last[i] = _current[i]
+        if _current[i] > peak[i]:
+            peak[i] = _current[i]
+    frames += 1
+
+
+def _poll_chord():
+    global _chord_held
+    if not _chord:
+        return
+    held = True
+    for button in _chord:
+        if not button.is_pressed:
+            held = False
+            break
+    if held and not _chord_held:
+        report()
+    _chord_held = held
+
+
+def report():
+    """Print the newest and peak bytes per stage over the serial console."""
+    print("stage,last_bytes,peak_bytes")
+    for i, name in enumerate(COLUMNS):
+        print("%s,%d,%d" % (name, last[i], peak[i]))
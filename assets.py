@@ -0,0 +1,84 @@
+"""Lookup tables baked ahead of time.
+
+The projection, mesh and burst tables used to be computed every boot.
+tools/bake_assets.py now runs that code on the desktop and writes the
+results to PATH: MAGIC and a uint16 entry count, then per entry a
+NAME_SIZE-byte name, the array typecode, a pad byte, the item count and the
+byte offset of the data (both uint32), then the data itself. table() reads
+an entry straight into a freshly allocated array with readinto. If PATH is
+missing, or holds no entry of the right name, type and length, the table is
+built in place as before, so the blob only saves boot time and never
+changes a result.
+
+zeros() allocates arrays from a zeroed bytearray rather than a generator,
+which is much quicker for the large pools made at startup; filled() starts
+from zeros() for pools that start at another value.
+"""
+
+import struct
+from array import array
+
+PATH = "assets.bin"  # None to always build
+MAGIC = b"PFA1"
+HEADER = "<4sH"
+HEADER_SIZE = struct.calcsize(HEADER)
+NAME_SIZE = 16
+ENTRY = "<16sBxII"
+ENTRY_SIZE = struct.calcsize(ENTRY)
+ITEM_SIZES = {"b": 1, "B": 1, "h": 2, "H": 2, "i": 4, "I": 4, "f": 4}
+
+built = {}  # Name -> array of every table that had to be built; what the baker saves
+loaded = 0  # Tables read from PATH
+
+_index = None  # Name -> (typecode, count, offset), read on first use
+
+
+def zeros(typecode, n):
+    """Return a zero-filled array of n items."""
+    return array(typecode, bytearray(n * ITEM_SIZES[typecode]))
+
+
+def filled(typecode, n, value):
+    """Return an array of n items, all value."""
+    a = zeros(typecode, n)
+    if value:
+        for i in range(n):
+            a[i] = value
+    return a
+
+
+def _read_index():
+    global _index
+    _index = {}
+    if PATH is None:
+        return
+    try:
+        f = open(PATH, "rb")
+    except OSError:
+        return
+    with f:
+        magic, count = struct.unpack(HEADER, f.read(HEADER_SIZE))
+        if magic != MAGIC:
+            return
+        for _ in range(count):
+            name, typecode, n, offset = struct.unpack(ENTRY, f.read(ENTRY_SIZE))
+            _index[name.rstrip(b"\0").decode()] = (chr(typecode), n, offset)
+
+
+def table(name, typecode, n, build):
+    """Return an n-item array loaded from PATH, or filled by build(out) if it is not there."""
+    global loaded
+    if _index is None:
+        _read_index()
+    out = zeros(typecode, n)
+    entry = _index.get(name)
+    if entry is not None and entry[0] == typecode and entry[1] == n:
+        with open(PATH, "rb") as f:
+            f.seek(entry[2])
+            if f.readinto(out) == n * ITEM_SIZES[typecode]:
+                loaded += 1
+                return out
+    build(out)
+    built[name] = out
+    return out
+
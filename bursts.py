@@ -0,0 +1,156 @@
+"""Explosion bursts spread over several ticks.
+
+An explosion used to spawn all of its particles in the tick that set it
+off, drawing a handful of random numbers for each one, so a crash cost
+several frames' worth of time in one frame. Emitter.emit() now only queues
+the burst. Emitter.update() spawns the queued particles oldest burst first,
+at most BUDGET per tick, so the worst tick is bounded by BUDGET spawns.
+
+Particle parameters come from TEMPLATE_SIZE pseudo-random samples, loaded
+or made when the first burst is queued (see assets.py). Each burst starts at
+a random offset into the samples, so two explosions in a row still look
+different. TEMPLATE_SIZE covers the largest burst, so no burst spawns two
+identical particles.
+"""
+
+import random
+
+import assets
+import entities
+
+TEMPLATE_BITS = 9  # At least as many samples as the biggest burst (the 300-debris crash), so none repeats
+TEMPLATE_SIZE = 1 << TEMPLATE_BITS
+TEMPLATE_MASK = TEMPLATE_SIZE - 1
+BUDGET = 128  # Particles spawned per tick across all queued bursts
+
+
+def _xorshift(state, n):
+    """Yield n pseudo-random 16-bit numbers.
+
+    The templates use their own generator so that building them neither
+    disturbs nor depends on the game's random seed.
+    """
+    for _ in range(n):
+        state ^= (state << 13) & 0xFFFFFFFF
+        state ^= state >> 17
+        state ^= (state << 5) & 0xFFFFFFFF
+        yield state >> 16
+
+
+def _sampler(seed, convert):
+    def build(out):
+        k = 0
+        for r in _xorshift(seed, TEMPLATE_SIZE):
+            out[k] = convert(r)
+            k += 1
+    return build
+
+
+SPREAD_X = None  # Unit velocities in [-1, 1], scaled by each burst's spread
+SPREAD_Y = None
+SIZE_PICK = None  # Fractions of a size or lifetime range, in 1/256ths
+LIFE_PICK = None
+COLOR_PICK = None  # Which of a burst's two colours each particle takes
+
+
+def load_templates():
+    """Load or make the particle templates."""
+    global SPREAD_X, SPREAD_Y, SIZE_PICK, LIFE_PICK, COLOR_PICK
+    SPREAD_X = assets.table("spread_x", "f", TEMPLATE_SIZE, _sampler(0x9E3779B9, lambda r: r / 32767.5 - 1))
+    SPREAD_Y = assets.table("spread_y", "f", TEMPLATE_SIZE, _sampler(0x7F4A7C15, lambda r: r / 32767.5 - 1))
+    SIZE_PICK = assets.table("size_pick", "B", TEMPLATE_SIZE, _sampler(0x85EBCA6B, lambda r: r >> 8))
+    LIFE_PICK = assets.table("life_pick", "B", TEMPLATE_SIZE, _sampler(0xC2B2AE35, lambda r: r >> 8))
+    COLOR_PICK = assets.table("color_pick", "B", TEMPLATE_SIZE, _sampler(0x27D4EB2F, lambda r: r >> 15))
+
+
+class Bursts(entities.Table):
+    FIELDS = (
+        ("kind", "B"), ("x", "f"), ("y", "f"), ("z", "f"), ("remaining", "H"), ("spread", "f"),
+        ("size_lo", "B"), ("size_hi", "B"), ("life_lo", "B"), ("life_hi", "B"),
+        ("color", "H"), ("alt_color", "H"), ("cursor", "H"),
+    )
+
+    def spawn(self, kind, x, y, z, remaining, spread, size_lo, size_hi, life_lo, life_hi, color, alt_color, cursor):
+        i = self._alloc()
+        if i != -1:
+            self.kind[i] = kind
+            self.x[i] = x
+            self.y[i] = y
+            self.z[i] = z
+            self.remaining[i] = remaining
+            self.spread[i] = spread
+            self.size_lo[i] = size_lo
+            self.size_hi[i] = size_hi
+            self.life_lo[i] = life_lo
+            self.life_hi[i] = life_hi
+            self.color[i] = color
+            self.alt_color[i] = alt_color
+            self.cursor[i] = cursor
+        return i
+
+
+class Emitter:
+    """Queue of bursts feeding a particles.ParticlePool."""
+
+    def __init__(self, pool, capacity=8, budget=BUDGET):
+        self.pool = pool
+        self.pending = Bursts(capacity)
+        self.budget = budget
+        self.last = 0  # Particles spawned by the newest update()
+        self.peak = 0  # Most particles spawned by one update()
+
+    def clear(self):
+        self.pending.clear()
+
+    def emit(self, kind, x, y, z, count, spread, size, life, color, alt_color=None):
+        """Queue count particles at (x, y, z); return the burst index or -1 if the queue is full.
+
+        Velocities are uniform in [-spread, spread]. size and life are
+        (low, high) ranges, inclusive like random.randint. Each particle
+        takes color or alt_color at random.
+        """
+        if SPREAD_X is None:
+            load_templates()
+        if alt_color is None:
+            alt_color = color
+        return self.pending.spawn(kind, x, y, z, count, spread, size[0], size[1], life[0], life[1],
+                                  color, alt_color, random.getrandbits(TEMPLATE_BITS))
+
+    def update(self):
+        """Spawn up to budget queued particles and drop the finished bursts."""
+        b = self.pending
+        spawn = self.pool.spawn
+        budget = self.budget
+        n = b.count
+        i = 0
+        while i < n and budget > 0:
+            take = b.remaining[i]
+            if take > budget:
+                take = budget
+            kind, x, y, z, spread = b.kind[i], b.x[i], b.y[i], b.z[i], b.spread[i]
+            size_lo, size_span = b.size_lo[i], b.size_hi[i] - b.size_lo[i] + 1
+            life_lo, life_span = b.life_lo[i], b.life_hi[i] - b.life_lo[i] + 1
+            colors = (b.color[i], b.alt_color[i])
+            j = b.cursor[i]
+            for _ in range(take):
+                spawn(kind, x, y, z, SPREAD_X[j] * spread, SPREAD_Y[j] * spread,
+                      size_lo + ((SIZE_PICK[j] * size_span) >> 8),
+                      life_lo + ((LIFE_PICK[j] * life_span) >> 8),
+                      colors[COLOR_PICK[j]])
+                j = (j + 1) & TEMPLATE_MASK
+            b.cursor[i] = j
+            b.remaining[i] -= take
+            budget -= take
+            i += 1
+        self.last = self.budget - budget
+        if self.last > self.peak:
+            self.peak = self.last
+        # Bursts finish oldest first, so the finished ones are at the front
+        done = 0
+        while done < n and b.remaining[done] == 0:
+            done += 1
+        if done:
+            for column in b.columns:
+                for k in range(done, n):
+                    column[k - done] = column[k]
+            b.count = n - done
@@ -0,0 +1,183 @@
+"""Streamed city: seeded chunks of buildings in a depth-ordered ring buffer.
+
+The world ahead of the camera is cut into chunks CHUNK_DEPTH deep. Chunk n
+always holds the same buildings for a given seed, because its contents come
+from a generator seeded by (seed, n) rather than the game's random module.
+Chunks are generated just before their far edge comes within FAR_Z and
+appended at the tail of the ring. Buildings are retired from the head once
+they pass RETIRE_Z. Everything moves at the same speed, so the ring stays
+sorted nearest first and nothing is ever sorted at run time.
+
+Buildings keep out of a flight lane LANE_WIDTH wide, which drifts by up to
+LANE_DRIFT per chunk, no faster than the ship can follow. The drift carries
+from one chunk to the next, so chunks are generated in order from reset().
+The first CLEAR_CHUNKS chunks are left empty, so a new game starts with
+open sky up close.
+
+Slot k counted from the nearest building lives at buildings row index(k).
+
+project() fills rects, the screen rectangle of every building's front face
+by the same row, and remembers that it has. Anything that moves or changes
+the buildings clears that, so the city is projected at most once per
+advance() however many readers there are.
+"""
+
+import entities
+
+CHUNK_DEPTH = 2.0  # Depth covered by one chunk
+START_Z = 10.0  # Near edge of the first chunk after reset()
+FAR_Z = 20.0  # Chunks are generated before they come this close
+RETIRE_Z = 7.0  # Buildings this close have passed the player
+
+# Building ranges, matching the buildings the game used to spawn
+X_MIN, X_MAX = -20, 260
+WIDTH_MIN, WIDTH_MAX = 30, 80
+HEIGHT_MIN, HEIGHT_MAX = 60, 200
+
+# Flight lane, in the same x units as the buildings
+LANE_WIDTH = 64
+LANE_DRIFT = 20  # Largest move of the lane centre per chunk
+LANE_MIN, LANE_MAX = 50, 190  # Range of the lane centre
+CLEAR_CHUNKS = 4  # Empty chunks after reset; the first building reaches the ship about 22 ticks in
+
+
+def _next(state):
+    """Advance a 32-bit xorshift state."""
+    state ^= (state << 13) & 0xFFFFFFFF
+    state ^= state >> 17
+    state ^= (state << 5) & 0xFFFFFFFF
+    return state
+
+
+class CityStream:
+    """Ring buffer of buildings fed by a seeded chunk generator."""
+
+    def __init__(self, capacity, colors, ground_y=0, density=1):
+        assert capacity & (capacity - 1) == 0, "capacity must be a power of two"
+        self.buildings = entities.Buildings(capacity)  # Rows used as ring slots
+        self.rects = entities.ScreenRects(capacity)  # Projected front faces, same rows
+        self.projected = False  # rects matches the buildings
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.colors = colors
+        self.ground_y = ground_y
+        self.density = density  # Buildings per chunk
+        self.seed = 0
+        self.head = 0
+        self.count = 0
+        self.frontier = START_Z  # Depth of the far edge of the generated world
+        self.next_chunk = 0
+        self.lane = (X_MIN + X_MAX) // 2  # Centre of the flight lane in the newest chunk
+
+    def __len__(self):
+        return self.count
+
+    def index(self, k):
+        """Row of the k-th nearest building."""
+        return (self.head + k) & self.mask
+
+    def reset(self, seed):
+        """Start a new city from chunk 0 at START_Z."""
+        self.seed = seed
+        self.clear()
+        self.frontier = START_Z
+        self.next_chunk = 0
+        self.lane = (X_MIN + X_MAX) // 2
+        self._stream()
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.projected = False
+
+    def push(self, x, z, width, height, color):
+        """Append a building behind all the others; return its row or -1 if full."""
+        if self.count == self.capacity:
+            return -1
+        b = self.buildings
+        i = (self.head + self.count) & self.mask
+        b.x[i] = x
+        b.y[i] = self.ground_y
+        b.z[i] = z
+        b.width[i] = width
+        b.height[i] = height
+        b.color[i] = color
+        self.count += 1
+        self.projected = False
+        return i
+
+    def remove(self, k):
+        """Remove the k-th nearest building, keeping the rest in order."""
+        columns = self.buildings.columns
+        mask = self.mask
+        for j in range(k, self.count - 1):
+            dst = (self.head + j) & mask
+            src = (dst + 1) & mask
+            for column in columns:
+                column[dst] = column[src]
+        self.count -= 1
+        self.projected = False
+
+    def advance(self, dz):
+        """Move the city dz closer, retire passed buildings and stream new chunks."""
+        z = self.buildings.z
+        mask = self.mask
+        i = self.head
+        for _ in range(self.count):
+            z[i] -= dz
+            i = (i + 1) & mask
+        while self.count and z[self.head] <= RETIRE_Z:
+            self.head = (self.head + 1) & mask
+            self.count -= 1
+        self.frontier -= dz
+        self._stream()
+        self.projected = False
+
+    def project(self, projector, x_offset):
+        """Fill rects for every building unless they are already current.
+
+        x_offset is added to each x first, e.g. -WIDTH // 2 for buildings
+        placed in screen space.
+        """
+        if self.projected:
+            return
+        b, rects = self.buildings, self.rects
+        mask = self.mask
+        i = self.head
+        for _ in range(self.count):
+            projector.project_rect(b.x[i] + x_offset, b.y[i], b.z[i], b.width[i], b.height[i], rects, i)
+            i = (i + 1) & mask
+        self.projected = True
+
+    def _stream(self):
+        while self.frontier < FAR_Z:
+            self._generate(self.next_chunk, self.frontier)
+            self.next_chunk += 1
+            self.frontier += CHUNK_DEPTH
+
+    def _generate(self, chunk, near):
+        state = (self.seed * 0x9E3779B1 + chunk * 0x85EBCA6B + 1) & 0xFFFFFFFF or 1
+        # Move the lane, then keep this chunk's buildings out of it
+        state = _next(state)
+        lane = self.lane + (state >> 8) % (2 * LANE_DRIFT + 1) - LANE_DRIFT
+        lane = LANE_MIN if lane < LANE_MIN else LANE_MAX if lane > LANE_MAX else lane
+        self.lane = lane
+        if chunk < CLEAR_CHUNKS:
+            return
+        n = self.density
+        colors = self.colors
+        for k in range(n):
+            # One building per stratum of the chunk keeps them in depth order
+            state = _next(state)
+            z = near + (k + (state & 0xFF) / 256) * CHUNK_DEPTH / n
+            state = _next(state)
+            width = WIDTH_MIN + (state >> 8) % (WIDTH_MAX - WIDTH_MIN + 1)
+            # Centres that keep the building clear of the lane, left of it then right
+            left = max(0, lane - LANE_WIDTH // 2 - width // 2 - X_MIN + 1)
+            right = max(0, X_MAX - (lane + LANE_WIDTH // 2 + width // 2) + 1)
+            state = _next(state)
+            x = (state >> 8) % (left + right)
+            x = X_MIN + x if x < left else lane + LANE_WIDTH // 2 + width // 2 + x - left
+            state = _next(state)
+            height = HEIGHT_MIN + (state >> 8) % (HEIGHT_MAX - HEIGHT_MIN + 1)
+            self.push(x, z, width, height, colors[state % len(colors)])
@@ -0,0 +1,246 @@
+"""Uniform-grid broadphase with squared-distance narrowphase.
+
+A Grid is rebuilt every tick from the entities that can be hit: each one is
+added as a circle or a box and linked into every cell its bounds overlap.
+query() then only tests the entities sharing cells with the query circle,
+without square roots, and writes the hits into a preallocated array.
+Entities too large for the cell budget go into one bucket that every query
+scans. All storage is arrays that only grow if the capacity is exceeded.
+
+Removals collects the indices of entities hit during a pass so they can be
+removed from their table once at the end, keeping indices stable meanwhile.
+"""
+
+import assets
+
+MAX_CELLS_PER_ENTITY = 16  # Bigger entities go in the shared bucket
+
+
+class Grid:
+    """Spatial hash over screen x/y for circle and box entities."""
+
+    def __init__(self, width, height, cell_size=32, capacity=64):
+        self.cell_size = cell_size
+        self.cols = (width + cell_size - 1) // cell_size
+        self.rows = (height + cell_size - 1) // cell_size
+        self.cells = self.cols * self.rows
+        self.head = assets.filled("h", self.cells + 1, -1)  # Last slot is the shared bucket
+        self.tail = assets.filled("h", self.cells + 1, -1)
+        self.capacity = 0
+        self.links = 0
+        self.count = 0
+        self.link_count = 0
+        self.hit_count = 0
+        self._query_id = 0
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        extra = capacity - self.capacity
+        if self.capacity == 0:
+            self.x1, self.y1 = assets.zeros("f", extra), assets.zeros("f", extra)
+            self.x2, self.y2 = assets.zeros("f", extra), assets.zeros("f", extra)
+            self.radius = assets.zeros("f", extra)  # Negative for boxes
+            self.tag = assets.zeros("h", extra)
+            self.stamp = assets.zeros("H", extra)
+            self.removed = bytearray(extra)
+            self.hits = assets.zeros("h", extra)
+            self.next = assets.filled("h", extra * 4, -1)
+            self.item = assets.zeros("h", extra * 4)
+            self.links = extra * 4
+        else:
+            for column in (self.x1, self.y1, self.x2, self.y2, self.radius):
+                column.extend(assets.zeros("f", extra))
+            for column in (self.tag, self.hits):
+                column.extend(assets.zeros("h", extra))
+            self.stamp.extend(assets.zeros("H", extra))
+            self.removed.extend(bytearray(extra))
+            self.next.extend(assets.filled("h", extra * 4, -1))
+            self.item.extend(assets.zeros("h", extra * 4))
+            self.links += extra * 4
+        self.capacity = capacity
+
+    def clear(self):
+        head, tail = self.head, self.tail
+        for i in range(self.cells + 1):
+            head[i] = -1
+            tail[i] = -1
+        self.count = 0
+        self.link_count = 0
+
+    def _cell_range(self, lo, hi, limit):
+        a = int(lo) // self.cell_size
+        b = int(hi) // self.cell_size
+        if a < 0:
+            a = 0
+        if b >= limit:
+            b = limit - 1
+        if b < a:
+            # Entirely off one edge: file it in the nearest cell
+            a = b = 0 if hi < 0 else limit - 1
+        return a, b
+
+    def _link(self, cell, index):
+        if self.link_count == self.links:
+            self._grow(self.capacity * 2)
+        # Append, so every cell lists its entities in the order they were added
+        n = self.link_count
+        self.item[n] = index
+        self.next[n] = -1
+        last = self.tail[cell]
+        if last == -1:
+            self.head[cell] = n
+        else:
+            self.next[last] = n
+        self.tail[cell] = n
+        self.link_count = n + 1
+
+    def _add(self, x1, y1, x2, y2, radius, tag):
+        if self.count == self.capacity:
+            self._grow(self.capacity * 2)
+        i = self.count
+        self.x1[i], self.y1[i], self.x2[i], self.y2[i] = x1, y1, x2, y2
+        self.radius[i] = radius
+        self.tag[i] = tag
+        self.stamp[i] = self._query_id
+        self.removed[i] = 0
+        self.count = i + 1
+        c1, c2 = self._cell_range(x1, x2, self.cols)
+        r1, r2 = self._cell_range(y1, y2, self.rows)
+        if (c2 - c1 + 1) * (r2 - r1 + 1) > MAX_CELLS_PER_ENTITY:
+            self._link(self.cells, i)
+            return i
+        for row in range(r1, r2 + 1):
+            for col in range(c1, c2 + 1):
+                self._link(row * self.cols + col, i)
+        return i
+
+    def add_circle(self, x, y, radius, tag):
+        """Add a circle and return its slot; tag is handed back by query, e.g. a list index."""
+        return self._add(x - radius, y - radius, x + radius, y + radius, radius, tag)
+
+    def add_box(self, x1, y1, x2, y2, tag):
+        """Add an axis-aligned box with exclusive edges and return its slot."""
+        return self._add(x1, y1, x2, y2, -1.0, tag)
+
+    def remove(self, slot):
+        """Stop the entity in slot from being hit until the next clear()."""
+        self.removed[slot] = 1
+
+    def query(self, x, y, radius=0.0):
+        """Find entities overlapping the circle (x, y, radius).
+
+        Writes their tags to self.hits[:n] and returns n. Circles hit when the
+        centre distance is under the sum of the radii; boxes when the centre
+        is strictly inside the box grown by radius.
+        """
+        self._query_id = (self._query_id + 1) & 0xFFFF
+        qid = self._query_id
+        x1s, y1s, x2s, y2s, radii = self.x1, self.y1, self.x2, self.y2, self.radius
+        stamp, nxt, item, hits, removed = self.stamp, self.next, self.item, self.hits, self.removed
+        n = 0
+        c1, c2 = self._cell_range(x - radius, x + radius, self.cols)
+        r1, r2 = self._cell_range(y - radius, y + radius, self.rows)
+        cell = -1
+        row, col = r1, c1
+        while True:
+            if cell == -1:
+                link = self.head[self.cells]  # Shared bucket first
+            else:
+                link = self.head[cell]
+            while link != -1:
+                i = item[link]
+                link = nxt[link]
+                if stamp[i] == qid or removed[i]:
+                    continue
+                stamp[i] = qid
+                r = radii[i]
+                if r >= 0:
+                    dx = x - (x1s[i] + r)
+                    dy = y - (y1s[i] + r)
+                    reach = r + radius
+                    if dx * dx + dy * dy >= reach * reach:
+                        continue
+                elif not (x1s[i] - radius < x < x2s[i] + radius and y1s[i] - radius < y < y2s[i] + radius):
+                    continue
+                hits[n] = self.tag[i]
+                n += 1
+            # Next cell in the query rectangle
+            if cell == -1:
+                cell = row * self.cols + col
+                continue
+            col += 1
+            if col > c2:
+                col = c1
+                row += 1
+                if row > r2:
+                    break
+            cell = row * self.cols + col
+        self.hit_count = n
+        return n
+
+    def first_hit(self, x, y):
+        """Return the slot of the earliest-added entity containing (x, y), or -1.
+
+        A point only touches one cell, and cells keep insertion order, so the
+        search stops at the first hit in each list. Removed entities at the
+        front of a list are unlinked on the way, so repeated hits on a crowd
+        do not keep rescanning the ones already taken out.
+        """
+        x1s, y1s, x2s, y2s, radii = self.x1, self.y1, self.x2, self.y2, self.radius
+        head, nxt, item, removed = self.head, self.next, self.item, self.removed
+        c, _ = self._cell_range(x, x, self.cols)
+        r, _ = self._cell_range(y, y, self.rows)
+        best = -1
+        for cell in (self.cells, r * self.cols + c):
+            link = head[cell]
+            while link != -1 and removed[item[link]]:
+                link = nxt[link]
+            head[cell] = link
+            while link != -1:
+                i = item[link]
+                link = nxt[link]
+                if best != -1 and i > best:
+                    break
+                if removed[i]:
+                    continue
+                rad = radii[i]
+                if rad >= 0:
+                    dx = x - (x1s[i] + rad)
+                    dy = y - (y1s[i] + rad)
+                    if dx * dx + dy * dy >= rad * rad:
+                        continue
+                elif not (x1s[i] < x < x2s[i] and y1s[i] < y < y2s[i]):
+                    continue
+                best = i
+                break
+        return best
+
+
+class Removals:
+    """Deferred removal of entities.Table rows by index."""
+
+    def __init__(self, capacity=64):
+        self.flags = bytearray(capacity)
+        self.pending = 0
+
+    def mark(self, index):
+        if index >= len(self.flags):
+            self.flags.extend(bytearray(index + 1 - len(self.flags)))
+        if not self.flags[index]:
+            self.flags[index] = 1
+            self.pending += 1
+
+    def marked(self, index):
+        return index < len(self.flags) and self.flags[index] == 1
+
+    def apply(self, table):
+        """Swap-remove every marked row from table."""
+        if not self.pending:
+            return
+        flags = self.flags
+        # From the end, so each swapped-in row has already been checked
+        for i in range(min(len(flags), table.count) - 1, -1, -1):
+            if flags[i]:
+                flags[i] = 0
+                table.remove(i)
+        self.pending = 0
@@ -0,0 +1,171 @@
+"""Dirty-rectangle tracking for partial redraws.
+
+Draw code marks the screen area it touched each frame. Before the next frame
+is drawn, those areas are repainted from the static background layer, and
+after it is drawn only the union of last frame's and this frame's areas is
+pushed to the panel (when the display supports partial updates), with last
+frame's rectangles merged into this frame's so an area drawn in both is
+pushed once. Rectangles that overlap are merged unless their union would
+waste more than 1 / MERGE_WASTE of its area; once the slots run out, a new
+rectangle joins the one it grows least. Damage covering most of the screen
+falls back to a full update, and last frame's damage covering most of it to
+a full repaint.
+
+A strip, like the ground, is drawn in full every frame by its owner. It is
+marked with mark_strip(), kept apart so it never absorbs the rectangles that
+touch it, pushed every frame and never restored.
+"""
+
+import assets
+
+FULL_SCREEN_RATIO = 0.6  # Above this share of the screen a full update is cheaper
+MERGE_WASTE = 4  # A merged rectangle may be up to 1 / MERGE_WASTE area that neither part covered
+
+
+def _merge(rects, count, capacity, x, y, x2, y2):
+    """Add (x, y)-(x2, y2) to the first count rectangles of rects; return the new count."""
+    x1s, y1s, x2s, y2s = rects
+    area = (x2 - x) * (y2 - y)
+    # Merge into the first rectangle it overlaps or touches, unless the union is mostly waste
+    best, best_growth = -1, 0
+    for i in range(count):
+        union = (max(x2, x2s[i]) - min(x, x1s[i])) * (max(y2, y2s[i]) - min(y, y1s[i]))
+        old = (x2s[i] - x1s[i]) * (y2s[i] - y1s[i])
+        if (x <= x2s[i] and x2 >= x1s[i] and y <= y2s[i] and y2 >= y1s[i]
+                and (union - old - area) * MERGE_WASTE <= union):
+            best = i
+            break
+        if best == -1 or union - old < best_growth:
+            best, best_growth = i, union - old
+    else:
+        if count < capacity:
+            x1s[count], y1s[count], x2s[count], y2s[count] = x, y, x2, y2
+            return count + 1
+    # Out of slots: join the rectangle it grows least
+    if x < x1s[best]:
+        x1s[best] = x
+    if y < y1s[best]:
+        y1s[best] = y
+    if x2 > x2s[best]:
+        x2s[best] = x2
+    if y2 > y2s[best]:
+        y2s[best] = y2
+    return count
+
+
+def _area(rects, count):
+    x1s, y1s, x2s, y2s = rects
+    area = 0
+    for i in range(count):
+        area += (x2s[i] - x1s[i]) * (y2s[i] - y1s[i])
+    return area
+
+
+class DamageTracker:
+    """Fixed-capacity list of screen rectangles for this frame and the last."""
+
+    def __init__(self, width, height, capacity=16):
+        self.width = width
+        self.height = height
+        self.capacity = capacity
+        # Current frame (x1, y1, x2, y2 exclusive), previous frame and both merged for flush
+        self.rects = (assets.zeros("h", capacity), assets.zeros("h", capacity), assets.zeros("h", capacity), assets.zeros("h", capacity))
+        self.prev_rects = (assets.zeros("h", capacity), assets.zeros("h", capacity), assets.zeros("h", capacity), assets.zeros("h", capacity))
+        self._push = (assets.zeros("h", capacity), assets.zeros("h", capacity), assets.zeros("h", capacity), assets.zeros("h", capacity))
+        self.count = 0
+        self.prev_count = 0
+        self.strip_y1 = self.strip_y2 = 0  # Rows of the strip drawn this frame, if any
+        self.full = True  # Next frame must be drawn and pushed in full
+        self.prev_full = True
+        self.has_partial = False
+        self.push_whole = False  # Next flush pushes the whole screen, though only the damage was drawn
+
+    def attach(self, display):
+        """Use partial updates if this PicoGraphics build provides them."""
+        self.has_partial = hasattr(display, "partial_update")
+
+    def invalidate(self):
+        """Force the next frame to repaint and push the whole screen."""
+        self.full = True
+
+    def push_all(self):
+        """Push the whole screen at the next flush without repainting it.
+
+        For changes that show up everywhere without drawing, like a palette
+        rewrite.
+        """
+        self.push_whole = True
+
+    def mark_strip(self, y, h):
+        """Record that the full-width rows y to y + h are redrawn every frame."""
+        self.strip_y1 = y if y > 0 else 0
+        self.strip_y2 = y + h if y + h < self.height else self.height
+
+    def mark(self, x, y, w, h):
+        """Record that the rectangle (x, y, w, h) was drawn this frame."""
+        if self.full:
+            return
+        x2 = x + w
+        y2 = y + h
+        if x < 0:
+            x = 0
+        if y < 0:
+            y = 0
+        if x2 > self.width:
+            x2 = self.width
+        if y2 > self.height:
+            y2 = self.height
+        if x >= x2 or y >= y2:
+            return
+        self.count = _merge(self.rects, self.count, self.capacity, x, y, x2, y2)
+
+    def restore(self, paint):
+        """Call paint(x, y, w, h) for every area drawn last frame.
+
+        Returns False when the whole background has to be repainted instead,
+        including when last frame's areas cover most of the screen.
+        """
+        if self.full or self.prev_full:
+            return False
+        if _area(self.prev_rects, self.prev_count) > self.width * self.height * FULL_SCREEN_RATIO:
+            return False
+        x1s, y1s, x2s, y2s = self.prev_rects
+        for i in range(self.prev_count):
+            paint(x1s[i], y1s[i], x2s[i] - x1s[i], y2s[i] - y1s[i])
+        return True
+
+    def _pushed(self):
+        """Merge this frame's and last frame's areas into _push; return how many."""
+        n = self.count
+        x1s, y1s, x2s, y2s = self.rects
+        px1s, py1s, px2s, py2s = self._push
+        for i in range(n):
+            px1s[i], py1s[i], px2s[i], py2s[i] = x1s[i], y1s[i], x2s[i], y2s[i]
+        x1s, y1s, x2s, y2s = self.prev_rects
+        for i in range(self.prev_count):
+            n = _merge(self._push, n, self.capacity, x1s[i], y1s[i], x2s[i], y2s[i])
+        return n
+
+    def flush(self, display):
+        """Push this frame's and last frame's areas, then start a new frame."""
+        n = 0
+        full = self.full or self.prev_full or self.push_whole or not self.has_partial
+        if not full:
+            n = self._pushed()
+            full = _area(self._push, n) + (self.strip_y2 - self.strip_y1) * self.width > self.width * self.height * FULL_SCREEN_RATIO
+        if full:
+            display.update()
+        else:
+            if self.strip_y2 > self.strip_y1:
+                display.partial_update(0, self.strip_y1, self.width, self.strip_y2 - self.strip_y1)
+            x1s, y1s, x2s, y2s = self._push
+            for i in range(n):
+                display.partial_update(x1s[i], y1s[i], x2s[i] - x1s[i], y2s[i] - y1s[i])
+        # This frame becomes the previous frame
+        self.rects, self.prev_rects = self.prev_rects, self.rects
+        self.prev_count = self.count
+        self.prev_full = self.full
+        self.count = 0
+        self.strip_y1 = self.strip_y2 = 0
+        self.full = False
+        self.push_whole = False
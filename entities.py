@@ -0,0 +1,126 @@
+"""Fixed-capacity tables for buildings, obstacles, projectiles and power-ups.
+
+Same layout as particles.ParticlePool: one array per field, allocated once.
+Live entities are packed into [0, count) and the slots past count are the
+pool that spawn() reuses. remove() swaps the last live entity into the hole,
+so loops that remove while walking the table go from the end to the start.
+Spawning into a full table is dropped and returns -1.
+"""
+
+import assets
+
+
+class Table:
+    """Struct-of-arrays storage; subclasses list their (name, typecode) FIELDS."""
+
+    FIELDS = ()
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.count = 0
+        for name, typecode in self.FIELDS:
+            setattr(self, name, assets.zeros(typecode, capacity))
+        self.columns = tuple(getattr(self, name) for name, _ in self.FIELDS)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def _alloc(self):
+        i = self.count
+        if i >= self.capacity:
+            return -1
+        self.count = i + 1
+        return i
+
+    def remove(self, i):
+        """Swap-remove entity i."""
+        last = self.count - 1
+        if i != last:
+            for column in self.columns:
+                column[i] = column[last]
+        self.count = last
+
+    def copy_from(self, other, limit=None):
+        """Copy the first limit live entities (default all) of a table of the same type."""
+        n = other.count
+        if limit is not None and limit < n:
+            n = limit
+        if n > self.capacity:
+            n = self.capacity
+        mine, theirs = self.columns, other.columns
+        for k in range(len(mine)):
+            memoryview(mine[k])[:n] = memoryview(theirs[k])[:n]
+        self.count = n
+
+
+class Buildings(Table):
+    FIELDS = (("x", "f"), ("y", "f"), ("z", "f"), ("width", "H"), ("height", "H"), ("color", "I"))
+
+    def spawn(self, x, y, z, width, height, color):
+        i = self._alloc()
+        if i != -1:
+            self.x[i] = x
+            self.y[i] = y
+            self.z[i] = z
+            self.width[i] = width
+            self.height[i] = height
+            self.color[i] = color
+        return i
+
+
+class ScreenRects(Table):
+    """Screen-space bounds of projected entities, e.g. city.CityStream.rects."""
+
+    FIELDS = (("left", "h"), ("top", "h"), ("right", "h"), ("bottom", "h"))
+
+    def spawn(self, left, top, right, bottom):
+        i = self._alloc()
+        if i != -1:
+            self.left[i] = left
+            self.top[i] = top
+            self.right[i] = right
+            self.bottom[i] = bottom
+        return i
+
+
+class Obstacles(Table):
+    FIELDS = (("x", "f"), ("y", "f"), ("z", "f"), ("size", "B"), ("health", "B"), ("is_boss", "B"))
+
+    def spawn(self, x, y, z, size, health, is_boss):
+        i = self._alloc()
+        if i != -1:
+            self.x[i] = x
+            self.y[i] = y
+            self.z[i] = z
+            self.size[i] = size
+            self.health[i] = health
+            self.is_boss[i] = is_boss
+        return i
+
+
+class Projectiles(Table):
+    FIELDS = (("x", "f"), ("y", "f"), ("z", "f"), ("color", "I"))
+
+    def spawn(self, x, y, z, color):
+        i = self._alloc()
+        if i != -1:
+            self.x[i] = x
+            self.y[i] = y
+            self.z[i] = z
+            self.color[i] = color
+        return i
+
+
+class PowerUps(Table):
+    FIELDS = (("x", "f"), ("y", "f"), ("z", "f"))
+
+    def spawn(self, x, y, z):
+        i = self._alloc()
+        if i != -1:
+            self.x[i] = x
+            self.y[i] = y
+            self.z[i] = z
+        return i
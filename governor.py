@@ -0,0 +1,52 @@
+"""Adaptive quality governor.
+
+Watches how long each frame takes to simulate and draw and nudges a single
+quality factor between MIN_QUALITY and 1.0 to hold the frame budget. The game
+scales its optional work through scale() and emit(): smoke emission,
+explosion particle counts and the number of buildings.
+"""
+
+MIN_QUALITY = 0.25
+DOWN_STEP = 0.05  # Shed load quickly when over budget
+UP_STEP = 0.01  # Win it back slowly to avoid oscillating
+SMOOTHING = 0.125  # Weight of the newest frame in the running average
+
+target_ms = 40
+quality = 1.0
+average_ms = 0.0
+_credit = 0.0
+
+
+def reset(budget_ms):
+    """Set the frame budget and return to full quality."""
+    global target_ms, quality, average_ms, _credit
+    target_ms = budget_ms
+    quality = 1.0
+    average_ms = 0.0
+    _credit = 0.0
+
+
+def update(frame_ms):
+    """Feed the measured work time of the last frame and adjust quality."""
+    global average_ms, quality
+    average_ms += (frame_ms - average_ms) * SMOOTHING
+    if average_ms > target_ms:
+        quality = max(MIN_QUALITY, quality - DOWN_STEP)
+    elif average_ms < target_ms * 0.75:
+        quality = min(1.0, quality + UP_STEP)
+
+
+def scale(count):
+    """Scale a full-quality count to the current quality, never below 1."""
+    scaled = int(count * quality + 0.5)
+    return scaled if scaled > 1 else 1
+
+
+def emit():
+    """Return True for the fraction of emission calls allowed at this quality."""
+    global _credit
+    _credit += quality
+    if _credit >= 1.0:
+        _credit -= 1.0
+        return True
+    return False
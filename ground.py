@@ -0,0 +1,87 @@
+"""Scrolling ground texture.
+
+The ground is a flat plane CAMERA_HEIGHT below the eye, so screen row d
+(counting from 1 just under the horizon) looks at depth CAMERA_HEIGHT *
+focal_length / d and shows ground texels d / CAMERA_HEIGHT pixels per world
+unit wide. Both are baked into per-row tables at startup, along with a small
+tileable texture: TEXTURE_ROWS rows in depth, each with a band colour and
+SPECKLES speckles across a TILE_WIDTH-wide tile. Scrolling only adds the
+distance travelled to each row's depth, so drawing costs one span per row
+plus one per speckle per tile and never touches a random number.
+"""
+
+from array import array
+
+import assets
+import jitter
+
+CAMERA_HEIGHT = 2  # Eye height above the ground, in world units
+DEPTH_BITS = 8  # Fraction bits of row depths and the scroll phase
+TEXEL_DEPTH_BITS = 2  # Texture rows per world unit of depth, as a shift
+TEXTURE_BITS = 4
+TEXTURE_ROWS = 1 << TEXTURE_BITS  # Rows in the texture; half are each band colour
+TILE_WIDTH = 128  # World units across one tile of the texture
+TILE_TEXELS = 32  # Texels across one tile
+SPECKLES = 3  # Speckles per texture row
+
+ROW_SHIFT = DEPTH_BITS - TEXEL_DEPTH_BITS
+ROW_MASK = TEXTURE_ROWS - 1
+PERIOD = TEXTURE_ROWS << ROW_SHIFT  # Scroll phase wraps here, in fixed point
+
+
+class Ground:
+    """Baked ground rows and texture for a strip of the screen."""
+
+    def __init__(self, top, rows, width, focal_length, band_pens, speckle_pen):
+        self.top = top
+        self.rows = rows
+        self.width = width
+        self.band_pens = band_pens  # Near and far half of each texture period
+        self.speckle_pen = speckle_pen
+        self.depth = assets.zeros("H", rows)  # Depth seen by each row, DEPTH_BITS fixed point
+        self.texel = assets.zeros("H", rows)  # Texel width in pixels, 8 fraction bits
+        self.tile = assets.zeros("H", rows)  # Tile width in pixels
+        self.first = assets.zeros("h", rows)  # x of the leftmost tile that reaches the screen
+        for r in range(rows):
+            d = r + 1
+            self.depth[r] = (CAMERA_HEIGHT * focal_length << DEPTH_BITS) // d
+            self.texel[r] = (TILE_WIDTH * d << 8) // (CAMERA_HEIGHT * TILE_TEXELS)
+            tile = TILE_WIDTH * d // CAMERA_HEIGHT
+            self.tile[r] = tile
+            self.first[r] = (width // 2) % tile - tile  # Texel 0 sits at the centre
+        # Speckle texel and length (1 or 2 texels) per texture row
+        self.speckle_u = array("B", (jitter.randint(0, TILE_TEXELS - 1) for _ in range(TEXTURE_ROWS * SPECKLES)))
+        self.speckle_length = array("B", (jitter.randint(1, 2) for _ in range(TEXTURE_ROWS * SPECKLES)))
+        self._row_texture = assets.zeros("B", rows)
+
+    def draw(self, display, phase):
+        """Draw the ground scrolled by phase (DEPTH_BITS fixed point)."""
+        top, width = self.top, self.width
+        depth, rows = self.depth, self._row_texture
+        # Bands, changing pen only where the band does
+        pens = self.band_pens
+        pen = -1
+        for r in range(self.rows):
+            t = ((depth[r] + phase) >> ROW_SHIFT) & ROW_MASK
+            rows[r] = t
+            band = pens[t >> (TEXTURE_BITS - 1)]
+            if band != pen:
+                display.set_pen(band)
+                pen = band
+            display.pixel_span(0, top + r, width)
+        # Speckles, repeated across each row's tiles
+        display.set_pen(self.speckle_pen)
+        u, length = self.speckle_u, self.speckle_length
+        for r in range(self.rows):
+            s = rows[r] * SPECKLES
+            scale, step, x0 = self.texel[r], self.tile[r], self.first[r]
+            y = top + r
+            while x0 < width:
+                for k in range(s, s + SPECKLES):
+                    display.pixel_span(x0 + (u[k] * scale >> 8), y, (length[k] * scale >> 8) or 1)
+                x0 += step
+
+
+def advance(phase, distance):
+    """Return phase scrolled forward by distance world units."""
+    return (phase + int(distance * (1 << DEPTH_BITS))) % PERIOD
@@ -0,0 +1,16 @@
+"""Hardware abstraction layer.
+
+On the Pico this re-exports the real MicroPython modules. On a desktop
+CPython install the same names come from headless.py, so pico-fox.py can be
+imported and driven without a board attached.
+"""
+
+try:
+    import utime
+    import machine
+    from pimoroni import Button
+    from picographics import PicoGraphics, DISPLAY_PICO_DISPLAY, PEN_P8, PEN_RGB565
+    HEADLESS = False
+except ImportError:
+    from headless import utime, machine, Button, PicoGraphics, DISPLAY_PICO_DISPLAY, PEN_P8, PEN_RGB565
+    HEADLESS = True
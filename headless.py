@@ -0,0 +1,400 @@
+"""Desktop stand-ins for the Pico hardware.
+
+Provides just enough of utime, machine.Pin, pimoroni.Button and
+picographics.PicoGraphics to run pico-fox.py on plain CPython. The display
+counts every primitive call and can optionally rasterise into an RGB565 or
+8-bit palette framebuffer so tools can inspect the pixels. Nothing in here is copied to
+the board.
+"""
+
+import importlib.util
+import os
+import random
+import re
+import time
+import zlib
+
+DISPLAY_PICO_DISPLAY = 1
+PEN_P4 = 3  # Pen types, numbered as in picographics
+PEN_P8 = 4
+PEN_RGB565 = 6
+PALETTE_SIZES = {PEN_P4: 16, PEN_P8: 256}
+
+GAME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pico-fox.py")
+
+# Set by tools before the game is loaded; the display created at import picks it up
+DEFAULT_RASTER = False
+
+
+def rgb565(r, g, b):
+    """Pack an RGB888 colour into a 16-bit RGB565 value."""
+    return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+
+TICKS_PERIOD = 1 << 30  # Ticks wrap here on the RP2040 port, so they stay small ints
+
+
+class _UTime:
+    """Subset of MicroPython's utime backed by the host clock."""
+
+    def __init__(self):
+        self.sleep_enabled = True
+
+    def ticks_ms(self):
+        return (time.perf_counter_ns() // 1000000) % TICKS_PERIOD
+
+    def ticks_us(self):
+        return (time.perf_counter_ns() // 1000) % TICKS_PERIOD
+
+    def ticks_diff(self, a, b):
+        return (a - b + TICKS_PERIOD // 2) % TICKS_PERIOD - TICKS_PERIOD // 2
+
+    def ticks_add(self, a, delta):
+        return (a + delta) % TICKS_PERIOD
+
+    def sleep(self, seconds):
+        if self.sleep_enabled:
+            time.sleep(seconds)
+
+    def sleep_ms(self, ms):
+        self.sleep(ms / 1000)
+
+
+utime = _UTime()
+
+
+class Button:
+    """Stand-in for pimoroni.Button; scripts set is_pressed directly."""
+
+    def __init__(self, pin, *args, **kwargs):
+        self.pin = pin
+        self.is_pressed = False
+
+    def read(self):
+        return self.is_pressed
+
+    def raw(self):
+        return self.is_pressed
+
+
+class _IRQ:
+    """The object Pin.irq() returns; flags() is the edges behind the running handler."""
+
+    def __init__(self):
+        self._flags = 0
+
+    def flags(self):
+        return self._flags
+
+
+class Pin:
+    """Stand-in for machine.Pin inputs; scripts call drive() to change the level.
+
+    Hard IRQ handlers run inside drive(), as on the board. Soft ones run at
+    once too, unless defer_soft is set: then their edges pile up until
+    run_soft_irqs(), the way a soft IRQ waits out a long display.update().
+    """
+
+    IN = 0
+    PULL_UP = 1
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    defer_soft = False
+    _pending = []  # Pins with soft IRQ edges waiting for run_soft_irqs()
+
+    def __init__(self, number, mode=IN, pull=None):
+        self.number = number
+        self.level = 1 if pull == Pin.PULL_UP else 0
+        self.handler = None
+        self.trigger = 0
+        self.hard = False
+        self._irq = _IRQ()
+        self._waiting = 0  # Deferred edges
+
+    def value(self):
+        return self.level
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        if handler is not None:
+            self.handler = handler
+            self.trigger = trigger
+            self.hard = hard
+        return self._irq
+
+    def drive(self, level):
+        """Set the input level and raise the IRQ on a matching edge."""
+        if level == self.level:
+            return
+        self.level = level
+        edge = Pin.IRQ_RISING if level else Pin.IRQ_FALLING
+        if self.handler is None or not self.trigger & edge:
+            return
+        if Pin.defer_soft and not self.hard:
+            if not self._waiting:
+                Pin._pending.append(self)
+            self._waiting |= edge
+            return
+        self._irq._flags = edge
+        self.handler(self)
+
+    @staticmethod
+    def run_soft_irqs():
+        """Run the deferred soft handlers, once per pin with every edge it missed."""
+        pending = Pin._pending[:]
+        del Pin._pending[:]
+        for pin in pending:
+            pin._irq._flags, pin._waiting = pin._waiting, 0
+            pin.handler(pin)
+
+
+class _Machine:
+    """Subset of MicroPython's machine module."""
+
+    Pin = Pin
+
+    def disable_irq(self):
+        return 0
+
+    def enable_irq(self, state):
+        pass
+
+
+machine = _Machine()
+
+
+class PicoGraphics:
+    """Headless PicoGraphics that counts calls and optionally draws pixels."""
+
+    def __init__(self, display=DISPLAY_PICO_DISPLAY, rotate=0, raster=None, buffer=None, pen_type=PEN_RGB565, **kwargs):
+        self.width = 240
+        self.height = 135
+        self.pen = 0
+        # Palette modes keep RGB565 entries and one byte per pixel (P4 packs two on the board)
+        size = PALETTE_SIZES.get(pen_type, 0)
+        self.palette = [0] * size
+        self.palette_used = [False] * size
+        self.pixel_bytes = 1 if size else 2
+        self.clip = (0, 0, self.width, self.height)
+        self.calls = {}
+        self.frames = 0
+        self.pushed_pixels = 0
+        if raster is None:
+            raster = DEFAULT_RASTER
+        # Pixels are stored big-endian; a caller-supplied buffer is only drawn into in raster mode
+        if raster:
+            self.buffer = buffer if buffer is not None else bytearray(self.width * self.height * self.pixel_bytes)
+        else:
+            self.buffer = None
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def reset_counters(self):
+        self.calls = {}
+        self.pushed_pixels = 0
+
+    def get_bounds(self):
+        return self.width, self.height
+
+    def create_pen(self, r, g, b):
+        """Return an RGB565 pen, or in palette modes the first free entry (-1 when full)."""
+        self._count("create_pen")
+        if not self.palette:
+            return rgb565(int(r), int(g), int(b))
+        for i in range(len(self.palette)):
+            if not self.palette_used[i]:
+                self.palette_used[i] = True
+                self.palette[i] = rgb565(int(r), int(g), int(b))
+                return i
+        return -1
+
+    def update_pen(self, i, r, g, b):
+        self._count("update_pen")
+        self.palette[i] = rgb565(int(r), int(g), int(b))
+
+    def reset_pen(self, i):
+        self.palette_used[i] = False
+
+    def set_pen(self, pen):
+        self._count("set_pen")
+        self.pen = pen
+
+    def set_clip(self, x, y, w, h):
+        self.clip = (max(0, x), max(0, y), min(self.width, x + w), min(self.height, y + h))
+
+    def remove_clip(self):
+        self.clip = (0, 0, self.width, self.height)
+
+    def update(self):
+        self._count("update")
+        self.frames += 1
+        self.pushed_pixels += self.width * self.height
+
+    def partial_update(self, x, y, w, h):
+        self._count("partial_update")
+        self.pushed_pixels += w * h
+
+    def set_backlight(self, value):
+        pass
+
+    def get_pixel(self, x, y):
+        """Return the RGB565 value at (x, y); raster mode only."""
+        if self.palette:
+            return self.palette[self.buffer[y * self.width + x]]
+        i = (y * self.width + x) * 2
+        return (self.buffer[i] << 8) | self.buffer[i + 1]
+
+    # Rasterisation -------------------------------------------------------
+
+    def _span(self, x, y, length):
+        cx1, cy1, cx2, cy2 = self.clip
+        if y < cy1 or y >= cy2:
+            return
+        if x < cx1:
+            length -= cx1 - x
+            x = cx1
+        if x + length > cx2:
+            length = cx2 - x
+        if length <= 0:
+            return
+        if self.palette:
+            start = y * self.width + x
+            self.buffer[start:start + length] = bytes((self.pen,)) * length
+            return
+        start = (y * self.width + x) * 2
+        self.buffer[start:start + length * 2] = bytes((self.pen >> 8, self.pen & 0xFF)) * length
+
+    def clear(self):
+        self._count("clear")
+        if self.buffer is not None:
+            cx1, cy1, cx2, cy2 = self.clip
+            for y in range(cy1, cy2):
+                self._span(cx1, y, cx2 - cx1)
+
+    def pixel(self, x, y):
+        self._count("pixel")
+        if self.buffer is not None:
+            self._span(int(x), int(y), 1)
+
+    def pixel_span(self, x, y, length):
+        self._count("pixel_span")
+        if self.buffer is not None:
+            self._span(int(x), int(y), int(length))
+
+    def rectangle(self, x, y, w, h):
+        self._count("rectangle")
+        if self.buffer is not None:
+            x, y, w, h = int(x), int(y), int(w), int(h)
+            for row in range(max(y, self.clip[1]), min(y + h, self.clip[3])):
+                self._span(x, row, w)
+
+    def line(self, x1, y1, x2, y2, *args):
+        self._count("line")
+        if self.buffer is None:
+            return
+        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+        if y1 == y2:
+            self._span(min(x1, x2), y1, abs(x2 - x1))
+            return
+        dx, dy = abs(x2 - x1), -abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        err = dx + dy
+        while True:
+            self._span(x1, y1, 1)
+            if x1 == x2 and y1 == y2:
+                return
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x1 += sx
+            if e2 <= dx:
+                err += dx
+                y1 += sy
+
+    def circle(self, x, y, r):
+        self._count("circle")
+        if self.buffer is None or r < 0:
+            return
+        x, y, r = int(x), int(y), int(r)
+        # Midpoint circle filled with horizontal spans, as PicoGraphics does
+        ox, oy, err = r, 0, -r
+        while ox >= oy:
+            last_oy = oy
+            err += oy
+            oy += 1
+            err += oy
+            self._span(x - ox, y + last_oy, ox * 2 + 1)
+            if last_oy != 0:
+                self._span(x - ox, y - last_oy, ox * 2 + 1)
+            if err >= 0 and ox != last_oy:
+                self._span(x - last_oy, y + ox, last_oy * 2 + 1)
+                if ox != 0:
+                    self._span(x - last_oy, y - ox, last_oy * 2 + 1)
+                err -= ox
+                ox -= 1
+                err -= ox
+
+    def triangle(self, x1, y1, x2, y2, x3, y3):
+        self._count("triangle")
+        if self.buffer is None:
+            return
+        pts = sorted(((int(x1), int(y1)), (int(x2), int(y2)), (int(x3), int(y3))), key=lambda p: p[1])
+        (ax, ay), (bx, by), (cx, cy) = pts
+        for row in range(max(ay, self.clip[1]), min(cy + 1, self.clip[3])):
+            xa = ax + (cx - ax) * (row - ay) // (cy - ay) if cy != ay else ax
+            if row < by:
+                xb = ax + (bx - ax) * (row - ay) // (by - ay)
+            else:
+                xb = bx + (cx - bx) * (row - by) // (cy - by) if cy != by else bx
+            if xa > xb:
+                xa, xb = xb, xa
+            self._span(xa, row, xb - xa + 1)
+
+    def text(self, text, x, y, wordwrap=-1, scale=2, *args, **kwargs):
+        self._count("text")
+
+
+def load_game(seed=None, raster=False, path=GAME_PATH, flags=None):
+    """Import a fresh copy of pico-fox.py as a module without starting the loop.
+
+    flags maps top-level names such as PALETTE to the value their assignment
+    line should have, for settings that take effect while the module loads.
+    """
+    global DEFAULT_RASTER
+    if seed is not None:
+        random.seed(seed)
+    DEFAULT_RASTER = raster
+    spec = importlib.util.spec_from_file_location("pico_fox", path)
+    game = importlib.util.module_from_spec(spec)
+    if not flags:
+        spec.loader.exec_module(game)
+        return game
+    with open(path) as f:
+        source = f.read()
+    for name, value in flags.items():
+        source, n = re.subn(r"^%s = .*$" % name, "%s = %r" % (name, value), source, count=1, flags=re.M)
+        if not n:
+            raise ValueError("no top-level %s in %s" % (name, path))
+    exec(compile(source, path, "exec"), game.__dict__)
+    return game
+
+
+def state_checksum(game):
+    """CRC32 over the simulation state of a loaded game, for comparing runs."""
+    pool = game.particle_pool
+    n = pool.count
+    state = (game.ship_x, game.ship_y, game.ship_rotation, game.game_over, game.score, game.ground_phase)
+    crc = zlib.crc32(repr(state).encode())
+    stream = game.city_stream
+    crc = zlib.crc32(repr((stream.head, stream.count, stream.frontier, stream.next_chunk)).encode(), crc)
+    for column in stream.buildings.columns:
+        crc = zlib.crc32(bytes(column), crc)
+    for table in (game.obstacles, game.projectiles, game.power_ups, game.burst_emitter.pending):
+        crc = zlib.crc32(repr(table.count).encode(), crc)
+        for column in table.columns:
+            crc = zlib.crc32(bytes(memoryview(column)[:table.count]), crc)
+    for column in pool.columns:
+        crc = zlib.crc32(bytes(memoryview(column)[:n]), crc)
+    return crc
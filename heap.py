@@ -0,0 +1,87 @@
+"""Scheduled garbage collection.
+
+begin() turns off automatic collection so the heap is never scanned in the
+middle of a frame. The game loop then calls idle() with the time left
+before the next tick. A collection runs there once enough garbage has built
+up and the slack covers the measured cost of a collection. On the game-over
+screen it runs whenever garbage has built up, since nothing is moving.
+Free memory below LOW_WATER forces a collection, slack or not, because a
+heap with automatic collection off raises MemoryError instead of
+collecting.
+"""
+
+import gc
+
+from hal import utime
+
+LOW_WATER = 12 * 1024  # Collect regardless below this much free heap (bytes)
+GARBAGE_BYTES = 4 * 1024  # Allocations since the last collection worth collecting
+GARBAGE_CALLS = 32  # Same, in idle() calls, where the port has no gc.mem_alloc
+SMOOTHING = 0.25  # Weight of the newest collection in collect_ms
+
+enabled = False
+collect_ms = 4.0  # Running average cost of gc.collect(); starts pessimistic
+collections = 0
+forced = 0  # Collections that had to run without enough slack
+_has_stats = hasattr(gc, "mem_alloc")
+_allocated = 0  # gc.mem_alloc() after the last collection
+_frames = 0  # idle() calls since the last collection
+
+
+def begin():
+    """Stop automatic collection and start from a clean heap."""
+    global enabled
+    enabled = True
+    gc.disable()
+    collect()
+
+
+def end():
+    """Hand collection back to the runtime."""
+    global enabled
+    enabled = False
+    gc.enable()
+
+
+def collect():
+    """Collect now and update the cost estimate."""
+    global collect_ms, collections, _allocated, _frames
+    start = utime.ticks_ms()
+    gc.collect()
+    spent = utime.ticks_diff(utime.ticks_ms(), start)
+    collect_ms += (spent - collect_ms) * SMOOTHING
+    collections += 1
+    _frames = 0
+    if _has_stats:
+        _allocated = gc.mem_alloc()
+
+
+def free():
+    """Free heap bytes after a collection, or -1 where the port cannot say."""
+    gc.collect()
+    return gc.mem_free() if _has_stats else -1
+
+
+def idle(slack_ms, paused=False):
+    """Maybe collect in slack_ms of spare time; return True if it did.
+
+    paused is set on screens where a collection cannot cause a visible
+    hitch, such as game over.
+    """
+    global forced, _frames
+    if not enabled:
+        return False
+    _frames += 1
+    if _has_stats:
+        if gc.mem_free() < LOW_WATER:
+            if slack_ms < collect_ms and not paused:
+                forced += 1
+            collect()
+            return True
+        due = gc.mem_alloc() - _allocated >= GARBAGE_BYTES
+    else:
+        due = _frames >= GARBAGE_CALLS
+    if due and (paused or slack_ms >= collect_ms):
+        collect()
+        return True
+    return False
@@ -0,0 +1,116 @@
+"""Interrupt-driven button sampling.
+
+Each button pin raises a hard IRQ on both edges, so the handler runs as the
+edge happens rather than after a long display.update(). It keeps the pin
+levels in one bitmask and ORs presses into a second, so a press that starts
+and ends between two frames still shows up in the next snapshot. A press is
+latched from the IRQ's falling-edge flag, not the pin level, so even a late
+soft IRQ (hard=False) cannot read a finished tap as a release. snapshot()
+takes both masks with IRQs off, clears the latch and sets is_pressed on the
+SampledButton objects the game reads, so every reader in a frame sees the
+same buttons.
+
+For latency, the handler stamps the first press after a snapshot. The next
+snapshot picks the stamp up, and presented(), called once the frame it fed
+has been pushed to the screen, records the press-to-present time. Hold X + Y
+to print the figures over serial.
+"""
+
+from array import array
+
+from hal import machine, utime
+
+BUTTON_PINS = (12, 13, 14, 15)  # A, B, X, Y on the Pico Display Pack
+REPORT_CHORD = 0b1100  # X + Y
+
+
+class SampledButton:
+    """A button whose is_pressed is set by Sampler.snapshot()."""
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.is_pressed = False
+
+
+class Sampler:
+    """Pin IRQs feeding once-per-frame button snapshots."""
+
+    def __init__(self, pins=BUTTON_PINS, hard=True):
+        self.buttons = tuple(SampledButton(p) for p in pins)
+        self.mask = 0  # Buttons in the newest snapshot, bit k for pins[k]
+        self._state = array("i", (0, 0))  # Held levels, presses since the last snapshot
+        self._stamp = array("i", (0, 0))  # ticks_us of the first unsampled press, 1 if set
+        self._sampled = False
+        self._sampled_at = 0
+        self._chord_held = False
+        self.last_us = 0
+        self.worst_us = 0
+        self.total_us = 0
+        self.samples = 0
+        self._pins = []
+        Pin = machine.Pin
+        for bit in range(len(pins)):
+            pin = Pin(pins[bit], Pin.IN, Pin.PULL_UP)
+            if pin.value() == 0:
+                self._state[0] |= 1 << bit
+            pin.irq(self._handler(bit), Pin.IRQ_FALLING | Pin.IRQ_RISING, hard=hard)
+            self._pins.append(pin)
+
+    def _handler(self, bit):
+        state, stamp = self._state, self._stamp
+        mask = 1 << bit
+        ticks_us = utime.ticks_us
+        falling = machine.Pin.IRQ_FALLING
+
+        def edge(pin):
+            if pin.irq().flags() & falling:  # Pressed; the buttons pull the pin low
+                state[1] |= mask
+                if not stamp[1]:
+                    stamp[0] = ticks_us()
+                    stamp[1] = 1
+            # The held level follows the pin as it is now
+            if pin.value() == 0:
+                state[0] |= mask
+            else:
+                state[0] &= ~mask
+        return edge
+
+    def snapshot(self):
+        """Latch the buttons for this frame; return the bitmask."""
+        state, stamp = self._state, self._stamp
+        irq = machine.disable_irq()
+        held = state[0] | state[1]
+        state[1] = 0
+        pressed_at, waiting = stamp[0], stamp[1]
+        stamp[1] = 0
+        machine.enable_irq(irq)
+        if waiting and not self._sampled:
+            self._sampled = True
+            self._sampled_at = pressed_at
+        self.mask = held
+        buttons = self.buttons
+        for k in range(len(buttons)):
+            buttons[k].is_pressed = bool(held & (1 << k))
+        chord = held & REPORT_CHORD == REPORT_CHORD
+        if chord and not self._chord_held:
+            self.report()
+        self._chord_held = chord
+        return held
+
+    def presented(self):
+        """Record press-to-present latency once a sampled press reaches the screen."""
+        if not self._sampled:
+            return
+        self._sampled = False
+        latency = utime.ticks_diff(utime.ticks_us(), self._sampled_at)
+        self.last_us = latency
+        if latency > self.worst_us:
+            self.worst_us = latency
+        self.total_us += latency
+        self.samples += 1
+
+    def report(self):
+        """Print the press-to-present latency over the serial console."""
+        mean = self.total_us // self.samples if self.samples else 0
+        print("input latency us: last %d mean %d worst %d over %d presses" % (
+            self.last_us, mean, self.worst_us, self.samples))
@@ -0,0 +1,34 @@
+"""Visual-only random numbers for the renderer.
+
+The grass texture, jet flames and explosion radii only need noise, not the
+game's random stream. Drawing them from this separate 16-bit xorshift keeps
+the simulation's sequence of random numbers independent of how (or on which
+core) frames are drawn, and it never leaves small-int range on the Pico.
+"""
+
+_state = 0xACE1
+
+
+def seed(value):
+    global _state
+    _state = (value & 0xFFFF) or 0xACE1
+
+
+def _next():
+    global _state
+    x = _state
+    x ^= (x << 7) & 0xFFFF
+    x ^= x >> 9
+    x ^= (x << 8) & 0xFFFF
+    _state = x
+    return x
+
+
+def randint(a, b):
+    """Return an integer in [a, b], like random.randint."""
+    return a + _next() % (b - a + 1)
+
+
+def random():
+    """Return a float in [0, 1), like random.random."""
+    return _next() / 65536
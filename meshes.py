@@ -0,0 +1,166 @@
+"""Pre-baked vertex tables for the ship and the monsters.
+
+The ship is stored once per bank angle, BANK_STEP degrees apart, by
+rotating its level-flight triangles with a sine/cosine table scaled by
+1 << TRIG_BITS. Monsters only change with their projected size, so both
+monster shapes are baked for every size up to MAX_CACHED_SIZE. Drawing
+then only adds the screen position to integer offsets read from an array.
+The tables come from assets.bin when it has them (see assets.py), and the
+monster shapes are only loaded once the first monster is drawn.
+
+Layouts, all as offsets from the shape's centre:
+  ship pose:  SHIP_TRIANGLES triangles of (x1, y1, x2, y2, x3, y3)
+  boss:       body circle (x, y, r), 2 wing and 2 horn triangles, 2 eye circles
+  regular:    body circle, 2 wing triangles, 1 eye circle
+
+Small monsters are drawn with fewer parts; see lod().
+"""
+
+import math
+from array import array
+
+import assets
+
+BANK_LIMIT = 30  # Degrees of bank either way
+BANK_STEP = 5  # Degrees between baked poses
+BANK_POSES = 2 * BANK_LIMIT // BANK_STEP + 1
+TRIG_BITS = 10
+
+# Positive bank tilts left, which turns the ship anticlockwise on screen
+SIN = array("h", (round(math.sin(math.radians(BANK_LIMIT - i * BANK_STEP)) * (1 << TRIG_BITS)) for i in range(BANK_POSES)))
+COS = array("h", (round(math.cos(math.radians(BANK_LIMIT - i * BANK_STEP)) * (1 << TRIG_BITS)) for i in range(BANK_POSES)))
+
+SHIP = (
+    (-15, 10, 15, 10, 0, -15),  # Main body
+    (-25, 5, -5, 5, -15, -5),  # Left wing
+    (5, 5, 25, 5, 15, -5),  # Right wing
+)
+SHIP_TRIANGLES = len(SHIP)
+SHIP_VALUES = SHIP_TRIANGLES * 6
+
+MAX_CACHED_SIZE = 32  # Larger monsters are baked into a scratch slot per draw
+
+# Monster levels of detail, picked by projected size
+FULL = 0  # Every part of the shape
+SIMPLE = 1  # Body and wings in one pen
+DOT = 2  # One rectangle the size of the body
+LOD_FULL = 8  # Smallest size drawn in full; below it eyes and horns are a pixel or two
+LOD_SIMPLE = 3  # Smallest size drawn as body and wings
+BOSS_VALUES = 3 + 4 * 6 + 2 * 3
+REGULAR_VALUES = 3 + 2 * 6 + 3
+
+
+def _bake_ship(poses):
+    half = 1 << (TRIG_BITS - 1)
+    o = 0
+    for pose in range(BANK_POSES):
+        s, c = SIN[pose], COS[pose]
+        for triangle in SHIP:
+            for k in range(0, 6, 2):
+                x, y = triangle[k], triangle[k + 1]
+                poses[o] = (x * c + y * s + half) >> TRIG_BITS
+                poses[o + 1] = (y * c - x * s + half) >> TRIG_BITS
+                o += 2
+
+
+def _bake_bounds(bounds):
+    # min_x, min_y, max_x, max_y per pose, always including the centre
+    for pose in range(BANK_POSES):
+        min_x = min_y = max_x = max_y = 0
+        for o in range(pose * SHIP_VALUES, (pose + 1) * SHIP_VALUES, 2):
+            x, y = ship_poses[o], ship_poses[o + 1]
+            min_x, min_y = min(min_x, x), min(min_y, y)
+            max_x, max_y = max(max_x, x), max(max_y, y)
+        b = pose * 4
+        bounds[b], bounds[b + 1], bounds[b + 2], bounds[b + 3] = min_x, min_y, max_x, max_y
+
+
+ship_poses = assets.table("ship_poses", "h", BANK_POSES * SHIP_VALUES, _bake_ship)
+ship_bounds = assets.table("ship_bounds", "h", BANK_POSES * 4, _bake_bounds)
+
+
+def ship_pose(bank):
+    """Return the pose index for a bank angle in degrees."""
+    if bank > BANK_LIMIT:
+        bank = BANK_LIMIT
+    elif bank < -BANK_LIMIT:
+        bank = -BANK_LIMIT
+    return (BANK_LIMIT - bank + BANK_STEP // 2) // BANK_STEP
+
+
+def _bake_boss(size, out, o):
+    values = (
+        0, 0, size,  # Body
+        -size * 2, 0, 0, -size, 0, size,  # Left wing
+        size * 2, 0, 0, -size, 0, size,  # Right wing
+        -(size // 2), -size, -(size // 4), -(size * 3 // 2), 0, -size,  # Left horn
+        size // 2, -size, size // 4, -(size * 3 // 2), 0, -size,  # Right horn
+        -(size // 3), -(size // 3), size // 4,  # Left eye
+        size // 3, -(size // 3), size // 4,  # Right eye
+    )
+    for k in range(BOSS_VALUES):
+        out[o + k] = values[k]
+
+
+def _bake_regular(size, out, o):
+    values = (
+        0, 0, size // 2,  # Body
+        -size, 0, 0, -(size // 2), 0, size // 2,  # Left wing
+        size, 0, 0, -(size // 2), 0, size // 2,  # Right wing
+        0, -(size // 4), size // 4,  # Eye
+    )
+    for k in range(REGULAR_VALUES):
+        out[o + k] = values[k]
+
+
+def _bake_bosses(out):
+    for size in range(MAX_CACHED_SIZE + 1):
+        _bake_boss(size, out, size * BOSS_VALUES)
+
+
+def _bake_regulars(out):
+    for size in range(MAX_CACHED_SIZE + 1):
+        _bake_regular(size, out, size * REGULAR_VALUES)
+
+
+# One slot per size, plus a scratch slot for sizes past MAX_CACHED_SIZE; see load_shapes()
+boss_shapes = None
+regular_shapes = None
+
+
+def load_shapes():
+    """Load or bake both monster shape tables."""
+    global boss_shapes, regular_shapes
+    boss_shapes = assets.table("boss_shapes", "h", (MAX_CACHED_SIZE + 2) * BOSS_VALUES, _bake_bosses)
+    regular_shapes = assets.table("regular_shapes", "h", (MAX_CACHED_SIZE + 2) * REGULAR_VALUES, _bake_regulars)
+
+
+def boss(size):
+    """Return the offset of a boss of this size in boss_shapes."""
+    if boss_shapes is None:
+        load_shapes()
+    if size <= MAX_CACHED_SIZE:
+        return size * BOSS_VALUES
+    o = (MAX_CACHED_SIZE + 1) * BOSS_VALUES
+    _bake_boss(size, boss_shapes, o)
+    return o
+
+
+def regular(size):
+    """Return the offset of a regular monster of this size in regular_shapes."""
+    if regular_shapes is None:
+        load_shapes()
+    if size <= MAX_CACHED_SIZE:
+        return size * REGULAR_VALUES
+    o = (MAX_CACHED_SIZE + 1) * REGULAR_VALUES
+    _bake_regular(size, regular_shapes, o)
+    return o
+
+
+def lod(size):
+    """Return the level of detail (FULL, SIMPLE or DOT) for a projected size."""
+    if size >= LOD_FULL:
+        return FULL
+    if size >= LOD_SIMPLE:
+        return SIMPLE
+    return DOT
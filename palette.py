@@ -0,0 +1,142 @@
+"""Pen cache built once at startup.
+
+Every colour the game needs after boot lives in one flat table so the frame
+loop never calls display.create_pen. Fading colours are stored as ramps: a
+colour index into `pens`, plus `fade[index]` giving the index one fade step
+later. The last entry of a ramp fades to itself.
+
+begin() starts the table for a display. With a palette display (PEN_P8),
+pass it the palette size, and pen() hands out palette entries: colours that
+match in the top 8 - QUANT_BITS bits of each channel share an entry, which
+is about the precision an RGB565 panel shows anyway, so the ramps and the
+sky fit in 256 entries. Colour indices and ramps are the same in every
+mode, so the simulation does not change. gradient(..., tintable=True) gives
+its rows entries of their own, and tint() blends those entries toward a
+colour by rewriting the palette, which recolours every pixel drawn with
+them without drawing anything.
+"""
+
+pens = []  # Colour index -> pen
+fade = []  # Colour index -> colour index after one fade step
+
+QUANT_BITS = 3  # Channel bits ignored when palette entries are shared
+
+size = 0  # Palette entries, or 0 for direct RGB565 pens
+used = 0  # Palette entries handed out
+
+_ramps = {}
+_shared = {}  # Quantised (r, g, b) -> palette entry
+_tintable = []  # (entry, r, g, b) for every entry tint() rewrites
+_tint_rgb = None  # Last colour and amount applied by tint(); amount 0 is untinted
+_tint_amount = 0
+
+
+def _clamp(value):
+    return 0 if value < 0 else 255 if value > 255 else value
+
+
+def begin(entries=0):
+    """Start an empty pen table; entries > 0 hands out pens from a palette that size."""
+    global size, used, _tint_rgb, _tint_amount
+    size = entries
+    used = 0
+    _tint_rgb = None
+    _tint_amount = 0
+    del pens[:]
+    del fade[:]
+    _ramps.clear()
+    _shared.clear()
+    del _tintable[:]
+
+
+def _allocate(display, r, g, b):
+    global used
+    if used >= size:
+        raise RuntimeError("palette full (%d entries)" % size)
+    entry = display.create_pen(r, g, b)
+    if entry < 0:
+        raise RuntimeError("palette full (%d entries)" % size)
+    used += 1
+    return entry
+
+
+def pen(display, r, g, b):
+    """Return a pen for (r, g, b); in palette mode close colours share an entry."""
+    if not size:
+        return display.create_pen(r, g, b)
+    key = (r >> QUANT_BITS, g >> QUANT_BITS, b >> QUANT_BITS)
+    entry = _shared.get(key)
+    if entry is None:
+        entry = _allocate(display, r, g, b)
+        _shared[key] = entry
+    return entry
+
+
+def gradient(display, top, bottom, rows, tintable=False):
+    """Return a list with one pen per row, blending from top to bottom.
+
+    With tintable in palette mode, rows of the same quantised colour share an
+    entry of their own that tint() recolours.
+    """
+    row_pens = []
+    own = {}
+    for y in range(rows):
+        ratio = y / rows
+        r = int(top[0] * (1 - ratio) + bottom[0] * ratio)
+        g = int(top[1] * (1 - ratio) + bottom[1] * ratio)
+        b = int(top[2] * (1 - ratio) + bottom[2] * ratio)
+        if tintable and size:
+            key = (r >> QUANT_BITS, g >> QUANT_BITS, b >> QUANT_BITS)
+            if key not in own:
+                own[key] = _allocate(display, r, g, b)
+                _tintable.append((own[key], r, g, b))
+            row_pens.append(own[key])
+        else:
+            row_pens.append(pen(display, r, g, b))
+    return row_pens
+
+
+def tint(display, rgb, amount):
+    """Blend the tintable entries amount/256 of the way to rgb.
+
+    Returns True if the palette changed. Without a palette there is nothing
+    to rewrite, so this does nothing and returns False.
+    """
+    global _tint_rgb, _tint_amount
+    if not _tintable or amount == _tint_amount and (not amount or rgb == _tint_rgb):
+        return False
+    _tint_rgb, _tint_amount = rgb, amount
+    tr, tg, tb = rgb
+    keep = 256 - amount
+    for entry, r, g, b in _tintable:
+        display.update_pen(entry, (r * keep + tr * amount) >> 8, (g * keep + tg * amount) >> 8,
+                           (b * keep + tb * amount) >> 8)
+    return True
+
+
+def ramp(display, rgb, dr, dg, db):
+    """Build a fade ramp from rgb and return the colour index of its first entry.
+
+    Each step adds (dr, dg, db) until the red channel reaches 0, so dr must be
+    negative. Identical ramps are shared.
+    """
+    key = (rgb, dr, dg, db)
+    if key in _ramps:
+        return _ramps[key]
+    start = len(pens)
+    r, g, b = rgb
+    while r > 0:
+        pens.append(pen(display, r, g, b))
+        fade.append(len(pens))
+        r = max(0, r + dr)
+        g = _clamp(g + dg)
+        b = _clamp(b + db)
+    pens.append(pen(display, 0, g, b))
+    fade.append(len(pens) - 1)
+    _ramps[key] = start
+    return start
+
+
+def faded_out(color):
+    """True once a colour has reached the end of its ramp."""
+    return fade[color] == color
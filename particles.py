@@ -0,0 +1,135 @@
+"""Fixed-capacity particle pool shared by smoke, explosions and ship debris.
+
+Particles are stored as parallel arrays (struct of arrays) allocated once at
+startup. Live particles are packed into indices [0, count); the tail
+[count, capacity) is the free list. A dead particle is swap-removed by
+copying the last live particle into its slot, so updating stays O(n) and
+spawning past the cap is simply dropped.
+"""
+
+import math
+import random
+from array import array
+
+import assets
+import palette
+
+# Emitter types
+SMOKE = 0     # Trail puffs, drawn as grey circles in screen space
+FRAGMENT = 1  # Explosion sparks, drawn as circles in 3D space
+DEBRIS = 2    # Ship debris, drawn as spinning rectangles in 3D space
+
+# Unit vectors for debris spin, indexed by a random ANGLE_BITS-bit number
+ANGLE_BITS = 5
+ANGLE_COS = array("f", (math.cos(2 * math.pi * i / (1 << ANGLE_BITS)) for i in range(1 << ANGLE_BITS)))
+ANGLE_SIN = array("f", (math.sin(2 * math.pi * i / (1 << ANGLE_BITS)) for i in range(1 << ANGLE_BITS)))
+
+
+class ParticlePool:
+    """Preallocated particle storage with per-type update rules."""
+
+    def __init__(self, capacity, width, height):
+        self.capacity = capacity
+        self.width = width
+        self.height = height
+        self.count = 0
+        self.x = assets.zeros("f", capacity)
+        self.y = assets.zeros("f", capacity)
+        self.z = assets.zeros("f", capacity)
+        self.vx = assets.zeros("f", capacity)
+        self.vy = assets.zeros("f", capacity)
+        self.life = assets.zeros("f", capacity)
+        self.size = assets.zeros("f", capacity)
+        self.color = assets.zeros("H", capacity)  # Colour index into palette.pens
+        self.kind = assets.zeros("B", capacity)
+        self.angle = assets.zeros("B", capacity)  # Debris spin, index into ANGLE_COS/ANGLE_SIN
+        self.columns = (self.x, self.y, self.z, self.vx, self.vy, self.life, self.size, self.color, self.kind, self.angle)
+
+    def clear(self):
+        self.count = 0
+
+    def copy_from(self, other):
+        """Copy the live particles of another pool with the same capacity."""
+        n = other.count
+        theirs = other.columns
+        for k in range(len(theirs)):
+            memoryview(self.columns[k])[:n] = memoryview(theirs[k])[:n]
+        self.count = n
+
+    def spawn(self, kind, x, y, z, vx, vy, size, life, color):
+        """Add a particle and return its index, or -1 if the pool is full."""
+        i = self.count
+        if i >= self.capacity:
+            return -1
+        self.x[i] = x
+        self.y[i] = y
+        self.z[i] = z
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.size[i] = size
+        self.life[i] = life
+        self.color[i] = color
+        self.kind[i] = kind
+        self.angle[i] = random.getrandbits(ANGLE_BITS)
+        self.count = i + 1
+        return i
+
+    def _move(self, src, dst):
+        self.x[dst] = self.x[src]
+        self.y[dst] = self.y[src]
+        self.z[dst] = self.z[src]
+        self.vx[dst] = self.vx[src]
+        self.vy[dst] = self.vy[src]
+        self.size[dst] = self.size[src]
+        self.life[dst] = self.life[src]
+        self.color[dst] = self.color[src]
+        self.kind[dst] = self.kind[src]
+        self.angle[dst] = self.angle[src]
+
+    def update(self):
+        """Advance every live particle one tick and compact out the dead ones."""
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        life, size, color, kind, angle = self.life, self.size, self.color, self.kind, self.angle
+        fade = palette.fade
+        width, height = self.width, self.height
+        getrandbits = random.getrandbits
+        n = self.count
+        i = 0
+        while i < n:
+            k = kind[i]
+            if k == SMOKE:
+                life[i] -= 1
+                x[i] += vx[i]
+                y[i] += vy[i]
+                c = fade[color[i]]
+                color[i] = c
+                alive = life[i] > 0 and fade[c] != c
+            else:
+                px = x[i]
+                py = y[i]
+                # Cull particles that are off-screen
+                if px < 0 or px > width or py < 0 or py > height:
+                    alive = False
+                else:
+                    color[i] = fade[color[i]]
+                    if k == FRAGMENT:
+                        x[i] = px + int(vx[i]) * 2
+                        y[i] = py + int(vy[i]) * 2
+                        s = size[i] - 0.05
+                        life[i] -= 0.5
+                    else:
+                        x[i] = px + vx[i] * 2
+                        y[i] = py + vy[i] * 2
+                        s = size[i] - 0.2
+                        life[i] -= 1
+                        angle[i] = getrandbits(ANGLE_BITS)  # Tumble the fragment
+                    if s < 0:
+                        s = 0
+                    size[i] = s
+                    alive = life[i] > 0 and s > 0
+            if alive:
+                i += 1
+            else:
+                n -= 1
+                self._move(n, i)
+        self.count = n
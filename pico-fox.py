@@ -1,12 +1,33 @@
-from machine import Pin, Timer
-import utime
 import random
-import math
-from pimoroni import Button
-from picographics import PicoGraphics, DISPLAY_PICO_DISPLAY
-
-# Initialize display
-display = PicoGraphics(display=DISPLAY_PICO_DISPLAY, rotate=0)
+from array import array
+import palette
+import particles
+import governor
+import damage
+import jitter
+import pipeline
+import collision
+import projection
+import entities
+import heap
+import meshes
+import bursts
+import city
+import ground
+import renderqueue
+import assets
+import splats
+import waves
+from hal import utime, Button, PicoGraphics, DISPLAY_PICO_DISPLAY, PEN_P8, PEN_RGB565, HEADLESS
+
+# Draw into an 8-bit palette framebuffer: half the memory, and explosions light the sky by palette rewrites (see palette.py)
+PALETTE = False
+
+# Initialize display on our own framebuffer, which splats.py also draws into
+framebuffer = bytearray(240 * 135 * (1 if PALETTE else 2))
+display = PicoGraphics(display=DISPLAY_PICO_DISPLAY, rotate=0, buffer=framebuffer,
+                       pen_type=PEN_P8 if PALETTE else PEN_RGB565)
+palette.begin(256 if PALETTE else 0)
 WIDTH, HEIGHT = display.get_bounds()
 
 # Initialize buttons
@@ -16,24 +37,62 @@ button_x = Button(14)  # X button
 button_y = Button(15)  # Y button
 
 # Colors
-BLACK = display.create_pen(0, 0, 0)
-WHITE = display.create_pen(255, 255, 255)
-BLUE = display.create_pen(100, 100, 255)  # Lighter blue
-RED = display.create_pen(255, 0, 0)
-YELLOW = display.create_pen(255, 255, 0)
-GREEN = display.create_pen(0, 255, 0)  # Green for the ground
-ORANGE = display.create_pen(255, 165, 0)
-PURPLE = display.create_pen(128, 0, 128)
-CYAN = display.create_pen(0, 255, 255)
-MAGENTA = display.create_pen(255, 0, 255)
-BROWN = display.create_pen(139, 69, 19)
-DARK_GRAY = display.create_pen(50, 50, 50)
-LIGHT_GRAY = display.create_pen(150, 150, 150)
-TAN = display.create_pen(210, 180, 140)  # Tan color
-DOOR_COLOR = display.create_pen(139, 69, 19)  # Brown color for doors
-SIDE_GRAY = display.create_pen(100, 100, 100)  # Gray for the sides of the buildings
+BLACK = palette.pen(display, 0, 0, 0)
+WHITE = palette.pen(display, 255, 255, 255)
+BLUE = palette.pen(display, 100, 100, 255)  # Lighter blue
+RED = palette.pen(display, 255, 0, 0)
+YELLOW = palette.pen(display, 255, 255, 0)
+GREEN = palette.pen(display, 0, 255, 0)  # Green for the ground
+ORANGE = palette.pen(display, 255, 165, 0)
+PURPLE = palette.pen(display, 128, 0, 128)
+CYAN = palette.pen(display, 0, 255, 255)
+MAGENTA = palette.pen(display, 255, 0, 255)
+BROWN = palette.pen(display, 139, 69, 19)
+DARK_GRAY = palette.pen(display, 50, 50, 50)
+LIGHT_GRAY = palette.pen(display, 150, 150, 150)
+TAN = palette.pen(display, 210, 180, 140)  # Tan color
+DOOR_COLOR = palette.pen(display, 139, 69, 19)  # Brown color for doors
+SIDE_GRAY = palette.pen(display, 100, 100, 100)  # Gray for the sides of the buildings
 SKY_BLUE = (135, 206, 235)  # Light blue for the sky (RGB tuple)
 HORIZON_BLUE = (0, 191, 255)  # Darker blue for the horizon (RGB tuple)
+DARK_GREEN = palette.pen(display, 0, 180, 0)  # Darker green grass speckles
+LIGHT_GREEN = palette.pen(display, 20, 220, 20)  # Lighter green grass bands
+
+# Fade ramps (colour indices into palette.pens, see palette.py)
+SMOKE_FADE = palette.ramp(display, (255, 255, 255), -2, -2, -2)  # White smoke fading to black
+BOSS_FADE = palette.ramp(display, (255, 140, 0), -5, -5, 5)  # Orange boss explosion
+FRAGMENT_FADE = palette.ramp(display, (255, 69, 0), -5, -5, 5)  # Red-orange fragments
+FIRE_FADE = palette.ramp(display, (255, 165, 0), -5, -5, 5)  # Orange building fire
+SHIP_DEBRIS_FADE = palette.ramp(display, (255, 255, 0), -10, 0, 0)  # Yellow ship debris
+
+# Frame-time HUD in the top-left corner; hold A+X to dump it over serial as CSV
+PROFILE = False
+
+# Simulate on core 1 while core 0 draws the previous frame (see pipeline.py)
+PIPELINED = False
+
+# Garbage-collect only in spare time between frames or on the game-over screen (see heap.py)
+MANUAL_GC = False
+
+# Heap bytes allocated per stage; hold B+Y to print them over serial (see allocmeter.py)
+METER_ALLOC = False
+
+# Write small circles and rectangles, mostly particles, straight into the framebuffer (see splats.py)
+SPLATS = False
+
+# Save the seed and each tick's buttons to RECORD_PATH for tools/replay_session.py (see replay.py)
+RECORD = False
+RECORD_PATH = "session.pfr"
+input_log = None  # replay.Recorder or replay.Player, latching the buttons at the start of every tick
+
+# Read the buttons from pin IRQs, snapshotted once per frame; hold X+Y to print input latency (see inputs.py)
+IRQ_INPUT = False
+input_sampler = None  # inputs.Sampler when IRQ_INPUT is on
+
+# Frame pacing
+STEP_MS = 40  # Simulation tick; matches the old loop (about 20 ms of drawing plus a 20 ms sleep)
+MAX_STEPS_PER_FRAME = 4  # Most ticks simulated before a frame is drawn
+governor.reset(STEP_MS)  # Scale optional detail to hold one frame per tick
 
 # Game variables
 ship_x = WIDTH // 2
@@ -43,54 +102,93 @@ up_down_speed = 6  # Slower up/down speed
 left_right_speed = 6  # Slower left/right speed
 speed_increment = 40  # Amount to increase speed each frame
 max_speed = 100  # Maximum speed
-ship_rotation = 0  # Track ship rotation angle
-smoke_particles = []  # List to store smoke trail particles
-explosions = []  # List to store explosion particles
+ship_rotation = 0  # Bank angle in degrees, positive to the left
+BANK_RATE = meshes.BANK_STEP  # Degrees the bank moves toward the stick per tick: one baked pose, so none is skipped
+particle_pool = particles.ParticlePool(640, WIDTH, HEIGHT)  # Smoke, explosions and ship debris
+burst_emitter = bursts.Emitter(particle_pool)  # Explosions, spawned over several ticks
+damage_tracker = damage.DamageTracker(WIDTH, HEIGHT)  # Screen areas drawn this frame and last
+render_queue = renderqueue.RenderQueue()  # Scene draw calls, flushed back to front once per frame
+splat_rasteriser = splats.Rasteriser(framebuffer, WIDTH, HEIGHT, big_endian=HEADLESS,
+                                     pixel_bytes=1 if PALETTE else 2) if SPLATS else None
+SHIP_Z = 1.0  # Depth the ship, its flames and its smoke are sorted at
+damage_tracker.attach(display)
 game_over = False
-
-# City background variables
-buildings = []  # Each building is a dictionary with x, y, z, width, height, color
-building_speed = 0.4  # Speed at which buildings move toward the player
+redraw_pending = True  # Set by reset_game, passed to the renderer in the next view
+
+# Combat variables
+obstacles = entities.Obstacles(32)  # x, y, z, size, health, is_boss
+projectiles = entities.Projectiles(32)  # x, y, z, color
+power_ups = entities.PowerUps(8)  # x, y, z
+score = 0
+LEVEL_PATH = "classic.pfw"  # Obstacle, boss and power-up spawns, encoded from levels/classic.txt
+level = waves.Level(LEVEL_PATH, loop=True)  # Streamed a few records ahead of level_tick
+level_tick = 0  # Ticks played since the level started
+MIN_COLLISION_DISTANCE = 5.0  # Obstacles closer than this can be hit by projectiles
+obstacle_grid = collision.Grid(WIDTH, HEIGHT)  # Broadphase for projectile hits
+power_up_grid = collision.Grid(WIDTH, HEIGHT, capacity=16)  # Broadphase for power-up pickup
+building_grid = collision.Grid(WIDTH, HEIGHT, capacity=16)  # Broadphase for ship crashes
+obstacle_removals = collision.Removals()
+projectile_removals = collision.Removals()
+power_up_removals = collision.Removals()
+special_weapon_active = False
+special_weapon_timer = 0
+special_weapon_duration = 300  # Frames the special weapon stays active
 
 # Ground variables
 GROUND_Y = 0  # Ground level in 3D space
 GROUND_HEIGHT = 20  # Height of the ground (grass) at the bottom of the screen
-fixed_width = 40
+SKY_PENS = palette.gradient(display, SKY_BLUE, HORIZON_BLUE, HEIGHT - GROUND_HEIGHT, tintable=True)  # One pen per sky scanline
+GLOW_COLOR = (255, 165, 0)  # Sky tint while explosions burn (palette mode only)
+GLOW_PER_PARTICLE = 4  # Tint added per lit explosion particle, out of 256
+GLOW_LIMIT = 96  # Strongest sky tint
+GLOW_STEP = 16  # Tint steps; each change pushes the whole screen
+explosion_lit = 0  # Explosion particles drawn this frame that have not faded out
+
+# City background variables
+city_stream = city.CityStream(64, (DARK_GRAY, LIGHT_GRAY, TAN), GROUND_Y)  # Nearest building first
+building_speed = 0.4  # Speed at which buildings move toward the player
+MAX_BUILDINGS = 24  # Buildings drawn at full quality, nearest first
+city_visible = array("B", bytes(city_stream.capacity))  # Rows picked by capture_city
 
 # Focal length for perspective projection
 focal_length = 10
+projector = projection.Projector(focal_length, WIDTH // 2, HEIGHT - GROUND_HEIGHT)  # Fixed-point project_3d_to_2d
+ground_strip = ground.Ground(HEIGHT - GROUND_HEIGHT, GROUND_HEIGHT, WIDTH, focal_length, (GREEN, LIGHT_GREEN), DARK_GREEN)
+ground_phase = 0  # Distance travelled, wrapped to one texture period (see ground.py)
+particle_screen_x = array("h", bytes(2 * particle_pool.capacity))  # Particle positions projected once per frame
+particle_screen_y = array("h", bytes(2 * particle_pool.capacity))
 
 # Generate initial city buildings
 def generate_city_background():
-    global buildings
-    buildings = []
-    x = 0
-    while x < WIDTH:
-        width = fixed_width
-        height = random.randint(50, 150)  # Allow buildings to be taller
-        z = random.uniform(10.0, 20.0)  # Start buildings farther away
-        color = random.choice([LIGHT_GRAY, TAN])
-        buildings.append({
-            "x": x, 
-            "y": GROUND_Y,  # Set y to ground level in 3D space
-            "z": z, 
-            "width": width, 
-            "height": height, 
-            "color": color
-        })
-        x += width + random.randint(10, 30)
+    """Start a new city from a fresh seed."""
+    city_stream.reset(random.getrandbits(16))
+
+def new_session(seed):
+    """Seed both random streams and restart, so a recorded session replays exactly."""
+    random.seed(seed)
+    jitter.seed(seed)
+    reset_game()
 
 def reset_game():
-    global ship_x, ship_y, game_over, explosions, ship_explosion_particles
+    global ship_x, ship_y, game_over, level_tick, redraw_pending
     ship_x = WIDTH // 2
     ship_y = HEIGHT // 2
     game_over = False
-    explosions = []  # Clear explosions
-    ship_explosion_particles = []  # Clear ship explosion particles
+    particle_pool.clear()  # Clear smoke, explosions and ship debris
+    burst_emitter.clear()
+    obstacles.clear()
+    projectiles.clear()
+    power_ups.clear()
+    level.restart()
+    level_tick = 0
+    redraw_pending = True  # The render core repaints the whole screen on the next view
     generate_city_background()
 
 def project_3d_to_2d(x, y, z):
-    """Convert 3D coordinates to 2D screen coordinates using perspective projection."""
+    """Convert 3D coordinates to 2D screen coordinates using perspective projection.
+
+    Float reference for projector, which the game draws with.
+    """
     if z == 0:
         z = 0.1  # Prevent division by zero
     screen_x = int(x / z * focal_length + WIDTH // 2)
@@ -100,114 +198,107 @@ def project_3d_to_2d(x, y, z):
 def draw_sky_and_horizon():
     """Draw a gradient sky and horizon."""
     for y in range(HEIGHT - GROUND_HEIGHT):  # Stop before the ground
-        # Interpolate between SKY_BLUE and HORIZON_BLUE based on the y position
-        ratio = y / (HEIGHT - GROUND_HEIGHT)
-        r = int(SKY_BLUE[0] * (1 - ratio) + HORIZON_BLUE[0] * ratio)
-        g = int(SKY_BLUE[1] * (1 - ratio) + HORIZON_BLUE[1] * ratio)
-        b = int(SKY_BLUE[2] * (1 - ratio) + HORIZON_BLUE[2] * ratio)
-        color = display.create_pen(r, g, b)
-        display.set_pen(color)
+        # Pens interpolated between SKY_BLUE and HORIZON_BLUE at startup
+        display.set_pen(SKY_PENS[y])
         display.line(0, y, WIDTH, y)
 
-def draw_ground():
-    """Draw the ground (grass) at the bottom of the screen with fine animated speckles."""
-    # Base grass color
-    display.set_pen(GREEN)
-    display.rectangle(0, HEIGHT - GROUND_HEIGHT, WIDTH, GROUND_HEIGHT)
-    
-    # Create more contrasting darker and lighter green colors for speckles
-    dark_green = display.create_pen(0, 180, 0)  # Darker green for better visibility
-    light_green = display.create_pen(20, 220, 20)  # Less bright light green
-    
-    # Add more numerous, finer speckles for subtle movement effect
-    for _ in range(100):  # Increased number of speckles
-        x = random.randint(0, WIDTH)
-        y = random.randint(HEIGHT - GROUND_HEIGHT, HEIGHT)
-        # Always use size 1 for finer detail
-        display.set_pen(dark_green if random.random() < 0.5 else light_green)
-        display.circle(x, y, 1)
+def restore_background(x, y, w, h):
+    """Repaint part of the sky from the cached scanline pens."""
+    for row in range(y, min(y + h, HEIGHT - GROUND_HEIGHT)):
+        display.set_pen(SKY_PENS[row])
+        display.pixel_span(x, row, w)
+
+def draw_ground(view):
+    """Draw the grass, its bands and speckles scrolling toward the player."""
+    ground_strip.draw(display, view.ground_phase)
+    damage_tracker.mark_strip(HEIGHT - GROUND_HEIGHT, GROUND_HEIGHT)
 
 def draw_city_background():
     """Draw the city background with moving buildings."""
 
-def draw_city_background():
+def update_city():
+    """Move the city and the ground toward the player, retiring passed buildings and streaming new ones."""
+    global ground_phase
+    city_stream.advance(building_speed)
+    ground_phase = ground.advance(ground_phase, building_speed)
+
+def project_city():
+    """Project every building's front face, once per city update, for drawing and collision alike."""
+    city_stream.project(projector, -(WIDTH // 2))
+
+def capture_city(out, rects_out, limit):
+    """Copy up to limit on-screen buildings and their rects into out and rects_out, nearest kept, farthest first."""
+    project_city()
+    buildings, rects = city_stream.buildings, city_stream.rects
+    n = 0
+    for k in range(city_stream.count):
+        i = city_stream.index(k)
+        # Only draw buildings that are far enough (z > 9.0)
+        if buildings.z[i] <= 9.0:
+            continue
+        # Skip buildings wholly off the sides, counting the side face
+        left, right = rects.left[i], rects.right[i]
+        if right + (right - left) // 4 < 0 or left >= WIDTH:
+            continue
+        city_visible[n] = i
+        n += 1
+        if n == limit:
+            break
+    # Back to front, so nearer buildings paint over farther ones
+    out.clear()
+    rects_out.clear()
+    for j in range(n - 1, -1, -1):
+        i = city_visible[j]
+        out.spawn(buildings.x[i], buildings.y[i], buildings.z[i], buildings.width[i], buildings.height[i], buildings.color[i])
+        rects_out.spawn(rects.left[i], rects.top[i], rects.right[i], rects.bottom[i])
+
+def draw_city_background(view):
     """Draw the city background with moving buildings."""
-    global buildings
-    
-    # Remove buildings that are too close to the player
-    buildings = [building for building in buildings if building["z"] > 7.0]
-    
-    # Limit the number of buildings to 2
-    visible_buildings = buildings[:2]
-    
-    for building in visible_buildings:
-        # Update building position (move closer to the player)
-        building["z"] -= building_speed
+    city = view.buildings  # Culled and ordered back to front by capture_city
+    rects = view.building_rects  # Projected front faces, the same ones check_collision tests
+    for i in range(city.count):
+        z = city.z[i]
+        left, top = rects.left[i], rects.top[i]
         
-        # Only draw buildings that are far enough (z > 9.0)
-        if building["z"] > 9.0:
-            # Project base and top coordinates to 2D
-            screen_x_base, screen_y_base = project_3d_to_2d(building["x"] - WIDTH // 2, building["y"], building["z"])
-            screen_x_top, screen_y_top = project_3d_to_2d(building["x"] - WIDTH // 2, building["y"] + building["height"], building["z"])
-            
-            # Scale width based on depth
-            # Scale width based on depth
-            
-            # Calculate height based on the difference in y coordinates
-            height = screen_y_base - screen_y_top
-            
-            # Ensure height is positive
-            if height < 0:
-                height = 0
-                
-            # Clamp screen coordinates to screen boundaries
-            screen_x = max(0, min(WIDTH, screen_x_base - building["width"] // 2))
-            screen_y = max(0, min(HEIGHT, screen_y_top))
-            screen_width = max(0, min(WIDTH - screen_x, building["width"]))
-            screen_height = max(0, min(HEIGHT - screen_y, height))
-            
-            # Adjust screen_y to be slightly into the ground
-            ground_overlap = 10
-            screen_y += ground_overlap
-            
-            # Draw the front of the building
-            display.set_pen(building["color"])
-            display.rectangle(screen_x, screen_y - ground_overlap, screen_width, screen_height)
+        # Clamp screen coordinates to screen boundaries
+        screen_x = max(0, min(WIDTH, left))
+        screen_y = max(0, min(HEIGHT, top))
+        
+        # Height from the clamped top, so a building taller than the screen still stops at its base
+        height = rects.bottom[i] - screen_y
+        
+        # Ensure height is positive
+        if height < 0:
+            height = 0
             
-            # Draw the side of the building
-            display.set_pen(SIDE_GRAY)
-            side_width = screen_width // 4  # Adjust the width of the side
-            display.rectangle(screen_x + screen_width, screen_y - ground_overlap + side_width, side_width, screen_height - side_width)
-    
-    # Only spawn new buildings if there are fewer than 2
-    if len(buildings) < 2 and random.randint(0, 10) == 0:
-        x = random.randint(0, WIDTH)
-        z = random.uniform(15.0, 20.0)  # Start buildings further away
-        width = random.randint(30, 80)  # Increased variation in building width
-        height = random.randint(60, 200)  # Increased variation in building height
-        color = random.choice([DARK_GRAY, LIGHT_GRAY])
-        buildings.append({
-            "x": x,
-            "y": GROUND_Y,
-            "z": z,
-            "width": width,
-            "height": height,
-            "color": color
-        })
-
-def update_smoke_particles():
-    """Update and remove old smoke particles"""
-    global smoke_particles
-    for particle in smoke_particles[:]:
-        particle[3] -= 1  # Decrease lifetime
-        particle[0] += particle[4]  # Move x based on velocity
-        particle[1] += particle[5]  # Move y based on velocity
-        particle[6] = max(0, particle[6] - 2) # Decrease alpha (fade out)
-        if particle[3] <= 0 or particle[6] <= 0:
-            smoke_particles.remove(particle)
+        screen_width = max(0, min(WIDTH - screen_x, rects.right[i] - screen_x))
+        screen_height = max(0, min(HEIGHT - screen_y, height))
+        
+        # Adjust screen_y to be slightly into the ground
+        ground_overlap = 10
+        screen_y += ground_overlap
+        
+        # Draw the front of the building
+        key = renderqueue.layer(z)
+        render_queue.rectangle(key, city.color[i], screen_x, screen_y - ground_overlap, screen_width, screen_height)
+        
+        # Draw the side of the building
+        side_width = screen_width // 4  # Adjust the width of the side
+        render_queue.rectangle(key, SIDE_GRAY, screen_x + screen_width, screen_y - ground_overlap + side_width, side_width, screen_height - side_width)
+        damage_tracker.mark(screen_x, screen_y - ground_overlap, screen_width + side_width, screen_height)
+
+def update_bursts():
+    """Spawn this tick's share of any queued explosions."""
+    burst_emitter.update()
+
+def update_particles():
+    """Update smoke, explosion and ship debris particles and drop expired ones."""
+    particle_pool.update()
 
 def create_smoke_particle(x, y, side):
     """Create a new smoke particle"""
+    if not governor.emit():  # Thin out the trail when frames run long
+        return
     vx = random.uniform(-1, 1)
     vy = random.uniform(-0.5, 0.5)
     if side == 'left':
@@ -216,398 +307,549 @@ def create_smoke_particle(x, y, side):
         vx -= 1  # Drift left when tilting right
     size = random.randint(2, 4)
     lifetime = random.randint(10, 20)
-    alpha = 255 # Initial alpha value
-    smoke_particles.append([x, y, size, lifetime, vx, vy, alpha])
+    particle_pool.spawn(particles.SMOKE, x, y, 0, vx, vy, size, lifetime, SMOKE_FADE)
 
-def draw_ship():
+def update_ship():
+    """Bank the ship toward B or Y and emit its smoke trail."""
     global ship_rotation
+    left = button_b.is_pressed
+    right = button_y.is_pressed
     
-    # Update rotation based on movement
-    if button_b.is_pressed:  # Left tilt
-        ship_rotation = 30
+    # Ease the bank toward the held direction
+    if left:  # Left tilt
+        target = meshes.BANK_LIMIT
         create_smoke_particle(ship_x - 20, ship_y + 10, 'left')
-    elif button_y.is_pressed:  # Right tilt
-        ship_rotation = -30    
+    elif right:  # Right tilt
+        target = -meshes.BANK_LIMIT
     else:  # Return to center
-        ship_rotation = 0
+        target = 0
+    if ship_rotation < target:
+        ship_rotation = min(target, ship_rotation + BANK_RATE)
+    elif ship_rotation > target:
+        ship_rotation = max(target, ship_rotation - BANK_RATE)
         
     # Create smoke particles continuously
     create_smoke_particle(ship_x, ship_y + 10, 'center')
     
+    # Create smoke particles when tilting
+    if left:  # Left tilt
+        create_smoke_particle(int(ship_x) - 20, int(ship_y) + 10, 'left')
+    elif right:  # Right tilt
+        create_smoke_particle(int(ship_x) + 20, int(ship_y) + 10, 'right')
+
+def draw_ship(view):
+    ship_x, ship_y, ship_rotation = view.ship_x, view.ship_y, view.ship_rotation
+    
     # Draw smoke particles with varying alpha
-    for particle in smoke_particles:
-        display.set_pen(display.create_pen(particle[6], particle[6], particle[6]))
-        display.circle(int(particle[0]), int(particle[1]), particle[2])
+    pool = view.particles
+    pens = palette.pens
+    key = renderqueue.layer(SHIP_Z)
+    min_x, min_y, max_x, max_y = WIDTH, HEIGHT, 0, 0
+    for i in range(pool.count):
+        if pool.kind[i] == particles.SMOKE:
+            x, y, r = int(pool.x[i]), int(pool.y[i]), int(pool.size[i])
+            render_queue.circle(key, pens[pool.color[i]], x, y, r, batch=True)
+            min_x, min_y = min(min_x, x - r), min(min_y, y - r)
+            max_x, max_y = max(max_x, x + r), max(max_y, y + r)
+    damage_tracker.mark(min_x, min_y, max_x - min_x + 1, max_y - min_y + 1)
     
     # Draw jet engine effects
-    display.set_pen(ORANGE)
     for _ in range(3):
-        flame_x = ship_x + random.randint(-3, 3)
-        flame_y = ship_y + 12 + random.randint(0, 5)  # Moved flames closer to jet
-        flame_size = random.randint(2, 4)
-        display.circle(int(flame_x), int(flame_y), int(flame_size))
+        flame_x = ship_x + jitter.randint(-3, 3)
+        flame_y = ship_y + 12 + jitter.randint(0, 5)  # Moved flames closer to jet
+        flame_size = jitter.randint(2, 4)
+        render_queue.circle(key, ORANGE, int(flame_x), int(flame_y), int(flame_size))
     
-    # Create smoke particles when tilting
-    if button_b.is_pressed:  # Left tilt
-        create_smoke_particle(int(ship_x) - 20, int(ship_y) + 10, 'left')
-    elif button_y.is_pressed:  # Right tilt
-        create_smoke_particle(int(ship_x) + 20, int(ship_y) + 10, 'right')
-    
-    display.set_pen(BLUE)
+    # Draw jet body from the baked pose nearest the bank angle, over the smoke and flames
+    key += 1
+    x, y = int(ship_x), int(ship_y)
+    pose = meshes.ship_pose(ship_rotation)
+    mesh = meshes.ship_poses
+    o = pose * meshes.SHIP_VALUES
+    for k in range(o, o + meshes.SHIP_VALUES, 6):
+        render_queue.triangle(key, BLUE, x + mesh[k], y + mesh[k + 1], x + mesh[k + 2], y + mesh[k + 3], x + mesh[k + 4], y + mesh[k + 5])
     
-    # Draw jet body
-    if ship_rotation == 0:  # No tilt
-        display.triangle(int(ship_x) - 15, int(ship_y) + 10, int(ship_x) + 15, int(ship_y) + 10, int(ship_x), int(ship_y) - 15)  # Main body
-        # Wings
-        display.triangle(int(ship_x) - 25, int(ship_y) + 5, int(ship_x) - 5, int(ship_y) + 5, int(ship_x) - 15, int(ship_y) - 5)  # Left wing
-        display.triangle(int(ship_x) + 5, int(ship_y) + 5, int(ship_x) + 25, int(ship_y) + 5, int(ship_x) + 15, int(ship_y) - 5)  # Right wing
-    elif ship_rotation > 0:  # Left tilt
-        display.triangle(int(ship_x) - 10, int(ship_y) + 15, int(ship_x) + 20, int(ship_y) + 5, int(ship_x) + 5, int(ship_y) - 15)  # Main body
-        # Wings
-        display.triangle(int(ship_x) - 20, int(ship_y) + 10, int(ship_x), int(ship_y) + 10, int(ship_x) - 5, int(ship_y))  # Left wing
-        display.triangle(int(ship_x) + 10, int(ship_y), int(ship_x) + 30, int(ship_y), int(ship_x) + 20, int(ship_y) - 10)  # Right wing
-    else:  # Right tilt
-        display.triangle(int(ship_x) - 20, int(ship_y) + 5, int(ship_x) + 10, int(ship_y) + 15, int(ship_x) - 5, int(ship_y) - 15)  # Main body
-        # Wings
-        display.triangle(int(ship_x) - 30, int(ship_y), int(ship_x) - 10, int(ship_y), int(ship_x) - 20, int(ship_y) - 10)  # Left wing
-        display.triangle(int(ship_x), int(ship_y) + 10, int(ship_x) + 20, int(ship_y) + 10, int(ship_x) + 5, int(ship_y))  # Right wing
-
-def draw_obstacles():
-    for obstacle in obstacles:
+    # Pose bounds plus the flames below it
+    b = pose * 4
+    bounds = meshes.ship_bounds
+    min_x, min_y = min(bounds[b], -7), min(bounds[b + 1], 8)
+    max_x, max_y = max(bounds[b + 2], 7), max(bounds[b + 3], 21)
+    damage_tracker.mark(x + min_x, y + min_y, max_x - min_x + 1, max_y - min_y + 1)
+
+def off_screen(x, y, reach):
+    """True if a shape reaching reach pixels from (x, y) misses the screen."""
+    return x + reach < 0 or x - reach >= WIDTH or y + reach < 0 or y - reach >= HEIGHT
+
+def draw_obstacles(view):
+    obstacles = view.obstacles
+    for i in range(obstacles.count):
         # Project coordinates
-        screen_x, screen_y = project_3d_to_2d(obstacle['x'] - WIDTH // 2, obstacle['y'] - HEIGHT // 2, obstacle['z'])
-        size = int(obstacle['size'] / obstacle['z'])
+        z = obstacles.z[i]
+        screen_x, screen_y = projector.project(obstacles.x[i] - WIDTH // 2, obstacles.y[i] - HEIGHT // 2, z)
+        size = int(obstacles.size[i] / z)
+        is_boss = obstacles.is_boss[i]
+        # Boss wings reach 2 * size to the sides and horns 1.5 * size up
+        reach = size * 2 if is_boss else size
+        if off_screen(screen_x, screen_y, reach):
+            continue
+        detail = meshes.lod(size)
+        key = renderqueue.layer(z)
         
-        if obstacle['is_boss']:
+        if detail == meshes.DOT:
+            # Too small for any parts: one body-sized block
+            r = size if is_boss else size // 2
+            render_queue.rectangle(key, PURPLE if is_boss else RED, screen_x - r, screen_y - r, r * 2 + 1, r * 2 + 1)
+            damage_tracker.mark(screen_x - r, screen_y - r, r * 2 + 1, r * 2 + 1)
+            continue
+        if is_boss:
             # Draw boss monster (larger with wings and horns)
-            display.set_pen(PURPLE)
+            o = meshes.boss(size)
+            shape = meshes.boss_shapes
             # Body
-            display.circle(screen_x, screen_y, size)
-            # Wings
-            display.triangle(screen_x - size * 2, screen_y, screen_x, screen_y - size, screen_x, screen_y + size)  # Left wing
-            display.triangle(screen_x + size * 2, screen_y, screen_x, screen_y - size, screen_x, screen_y + size)  # Right wing
-            # Horns
-            display.triangle(screen_x - size//2, screen_y - size, screen_x - size//4, screen_y - size * 1.5, screen_x, screen_y - size)
-            display.triangle(screen_x + size//2, screen_y - size, screen_x + size//4, screen_y - size * 1.5, screen_x, screen_y - size)
-            # Eyes
-            display.set_pen(RED)
-            display.circle(screen_x - size//3, screen_y - size//3, size//4)
-            display.circle(screen_x + size//3, screen_y - size//3, size//4)
+            render_queue.circle(key, PURPLE, screen_x + shape[o], screen_y + shape[o + 1], shape[o + 2])
+            # Wings, then horns and eyes only at full detail
+            end = o + 27 if detail == meshes.FULL else o + 15
+            for k in range(o + 3, end, 6):
+                render_queue.triangle(key, PURPLE, screen_x + shape[k], screen_y + shape[k + 1], screen_x + shape[k + 2], screen_y + shape[k + 3], screen_x + shape[k + 4], screen_y + shape[k + 5])
+            if detail == meshes.FULL:
+                # Eyes, over the body
+                for k in range(o + 27, o + 33, 3):
+                    render_queue.circle(key + 1, RED, screen_x + shape[k], screen_y + shape[k + 1], shape[k + 2])
         else:
             # Draw regular flying monster
-            display.set_pen(RED)
+            o = meshes.regular(size)
+            shape = meshes.regular_shapes
             # Body
-            display.circle(screen_x, screen_y, size//2)
+            render_queue.circle(key, RED, screen_x + shape[o], screen_y + shape[o + 1], shape[o + 2])
             # Wings
-            display.triangle(screen_x - size, screen_y, screen_x, screen_y - size//2, screen_x, screen_y + size//2)  # Left wing
-            display.triangle(screen_x + size, screen_y, screen_x, screen_y - size//2, screen_x, screen_y + size//2)  # Right wing
-            # Eye
-            display.set_pen(YELLOW)
-            display.circle(screen_x, screen_y - size//4, size//4)
-
-def draw_projectiles():
-    for projectile in projectiles:
-        display.set_pen(projectile[3])  # Use the projectile's color
-        screen_x, screen_y = project_3d_to_2d(projectile[0] - WIDTH // 2, projectile[1], projectile[2])
-        display.circle(screen_x, screen_y, 2)
-
-def draw_power_ups():
-    for power_up in power_ups:
-        display.set_pen(GREEN)
-        screen_x, screen_y = project_3d_to_2d(power_up[0] - WIDTH // 2, power_up[1], power_up[2])
-        size = int(5 / power_up[2] * focal_length)
-        display.circle(screen_x, screen_y, size)
+            for k in range(o + 3, o + 15, 6):
+                render_queue.triangle(key, RED, screen_x + shape[k], screen_y + shape[k + 1], screen_x + shape[k + 2], screen_y + shape[k + 3], screen_x + shape[k + 4], screen_y + shape[k + 5])
+            if detail == meshes.FULL:
+                # Eye, over the body
+                render_queue.circle(key + 1, YELLOW, screen_x + shape[o + 15], screen_y + shape[o + 16], shape[o + 17])
+        damage_tracker.mark(screen_x - reach, screen_y - reach, reach * 2 + 1, reach * 2 + 1)
+
+def draw_projectiles(view):
+    projectiles = view.projectiles
+    for i in range(projectiles.count):
+        screen_x, screen_y = projector.project(projectiles.x[i] - WIDTH // 2, projectiles.y[i], projectiles.z[i])
+        if off_screen(screen_x, screen_y, 2):
+            continue
+        render_queue.circle(renderqueue.layer(projectiles.z[i]), projectiles.color[i], screen_x, screen_y, 2)  # Use the projectile's color
+        damage_tracker.mark(screen_x - 2, screen_y - 2, 5, 5)
+
+def draw_power_ups(view):
+    power_ups = view.power_ups
+    for i in range(power_ups.count):
+        screen_x, screen_y = projector.project(power_ups.x[i] - WIDTH // 2, power_ups.y[i], power_ups.z[i])
+        size = (5 * projector.scale(power_ups.z[i])) >> projection.RECIP_BITS
+        if off_screen(screen_x, screen_y, size):
+            continue
+        key = renderqueue.layer(power_ups.z[i])
+        if size < 2:
+            render_queue.rectangle(key, GREEN, screen_x - size, screen_y - size, size * 2 + 1, size * 2 + 1)  # A circle this small is a block anyway
+        else:
+            render_queue.circle(key, GREEN, screen_x, screen_y, size)
+        damage_tracker.mark(screen_x - size, screen_y - size, size * 2 + 1, size * 2 + 1)
 
 obstacle_speed = 0.2  # Add this line to control obstacle speed
 
+def spawn_waves():
+    """Spawn every level record due by this tick and advance the level clock."""
+    global level_tick
+    while level.next(level_tick):
+        if level.kind == waves.POWER_UP:
+            power_ups.spawn(level.x, level.y, level.z)
+        else:
+            obstacles.spawn(level.x, level.y, level.z, level.size, level.health, level.kind == waves.BOSS)
+    level_tick += 1
+
 def update_obstacles():
-    global obstacles, score, last_boss_score  # Declare global variables
+    global score  # Declare global variables
     if not game_over:
+        z = obstacles.z
         # Move obstacles closer
-        for obstacle in obstacles:
-            obstacle['z'] -= obstacle_speed  # Move along Z-axis
+        for i in range(obstacles.count):
+            z[i] -= obstacle_speed  # Move along Z-axis
         # Remove off-screen obstacles
-        obstacles = [obstacle for obstacle in obstacles if obstacle['z'] > 0.1]
-        # Spawn new obstacles
-        if random.randint(0, spawn_rate) == 0:
-            if score % 100 == 0 and score != last_boss_score:
-                x = random.randint(WIDTH // 4, 3 * WIDTH // 4)
-                y = random.randint(0, HEIGHT)
-                z = random.uniform(10.0, 15.0)
-                size = 15  # Larger size for boss
-                health = 10
-                obstacles.append({'x': x, 'y': y, 'z': z, 'size': size, 'health': health, 'is_boss': True})
-                last_boss_score = score
-            else:
-                side = random.choice(['left', 'right'])
-                if side == 'left':
-                    x = random.randint(0, WIDTH // 4)
-                else:
-                    x = random.randint(3 * WIDTH // 4, WIDTH)
-                y = random.randint(0, HEIGHT)
-                z = random.uniform(10.0, 15.0)
-                size = 5
-                health = 1
-                obstacles.append({'x': x, 'y': y, 'z': z, 'size': size, 'health': health, 'is_boss': False})
+        for i in range(obstacles.count - 1, -1, -1):
+            if z[i] <= 0.1:
+                obstacles.remove(i)
         # Check for score
-        for obstacle in obstacles:
-            if obstacle['z'] <= 1.0:  # Obstacle passed the player
+        for i in range(obstacles.count):
+            if obstacles.z[i] <= 1.0:  # Obstacle passed the player
                 score += 1
 
 def update_projectiles():
-    global projectiles, obstacles, explosions, score  # Declare global variables
+    global score  # Declare global variables
     # Move projectiles away from the player
-    projectiles = [projectile for projectile in projectiles if projectile[2] < 20.0]
-    for projectile in projectiles:
-        projectile[2] += 0.2  # Move along Z-axis
+    for i in range(projectiles.count - 1, -1, -1):
+        if projectiles.z[i] >= 20.0:
+            projectiles.remove(i)
+    for i in range(projectiles.count):
+        projectiles.z[i] += 0.2  # Move along Z-axis
+    # Index the obstacles within the minimum distance, sized by their hit radius
+    obstacle_grid.clear()
+    ox, oy, oz = obstacles.x, obstacles.y, obstacles.z
+    for i in range(obstacles.count):
+        if oz[i] <= MIN_COLLISION_DISTANCE:
+            obstacle_grid.add_circle(ox[i], oy[i], 10 + obstacles.size[i] / oz[i] * focal_length, i)
+    if not obstacle_grid.count:
+        return
     # Check for collisions between projectiles and obstacles
-    for projectile in projectiles[:]:
-        for obstacle in obstacles[:]:
-            # Only check for collisions if the obstacle is within the minimum distance
-            if obstacle['z'] <= MIN_COLLISION_DISTANCE:
-                distance = ((projectile[0] - obstacle['x']) ** 2 + (projectile[1] - obstacle['y']) ** 2) ** 0.5
-                if distance < 10 + obstacle['size'] / obstacle['z'] * focal_length:
-                    if obstacle['is_boss']:
-                        obstacle['health'] -= 1
-                        if obstacle['health'] <= 0:
-                            obstacles.remove(obstacle)
-                            # Create bigger, more dramatic boss explosion
-                            for _ in range(150):  # Increased particle count
-                                vx = random.uniform(-4, 4)  # Faster spread
-                                vy = random.uniform(-4, 4)
-                                color = display.create_pen(255, 140, 0)  # Single orange color
-                                explosions.append([obstacle['x'], obstacle['y'], obstacle['z'], 10, color, 20, vx, vy])
-                            score += 100  # Increase score for defeating boss
-                    else:
-                        obstacles.remove(obstacle)
-                        # Create more dramatic regular explosion
-                        for _ in range(50):  # Increased particle count
-                            vx = random.uniform(-3, 3)  # Slower spread
-                            vy = random.uniform(-3, 3)
-                            color = display.create_pen(255, 69, 0)  # Single red-orange color
-                            fragment_width = 3
-                            fragment_height = 2
-                            explosions.append([obstacle['x'], obstacle['y'], obstacle['z'], 6, color, 15, vx, vy, fragment_width, fragment_height])
-                        score += 10
-                    projectiles.remove(projectile)
-                    break
-
-def draw_explosions():
-    """Draw explosion particles as circles with varying sizes and colors."""
-    for particle in explosions:
-        x, y, z, size, color, lifetime, vx, vy, _, _ = particle  # Ignore fragment_width and fragment_height
-        # Project 3D coordinates to 2D screen coordinates
-        screen_x, screen_y = project_3d_to_2d(x - WIDTH // 2, y, z)
-        # Draw circles with some randomness in size
-        display.set_pen(color)
-        radius = random.randint(1, int(size))
-        display.circle(int(screen_x + vx), int(screen_y + vy), radius)
-
-def update_explosions():
-    """Update explosion particles with culling and optimization."""
-    global explosions
-    new_explosions = []
-    for particle in explosions:
-        x, y, z, size, color, lifetime, vx, vy, fragment_width, fragment_height = particle
-        
-        # Cull particles that are off-screen
-        if x < 0 or x > WIDTH or y < 0 or y > HEIGHT:
+    for p in range(projectiles.count):
+        # The first obstacle in table order that is still alive takes the hit
+        slot = obstacle_grid.first_hit(projectiles.x[p], projectiles.y[p])
+        if slot == -1:
             continue
-        
-        # Reduce alpha value (fading effect)
-        alpha = color.r
-        if alpha > 5:
-            alpha -= 5
-            # Introduce some color variation
-            if random.random() < 0.5:
-                color = display.create_pen(alpha, max(0, color.g - 10), color.b)
-            else:
-                color = display.create_pen(alpha, color.g, min(255, color.b + 10))
+        target = obstacle_grid.tag[slot]
+        if obstacles.is_boss[target]:
+            obstacles.health[target] -= 1
+            if obstacles.health[target] <= 0:
+                obstacle_grid.remove(slot)
+                obstacle_removals.mark(target)
+                # Create bigger, more dramatic boss explosion, single orange color
+                burst_emitter.emit(particles.FRAGMENT, ox[target], oy[target], oz[target],
+                                   governor.scale(150), 4, (10, 10), (20, 20), BOSS_FADE)
+                score += 100  # Increase score for defeating boss
         else:
-            color = display.create_pen(0, color.g, color.b)
-        
-        # Update particle position and properties
-        x += int(vx) * 2
-        y += int(vy) * 2
-        size = max(0, size - 0.05)
-        lifetime -= 0.5
-        
-        # Add the particle to the new list if it has not expired
-        if lifetime > 0 and size > 0:
-            new_explosions.append([x, y, z, size, color, lifetime, vx, vy, fragment_width, fragment_height])
-    explosions = new_explosions
+            obstacle_grid.remove(slot)
+            obstacle_removals.mark(target)
+            # Create more dramatic regular explosion, single red-orange color
+            burst_emitter.emit(particles.FRAGMENT, ox[target], oy[target], oz[target],
+                               governor.scale(50), 3, (6, 6), (15, 15), FRAGMENT_FADE)
+            score += 10
+        projectile_removals.mark(p)
+    # Drop everything that was hit in one pass
+    obstacle_removals.apply(obstacles)
+    projectile_removals.apply(projectiles)
+
+def draw_explosions(view):
+    """Draw explosion particles as circles with varying sizes and colors."""
+    global explosion_lit
+    pool = view.particles
+    pens, fade = palette.pens, palette.fade
+    min_x, min_y, max_x, max_y = WIDTH, HEIGHT, 0, 0
+    lit = 0
+    for i in range(pool.count):
+        if pool.kind[i] != particles.FRAGMENT:
+            continue
+        screen_x, screen_y = particle_screen_x[i], particle_screen_y[i]  # Projected by draw_frame
+        # Draw circles with some randomness in size
+        radius = jitter.randint(1, int(pool.size[i]))
+        x, y = int(screen_x + pool.vx[i]), int(screen_y + pool.vy[i])
+        color = pool.color[i]
+        render_queue.circle(renderqueue.layer(pool.z[i]), pens[color], x, y, radius, batch=True)
+        min_x, min_y = min(min_x, x - radius), min(min_y, y - radius)
+        max_x, max_y = max(max_x, x + radius), max(max_y, y + radius)
+        if fade[color] != color:  # Still burning
+            lit += 1
+    explosion_lit += lit
+    damage_tracker.mark(min_x, min_y, max_x - min_x + 1, max_y - min_y + 1)
 
 def update_power_ups():
-    global power_ups, special_weapon_active, special_weapon_timer
-    for power_up in power_ups:
-        power_up[2] -= 0.1  # Move along Z-axis
+    global special_weapon_active, special_weapon_timer
+    z = power_ups.z
+    for i in range(power_ups.count):
+        z[i] -= 0.1  # Move along Z-axis
     # Remove off-screen power-ups
-    power_ups = [power_up for power_up in power_ups if power_up[2] > 0.1]
+    for i in range(power_ups.count - 1, -1, -1):
+        if z[i] <= 0.1:
+            power_ups.remove(i)
     # Check for power-up collection
-    for power_up in power_ups[:]:
-        distance = ((ship_x - power_up[0]) ** 2 + (ship_y - power_up[1]) ** 2) ** 0.5
-        if distance < 15:  # Collect power-up
-            special_weapon_active = True
-            special_weapon_timer = special_weapon_duration
-            power_ups.remove(power_up)
-    # Spawn new power-ups
-    if random.randint(0, 200) == 0:
-        x = random.randint(0, WIDTH)
-        y = random.randint(0, HEIGHT)
-        z = random.uniform(10.0, 15.0)
-        power_ups.append([x, y, z])
-
-ship_explosion_particles = []
+    power_up_grid.clear()
+    for i in range(power_ups.count):
+        power_up_grid.add_circle(power_ups.x[i], power_ups.y[i], 15, i)  # Collection radius
+    n = power_up_grid.query(ship_x, ship_y)
+    if n:
+        special_weapon_active = True
+        special_weapon_timer = special_weapon_duration
+        for k in range(n):
+            power_up_removals.mark(power_up_grid.hits[k])
+        power_up_removals.apply(power_ups)
 
 def check_collision():
-    global game_over, explosions, ship_explosion_particles
+    global game_over
     if not game_over:
-        # Check collision with buildings
-        for building in buildings:
-            if 7.0 < building["z"] < 9.0:  # Only check buildings in front of player
-                # Project building coordinates
-                screen_x_base, screen_y_base = project_3d_to_2d(building["x"] - WIDTH // 2, building["y"], building["z"])
-                screen_x_top, screen_y_top = project_3d_to_2d(building["x"] - WIDTH // 2, building["y"] + building["height"], building["z"])
-                width = int(building["width"] / building["z"] * focal_length)
-                height = screen_y_base - screen_y_top  # Calculate height
-                
-                # Check if ship is within building bounds
-                if (screen_x_base - width // 2 < ship_x < screen_x_base + width // 2 and
-                        screen_y_top < ship_y < screen_y_base):
-                    game_over = True
-                    # Create optimized ship explosion
-                    for _ in range(300):  # Increased particle count for larger explosion
-                        vx = random.uniform(-8, 8)  # Faster spread for larger explosion
-                        vy = random.uniform(-8, 8)
-                        size = random.randint(4, 12)  # Increased particle size for larger explosion
-                        lifetime = random.randint(30, 70)  # Longer lifetime for fizzling effect
-                        color = display.create_pen(255, 255, 0)  # Yellow color for explosion
-                        angle = random.uniform(0, 2 * math.pi)
-                        fragment_width = size * math.cos(angle)
-                        fragment_height = size * math.sin(angle)
-                        ship_explosion_particles.append([ship_x, ship_y, 1.0, size, color, lifetime, vx, vy, fragment_width, fragment_height])
-
-                    # Create optimized building explosion
-                    for _ in range(200):  # Increased particle count
-                        vx = random.uniform(-5, 5)
-                        vy = random.uniform(-5, 5)
-                        size = random.randint(4, 10)  # Vary particle size
-                        lifetime = random.randint(20, 50)
-                        color = random.choice([display.create_pen(255, 69, 0), display.create_pen(255, 165, 0)])  # Vary color
-                        angle = random.uniform(0, 2 * math.pi)
-                        fragment_width = size * math.cos(angle)
-                        fragment_height = size * math.sin(angle)
-                        explosions.append([ship_x, ship_y, building["z"], size, color, lifetime, vx, vy, fragment_width, fragment_height])
-
-def update_ship_explosion_particles():
-    """Update ship explosion particles with culling."""
-    global ship_explosion_particles
-    new_particles = []
-    for particle in ship_explosion_particles:
-        x, y, z, size, color, lifetime, vx, vy = particle
-
-        # Cull particles that are off-screen
-        if x < 0 or x > WIDTH or y < 0 or y > HEIGHT:
-            continue
-
-        # Reduce alpha value (fading effect)
-        alpha = color.r
-        if alpha > 10:
-            alpha -= 10
-            color = display.create_pen(alpha, color.g, color.b)
-        else:
-            color = display.create_pen(0, color.g, color.b)
-
-        # Update particle position and properties
-        x += vx * 2  # Increased velocity
-        y += vy * 2  # Increased velocity
-        size = max(0, size - 0.2)  # Faster size reduction
-        lifetime -= 1  # Faster expiration
-
-        # Add the particle to the new list if it has not expired
-        if lifetime > 0 and size > 0:
-            # Rotate the fragment
-            angle = random.uniform(0, 2 * math.pi)
-            fragment_width = size * math.cos(angle)
-            fragment_height = size * math.sin(angle)
-            new_particles.append([x, y, z, size, color, lifetime, vx, vy, fragment_width, fragment_height])
-    ship_explosion_particles = new_particles
-
-def draw_ship_explosion():
+        # Index the screen rectangles of buildings in front of the player
+        building_grid.clear()
+        project_city()  # Usually already done for the last frame's capture
+        buildings, rects = city_stream.buildings, city_stream.rects
+        for k in range(city_stream.count):
+            i = city_stream.index(k)
+            z = buildings.z[i]
+            if z >= 9.0:
+                break  # Nearest first, so the rest are farther still
+            if z > 7.0:
+                building_grid.add_box(rects.left[i], rects.top[i], rects.right[i], rects.bottom[i], i)
+        # Check if ship is within building bounds
+        hit = building_grid.first_hit(ship_x, ship_y)
+        if hit != -1:
+            hit_z = buildings.z[building_grid.tag[hit]]
+            game_over = True
+            if RECORD:
+                input_log.flush()  # Save the run so far; the board may be unplugged on this screen
+            # Create the ship explosion: large, long-lived yellow debris
+            burst_emitter.emit(particles.DEBRIS, ship_x, ship_y, 1.0,
+                               governor.scale(300), 8, (4, 12), (30, 70), SHIP_DEBRIS_FADE)
+
+            # Create the building explosion in mixed fragment and fire colours
+            burst_emitter.emit(particles.FRAGMENT, ship_x, ship_y, hit_z,
+                               governor.scale(200), 5, (4, 10), (20, 50), FRAGMENT_FADE, FIRE_FADE)
+
+def draw_ship_explosion(view):
     """Draw ship explosion particles."""
-    for particle in ship_explosion_particles:
-        x, y, z, size, color, lifetime, vx, vy, fragment_width, fragment_height = particle
-        # Project 3D coordinates to 2D screen coordinates
-        screen_x, screen_y = project_3d_to_2d(x - WIDTH // 2, y, z)
+    global explosion_lit
+    pool = view.particles
+    pens, fade = palette.pens, palette.fade
+    min_x, min_y, max_x, max_y = WIDTH, HEIGHT, 0, 0
+    lit = 0
+    for i in range(pool.count):
+        if pool.kind[i] != particles.DEBRIS:
+            continue
+        screen_x, screen_y = particle_screen_x[i], particle_screen_y[i]  # Projected by draw_frame
+        # Rotated fragment extents
+        size = pool.size[i]
+        fragment_width = size * particles.ANGLE_COS[pool.angle[i]]
+        fragment_height = size * particles.ANGLE_SIN[pool.angle[i]]
         # Draw the fragment
-        display.set_pen(color)
-        display.rectangle(int(screen_x - fragment_width / 2), int(screen_y - fragment_height / 2), int(fragment_width), int(fragment_height))
+        x, y = int(screen_x - fragment_width / 2), int(screen_y - fragment_height / 2)
+        w, h = int(fragment_width), int(fragment_height)
+        color = pool.color[i]
+        render_queue.rectangle(renderqueue.layer(pool.z[i]), pens[color], x, y, w, h, batch=True)
+        # Fragments spun past 90 degrees have negative extents
+        min_x, min_y = min(min_x, x, x + w), min(min_y, y, y + h)
+        max_x, max_y = max(max_x, x, x + w), max(max_y, y, y + h)
+        if fade[color] != color:  # Still burning
+            lit += 1
+    explosion_lit += lit
+    damage_tracker.mark(min_x, min_y, max_x - min_x + 1, max_y - min_y + 1)
+
+def glow_sky():
+    """Tint the sky toward GLOW_COLOR by how many explosion particles were drawn.
+
+    Only the sky's palette entries change; no pixel is redrawn. Each new tint
+    pushes the whole screen once, so the tint moves in GLOW_STEP steps.
+    """
+    global explosion_lit
+    amount = min(GLOW_LIMIT, explosion_lit * GLOW_PER_PARTICLE) // GLOW_STEP * GLOW_STEP
+    explosion_lit = 0
+    if palette.tint(display, GLOW_COLOR, amount):
+        damage_tracker.push_all()
 
 def draw_game_over():
     display.set_pen(WHITE)
     display.text("Game Over!", WIDTH // 2 - 50, HEIGHT // 2 - 10, scale=2)
     display.text("Press A to restart", WIDTH // 2 - 70, HEIGHT // 2 + 20, scale=1)
+    damage_tracker.mark(WIDTH // 2 - 70, HEIGHT // 2 - 10, 150, 40)
 
-def game_loop():
+def step_world():
+    """Advance the simulation by one fixed tick; all speeds are per tick."""
     global ship_x, ship_y, game_over, ship_speed, max_speed
     
-    while True:
-        # Draw sky and horizon
-        draw_sky_and_horizon()
-        
-        # Draw ground
-        draw_ground()
-        
-        if not game_over:
-            # Increase ship speed over time
-            if ship_speed < max_speed:
-                ship_speed += speed_increment
-            
-            # Move ship up and down with A and X buttons
-            if button_a.is_pressed and ship_y > 20:  # Move up
-                ship_y -= up_down_speed
-            if button_x.is_pressed and ship_y < HEIGHT - 20:  # Move down
-                ship_y += up_down_speed
-            
-            # Move ship left and right with B and Y buttons
-            if button_b.is_pressed and ship_x > 20:  # Move left
-                ship_x -= left_right_speed
-            if button_y.is_pressed and ship_x < WIDTH - 20:  # Move right
-                ship_x += left_right_speed
-            
-            # Update smoke particles
-            update_smoke_particles()
-            
-            # Update obstacle explosions
-            update_explosions()
-            
-            # Update ship explosion particles
-            update_ship_explosion_particles()
-            
-            # Check collision
-            check_collision()
+    if input_log is not None:
+        input_log.tick()
+    
+    if not game_over:
+        # Increase ship speed over time
+        if ship_speed < max_speed:
+            ship_speed += speed_increment
         
-        # Draw city background
-        draw_city_background()
+        # Move ship up and down with A and X buttons
+        if button_a.is_pressed and ship_y > 20:  # Move up
+            ship_y -= up_down_speed
+        if button_x.is_pressed and ship_y < HEIGHT - 20:  # Move down
+            ship_y += up_down_speed
         
-        # Draw elements
-        if not game_over:
-            draw_ship()
+        # Move ship left and right with B and Y buttons
+        if button_b.is_pressed and ship_x > 20:  # Move left
+            ship_x -= left_right_speed
+        if button_y.is_pressed and ship_x < WIDTH - 20:  # Move right
+            ship_x += left_right_speed
         
-        # Draw explosions
-        draw_explosions()
+        # Spawn the obstacles, bosses and power-ups the level has due
+        spawn_waves()
         
-        # Draw ship explosion
-        draw_ship_explosion()
+        # Move monsters, shots and power-ups; shots hit monsters, the ship collects power-ups
+        update_obstacles()
+        update_projectiles()
+        update_power_ups()
         
-        if game_over:
-            draw_game_over()
-            if button_a.is_pressed:
-                reset_game()
+        # Update smoke, explosion and ship debris particles
+        update_particles()
         
-        display.update()
-        utime.sleep(0.02)
+        # Check collision
+        check_collision()
+    
+    # Keep feeding explosions, including the crash behind the game-over screen
+    update_bursts()
+    
+    # Move the city
+    update_city()
+    
+    # Tilt the ship and emit smoke
+    if not game_over:
+        update_ship()
+    
+    if game_over and button_a.is_pressed:
+        reset_game()
+
+def capture_view(view):
+    """Copy everything draw_frame reads from the live world into view."""
+    global redraw_pending
+    view.redraw = redraw_pending
+    redraw_pending = False
+    view.ship_x = ship_x
+    view.ship_y = ship_y
+    view.ship_rotation = ship_rotation
+    view.game_over = game_over
+    view.ground_phase = ground_phase
+    capture_city(view.buildings, view.building_rects, governor.scale(MAX_BUILDINGS))
+    view.particles.copy_from(particle_pool)
+    view.obstacles.copy_from(obstacles)
+    view.projectiles.copy_from(projectiles)
+    view.power_ups.copy_from(power_ups)
+
+def make_view():
+    return pipeline.View(particle_pool.capacity, WIDTH, HEIGHT,
+                         obstacle_capacity=obstacles.capacity, projectile_capacity=projectiles.capacity,
+                         power_up_capacity=power_ups.capacity)
+
+def draw_frame(view):
+    """Draw a captured world state and push it to the screen."""
+    # The damage tracker belongs to this core; a reset only asks for the full redraw
+    if view.redraw:
+        damage_tracker.invalidate()
+    
+    # Repaint the sky only where something was drawn last frame
+    if not damage_tracker.restore(restore_background):
+        draw_sky_and_horizon()
+    
+    # Draw ground
+    draw_ground(view)
+    
+    # Draw city background
+    draw_city_background(view)
+    
+    # Draw elements
+    draw_obstacles(view)
+    draw_power_ups(view)
+    draw_projectiles(view)
+    if not view.game_over:
+        draw_ship(view)
+    
+    # Project every explosion and debris particle in one pass
+    pool = view.particles
+    projector.project_batch(pool.x, pool.y, pool.z, pool.count, particle_screen_x, particle_screen_y, -(WIDTH // 2))
+    
+    # Draw explosions
+    draw_explosions(view)
+    
+    # Draw ship explosion
+    draw_ship_explosion(view)
+    
+    # Everything above was queued; draw it back to front
+    flush_render_queue()
+    
+    # Light the sky with the explosions (palette mode only)
+    glow_sky()
+    
+    if view.game_over:
+        draw_game_over()
+    
+    present()
+
+def flush_render_queue():
+    """Draw the frame's queued scene, back to front with pens batched."""
+    render_queue.flush(display, splat_rasteriser)
+
+def game_frame(steps=1):
+    """Advance the simulation by steps fixed ticks, then draw one frame."""
+    frame_pipeline.frame(steps)
+
+def present():
+    """Push the finished frame to the screen."""
+    damage_tracker.flush(display)
+    if input_sampler is not None:
+        input_sampler.presented()
+
+def game_loop():
+    """Run the simulation at a fixed STEP_MS tick and draw once per loop.
+
+    Elapsed time accumulates in lag and is paid out in whole ticks, so game
+    speed no longer depends on how long drawing takes. Spare time is slept
+    off instead of a fixed delay, or used for garbage collection with
+    MANUAL_GC.
+    """
+    previous = utime.ticks_ms()
+    lag = STEP_MS  # Run the first tick straight away
+    booting = True
+    while True:
+        now = utime.ticks_ms()
+        lag += utime.ticks_diff(now, previous)
+        previous = now
+        # Spend the slack on a collection if one is due, then measure again
+        if heap.idle(STEP_MS - lag, game_over):
+            continue
+        if lag < STEP_MS:
+            utime.sleep_ms(STEP_MS - lag)
+            continue
+        steps = lag // STEP_MS
+        if steps > MAX_STEPS_PER_FRAME:
+            steps = MAX_STEPS_PER_FRAME  # Drop the backlog rather than spiral
+            lag = 0
+        else:
+            lag -= steps * STEP_MS
+        start = utime.ticks_ms()
+        if input_sampler is not None:
+            input_sampler.snapshot()  # Every tick in this frame reads the same buttons
+        game_frame(steps)
+        if booting:
+            # ticks_ms counts from reset, so this covers the interpreter, imports and table setup
+            print("first frame %d ms after reset; %d tables from %s, %d built" % (
+                utime.ticks_ms(), assets.loaded, assets.PATH, len(assets.built)))
+            print("heap %d bytes free; framebuffer %d bytes, %d/%d palette entries" % (
+                heap.free(), len(framebuffer), palette.used, palette.size))
+            if level.records:
+                print("level %s: %d spawns over %d ticks" % (LEVEL_PATH, level.records, level.length))
+            else:
+                print("no level at %s; nothing will spawn" % LEVEL_PATH)
+            booting = False
+        if not RECORD:  # Quality feeds back into the simulation, so hold it while recording
+            governor.update(utime.ticks_diff(utime.ticks_ms(), start))
+
+def make_pipeline(threaded):
+    """Build the frame pipeline; stages are looked up per call so wrappers apply."""
+    return pipeline.Pipeline(lambda: step_world(), lambda view: capture_view(view),
+                             lambda view: draw_frame(view), make_view, threaded)
+
+# Runs step_world and draw_frame, on one core or pipelined across both
+frame_pipeline = make_pipeline(PIPELINED)
 
 # Start the game
-reset_game()
-game_loop()
\ No newline at end of file
+if __name__ == "__main__":
+    if IRQ_INPUT:
+        import inputs
+        input_sampler = inputs.Sampler()
+        button_a, button_b, button_x, button_y = input_sampler.buttons
+    if PROFILE:
+        import profiler
+        profiler.install(globals(), display, chord=(button_a, button_x), damage=damage_tracker)
+    if METER_ALLOC:
+        import allocmeter
+        allocmeter.install(globals(), chord=(button_b, button_y))
+    if MANUAL_GC:
+        heap.begin()
+    if RECORD:
+        import replay
+        seed = utime.ticks_us() & 0xFFFFFFFF
+        input_log = replay.Recorder(RECORD_PATH, (button_a, button_b, button_x, button_y), seed, STEP_MS)
+        button_a, button_b, button_x, button_y = input_log.buttons
+        new_session(seed)
+    else:
+        reset_game()
+    try:
+        game_loop()
+    finally:
+        if RECORD:
+            input_log.close()  # Write the ticks still buffered
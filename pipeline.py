@@ -0,0 +1,105 @@
+"""Two-core frame pipeline.
+
+The simulation and the renderer only meet through a View: a snapshot of
+everything draw_frame() reads. In pipelined mode core 1 steps the world for
+frame N+1 and captures it into the back view while core 0 draws frame N from
+the front view; the two views swap once both sides are done. The handshake
+uses two locks as semaphores, so neither core touches the other's view while
+it is in use. Without _thread (or with threaded=False) the same steps run in
+order on one core.
+"""
+
+import entities
+import particles
+
+try:
+    import _thread
+except ImportError:
+    _thread = None
+
+
+class View:
+    """Snapshot of the world state the renderer needs for one frame."""
+
+    def __init__(self, particle_capacity, width, height, building_capacity=32,
+                 obstacle_capacity=32, projectile_capacity=32, power_up_capacity=8):
+        self.ship_x = 0
+        self.ship_y = 0
+        self.ship_rotation = 0
+        self.game_over = False
+        self.redraw = False  # Repaint the whole screen, e.g. after a reset
+        self.ground_phase = 0
+        self.buildings = entities.Buildings(building_capacity)
+        self.building_rects = entities.ScreenRects(building_capacity)  # Projected by the simulation, same rows
+        self.particles = particles.ParticlePool(particle_capacity, width, height)
+        self.obstacles = entities.Obstacles(obstacle_capacity)
+        self.projectiles = entities.Projectiles(projectile_capacity)
+        self.power_ups = entities.PowerUps(power_up_capacity)
+
+
+class Pipeline:
+    """Runs step() / capture(view) / draw(view) either pipelined or in order."""
+
+    def __init__(self, step, capture, draw, make_view, threaded=True):
+        self.step = step
+        self.capture = capture
+        self.draw = draw
+        self.front = make_view()
+        self.back = make_view() if threaded and _thread else None
+        self.threaded = self.back is not None
+        self.running = False
+        self.error = None
+        self._steps = 0
+
+    def start(self):
+        """Capture the starting state and launch the core 1 worker if pipelined."""
+        self.capture(self.front)
+        if not self.threaded or self.running:
+            return
+        self._go = _thread.allocate_lock()
+        self._done = _thread.allocate_lock()
+        self._go.acquire()
+        self._done.acquire()
+        self.running = True
+        _thread.start_new_thread(self._worker, ())
+
+    def stop(self):
+        """Stop the core 1 worker after its current batch."""
+        if self.running:
+            self.running = False
+            self._go.release()
+            self._done.acquire()
+
+    def frame(self, steps):
+        """Advance the world by steps ticks and draw one frame."""
+        if not self.threaded:
+            for _ in range(steps):
+                self.step()
+            self.capture(self.front)
+            self.draw(self.front)
+            return
+        if not self.running:
+            self.start()
+        # Core 1 simulates the next frame while this core draws the last one
+        self._steps = steps
+        self._go.release()
+        self.draw(self.front)
+        self._done.acquire()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        self.front, self.back = self.back, self.front
+
+    def _worker(self):
+        while True:
+            self._go.acquire()
+            if not self.running:
+                self._done.release()
+                return
+            try:
+                for _ in range(self._steps):
+                    self.step()
+                self.capture(self.back)
+            except Exception as e:
+                self.error = e
+            self._done.release()
@@ -0,0 +1,204 @@
+"""Opt-in frame profiler with an on-screen HUD and CSV dump.
+
+install() swaps the game's stage functions for wrappers that time them with
+utime.ticks_us, so when the profiler is not installed the game runs the
+original functions and pays nothing. The last N frames are kept in a
+preallocated ring buffer, drawn as a small HUD in the top-left corner and
+printed over USB serial as CSV when the dump chord is pressed. A red line
+along the top of the HUD means the render queue dropped draw commands in
+the last frame.
+"""
+
+import assets
+import palette
+from hal import utime
+
+# Stage name -> game functions whose time is charged to it
+STAGES = (
+    ("sky", ("draw_sky_and_horizon",)),
+    ("ground", ("draw_ground",)),
+    ("city", ("update_city", "draw_city_background")),
+    ("ship", ("update_ship", "draw_ship")),
+    ("monsters", ("spawn_waves", "update_obstacles", "update_projectiles", "update_power_ups",
+                  "draw_obstacles", "draw_projectiles", "draw_power_ups")),
+    ("particles", ("update_particles", "update_bursts", "draw_explosions", "draw_ship_explosion")),
+    ("collision", ("check_collision",)),
+    ("queue", ("flush_render_queue",)),
+    ("update", ("present",)),
+)
+COLUMNS = tuple(name for name, _ in STAGES) + ("other", "frame")
+OTHER = len(STAGES)
+FRAME = len(STAGES) + 1
+
+HUD_HEIGHT = 22  # Sparkline height in pixels
+budget_us = 40000  # Frame budget drawn as the HUD baseline; install() takes it from the game's STEP_MS
+_us_per_pixel = 2000  # Sparkline scale, so the budget line sits just under the top
+
+ring = None  # Microseconds per column per frame, oldest overwritten first
+frames_recorded = 0
+_head = 0
+_depth = 0
+_current = None
+_display = None
+_chord = ()
+_chord_held = False
+_pens = None
+_damage = None
+_queue = None  # The game's render_queue, for its dropped count
+
+
+def install(namespace, display, chord=(), depth=64, damage=None):
+    """Wrap the stage functions in namespace (a module's globals()) with timers.
+
+    chord is a sequence of buttons that, held together, dump the ring buffer.
+    damage is the game's DamageTracker, if any, so the HUD area gets pushed.
+    The HUD's budget line is one of the game's STEP_MS ticks.
+    """
+    global ring, frames_recorded, _head, _depth, _current, _display, _chord, _chord_held, _pens, _damage
+    global budget_us, _us_per_pixel, _queue
+    _queue = namespace.get("render_queue")
+    budget_us = namespace.get("STEP_MS", budget_us // 1000) * 1000
+    _us_per_pixel = -(-budget_us // (HUD_HEIGHT - 2))
+    ring = assets.zeros("H", depth * len(COLUMNS))
+    frames_recorded = 0
+    _head = 0
+    _depth = depth
+    _current = assets.zeros("I", len(COLUMNS))
+    _display = display
+    _damage = damage
+    _chord = tuple(chord)
+    _chord_held = False
+    _pens = (
+        palette.pen(display, 0, 0, 0),        # HUD background
+        palette.pen(display, 0, 255, 0),      # Frame within budget
+        palette.pen(display, 255, 0, 0),      # Frame over budget
+        palette.pen(display, 255, 255, 255),  # Budget line
+    )
+    stage_colors = (
+        (135, 206, 235), (0, 200, 0), (210, 180, 140), (100, 100, 255), (255, 105, 180),
+        (255, 165, 0), (255, 0, 255), (0, 128, 128), (255, 255, 0), (128, 128, 128),
+    )
+    _pens += tuple(palette.pen(display, r, g, b) for r, g, b in stage_colors)
+
+    for index, (_, names) in enumerate(STAGES):
+        for name in names:
+            if name in namespace:
+                namespace[name] = _wrap_stage(index, namespace[name], name == "present")
+    namespace["game_frame"] = _wrap_frame(namespace["game_frame"])
+
+
+def _wrap_stage(index, fn, draws_hud):
+    ticks_us = utime.ticks_us
+    ticks_diff = utime.ticks_diff
+
+    def timed(*args):
+        if draws_hud:
+            draw_hud()
+        t0 = ticks_us()
+        result = fn(*args)
+        _current[index] += ticks_diff(ticks_us(), t0)
+        return result
+    return timed
+
+
+def _wrap_frame(fn):
+    ticks_us = utime.ticks_us
+    ticks_diff = utime.ticks_diff
+
+    def frame(*args):
+        for i in range(len(_current)):
+            _current[i] = 0
+        t0 = ticks_us()
+        result = fn(*args)
+        _record(ticks_diff(ticks_us(), t0))
+        _poll_chord()
+        return result
+    return frame
+
+
+def _record(total):
+    global _head, frames_recorded
+    staged = 0
+    for i in range(OTHER):
+        staged += _current[i]
+    _current[OTHER] = max(0, total - staged)
+    _current[FRAME] = total
+    row = _head * len(COLUMNS)
+    for i in range(len(COLUMNS)):
+        value = _current[i]
+        ring[row + i] = value if value < 0xFFFF else 0xFFFF
+    _head = (_head + 1) % _depth
+    frames_recorded += 1
+
+
+def _poll_chord():
+    global _chord_held
+    if not _chord:
+        return
+    held = True
+    for button in _chord:
+        if not button.is_pressed:
+            held = False
+            break
+    if held and not _chord_held:
+        dump_csv()
+    _chord_held = held
+
+
+def rows():
+    """Yield recorded frames oldest first as tuples in COLUMNS order."""
+    count = min(frames_recorded, _depth)
+    start = (_head - count) % _depth
+    width = len(COLUMNS)
+    for n in range(count):
+        row = ((start + n) % _depth) * width
+        yield tuple(ring[row:row + width])
+
+
+def dump_csv():
+    """Print the ring buffer as CSV over the serial console."""
+    print("frame_index," + ",".join(COLUMNS))
+    first = frames_recorded - min(frames_recorded, _depth)
+    for n, row in enumerate(rows()):
+        print(str(first + n) + "," + ",".join(str(v) for v in row))
+
+
+def draw_hud():
+    """Draw the frame-time sparkline and last-frame stage bar."""
+    display = _display
+    background, good, bad, budget = _pens[0], _pens[1], _pens[2], _pens[3]
+    display.set_pen(background)
+    display.rectangle(0, 0, _depth, HUD_HEIGHT + 3)
+    if _damage is not None:
+        _damage.mark(0, 0, _depth, HUD_HEIGHT + 3)
+
+    # One column per recorded frame, oldest on the left
+    count = min(frames_recorded, _depth)
+    start = (_head - count) % _depth
+    width = len(COLUMNS)
+    x = _depth - count
+    for n in range(count):
+        total = ring[((start + n) % _depth) * width + FRAME]
+        h = total // _us_per_pixel
+        if h > HUD_HEIGHT:
+            h = HUD_HEIGHT
+        display.set_pen(good if total <= budget_us else bad)
+        display.rectangle(x + n, HUD_HEIGHT - h, 1, h)
+    display.set_pen(budget)
+    display.pixel_span(0, HUD_HEIGHT - budget_us // _us_per_pixel, _depth)
+    if _queue is not None and _queue.last_dropped:
+        display.set_pen(bad)
+        display.pixel_span(0, 0, _depth)
+
+    # Stacked stage bar for the newest frame, 1 pixel per half millisecond
+    if count:
+        row = ((_head - 1) % _depth) * width
+        x = 0
+        for i in range(OTHER + 1):
+            w = ring[row + i] // 500
+            if x + w > _depth:
+                w = _depth - x
+            if w > 0:
+                display.set_pen(_pens[4 + i])
+                display.rectangle(x, HUD_HEIGHT + 1, w, 2)
+                x += w
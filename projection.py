@@ -0,0 +1,122 @@
+"""Fixed-point perspective projection.
+
+Screen position is x * focal / z, and the RP2040 has no FPU, so the divide
+is the expensive part. Depth is converted to fixed point (DEPTH_BITS
+fraction bits) and used to index a table of focal / z, itself stored in
+fixed point with RECIP_BITS fraction bits. Projecting a point then costs a
+table lookup, one multiply and a shift per axis. The table is fine-grained
+close to the camera, where 1/z changes fastest, and coarser beyond NEAR_Z.
+
+Results truncate toward zero like the float version's int() and stay
+within a pixel of it over the game's depth range; tools/bench_projection.py
+checks this.
+"""
+
+import assets
+
+Z_MIN = 0.1   # Nearer depths are clamped, like project_3d_to_2d's z == 0 guard
+Z_MAX = 24.0  # Farther depths are clamped; buildings spawn at 20 and shots fly to 20.2
+DEPTH_BITS = 9  # Fixed-point depth: one entry per 1/512 up to NEAR_Z
+NEAR_Z = 2
+FAR_SHIFT = 3  # Beyond NEAR_Z, one entry per 1/64
+RECIP_BITS = 9  # Fraction bits of the focal / z entries
+
+_NEAR_ENTRIES = NEAR_Z << DEPTH_BITS
+
+
+class Projector:
+    """Projects camera-space points for one focal length and screen centre."""
+
+    def __init__(self, focal_length, center_x, horizon_y):
+        self.center_x = center_x
+        self.horizon_y = horizon_y
+        self._cx = center_x << RECIP_BITS
+        self._cy = horizon_y << RECIP_BITS
+        self.z_min = int(Z_MIN * (1 << DEPTH_BITS))
+        self.z_max = int(Z_MAX * (1 << DEPTH_BITS))
+        self.focal_length = focal_length
+        entries = self._index(self.z_max) + 1
+        typecode = "H" if self._reciprocal(0) < 0x10000 else "I"  # Entry 0 is the largest
+        self.recip = assets.table("recip%d" % focal_length, typecode, entries, self._bake)
+
+    def _reciprocal(self, i):
+        # Sample 1/z in the middle of the depths that share entry i
+        if i < _NEAR_ENTRIES:
+            z = (i + 0.5) / (1 << DEPTH_BITS)
+        else:
+            z = (_NEAR_ENTRIES + ((i - _NEAR_ENTRIES) << FAR_SHIFT) + (1 << FAR_SHIFT) / 2) / (1 << DEPTH_BITS)
+        z = max(z, Z_MIN)
+        return int(self.focal_length / z * (1 << RECIP_BITS) + 0.5)
+
+    def _bake(self, out):
+        for i in range(len(out)):
+            out[i] = self._reciprocal(i)
+
+    def _index(self, depth):
+        if depth < _NEAR_ENTRIES:
+            return depth
+        return _NEAR_ENTRIES + ((depth - _NEAR_ENTRIES) >> FAR_SHIFT)
+
+    def depth(self, z):
+        """Convert a depth to clamped fixed point."""
+        d = int(z * (1 << DEPTH_BITS))
+        if d < self.z_min:
+            return self.z_min
+        if d > self.z_max:
+            return self.z_max
+        return d
+
+    def scale(self, z):
+        """Return focal / z in fixed point with RECIP_BITS fraction bits."""
+        return self.recip[self._index(self.depth(z))]
+
+    def project(self, x, y, z):
+        """Project one point, like project_3d_to_2d."""
+        r = self.scale(z)
+        sx = int(x * r) + self._cx
+        sy = int(-y * r) + self._cy
+        return (sx >> RECIP_BITS if sx >= 0 else -(-sx >> RECIP_BITS),
+                sy >> RECIP_BITS if sy >= 0 else -(-sy >> RECIP_BITS))
+
+    def project_rect(self, x, y, z, width, height, rects, i):
+        """Project an upright width x height rectangle centred on (x, y, z) into row i of rects.
+
+        Matches two project() calls for the base and top plus width scaled
+        by scale(z), with one table lookup. rects is an entities.ScreenRects.
+        """
+        r = self.scale(z)
+        sx = int(x * r) + self._cx
+        base = int(-y * r) + self._cy
+        top = int(-(y + height) * r) + self._cy
+        sx = sx >> RECIP_BITS if sx >= 0 else -(-sx >> RECIP_BITS)
+        half = ((width * r) >> RECIP_BITS) // 2
+        rects.left[i] = sx - half
+        rects.right[i] = sx + half
+        rects.top[i] = top >> RECIP_BITS if top >= 0 else -(-top >> RECIP_BITS)
+        rects.bottom[i] = base >> RECIP_BITS if base >= 0 else -(-base >> RECIP_BITS)
+
+    def project_batch(self, xs, ys, zs, n, out_x, out_y, x_offset=0, y_offset=0):
+        """Project the first n points of xs/ys/zs into out_x/out_y.
+
+        The offsets are added to each point first, e.g. -WIDTH // 2 for
+        positions stored in screen space. out_x/out_y should be 'h' arrays;
+        focal / z is at most 100 at Z_MIN, so points within +-300 of the
+        centre always fit, which covers everything the particle pool keeps.
+        """
+        recip = self.recip
+        z_min, z_max = self.z_min, self.z_max
+        cx, cy = self._cx, self._cy
+        one = 1 << DEPTH_BITS
+        for i in range(n):
+            d = int(zs[i] * one)
+            if d < z_min:
+                d = z_min
+            elif d > z_max:
+                d = z_max
+            if d >= _NEAR_ENTRIES:
+                d = _NEAR_ENTRIES + ((d - _NEAR_ENTRIES) >> FAR_SHIFT)
+            r = recip[d]
+            sx = int((xs[i] + x_offset) * r) + cx
+            sy = int(-(ys[i] + y_offset) * r) + cy
+            out_x[i] = sx >> RECIP_BITS if sx >= 0 else -(-sx >> RECIP_BITS)
+            out_y[i] = sy >> RECIP_BITS if sy >= 0 else -(-sy >> RECIP_BITS)
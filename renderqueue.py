@@ -0,0 +1,193 @@
+"""Per-frame render queue.
+
+The draw_* functions submit circles, rectangles and triangles here instead
+of drawing them straight away. flush() then draws the whole frame back to
+front: by depth layer, then by part (so later parts of one object, such as
+the monster eyes, land on top of its earlier ones). Within a layer,
+commands keep the order they were submitted in, so geometry submitted back
+to front, like the city, stays in painter's order even when a layer holds
+several overlapping objects. Only commands submitted with batch=True, whose
+order among themselves means nothing (particles), are grouped by pen so
+set_pen only runs when the pen changes; they draw first in their layer,
+under the ordered commands. Ordering is two stable counting-sort passes
+over preallocated arrays, so a flush allocates nothing. Given a
+splats.Rasteriser, flush() hands it the small circles and rectangles to
+write straight into the framebuffer, still in the same order.
+
+Commands past the capacity are dropped and counted in dropped; the
+profiler reports them.
+"""
+
+import assets
+
+# Commands
+CIRCLE = 0
+RECT = 1
+TRIANGLE = 2
+
+DEPTH_LEVELS = 64
+PARTS = 2  # Sub-layers within one depth level
+LAYERS = DEPTH_LEVELS * PARTS
+PEN_SLOTS = 64  # Batched pens are grouped by a hash, so sharing a slot only costs a pen change
+ORDERED = PEN_SLOTS - 1  # Slot of every unbatched command: after the batched ones, in submission order
+Z_FAR = 24.0  # Depths from here on share the farthest level
+_LEVEL_SCALE = DEPTH_LEVELS / Z_FAR
+
+
+def layer(z, part=0):
+    """Sort key for something at depth z; part 1 draws over part 0 at the same depth."""
+    level = int(z * _LEVEL_SCALE)
+    if level >= DEPTH_LEVELS:
+        level = DEPTH_LEVELS - 1
+    elif level < 0:
+        level = 0
+    return (DEPTH_LEVELS - 1 - level) * PARTS + part
+
+
+class RenderQueue:
+    """Fixed-capacity list of draw commands for one frame."""
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.count = 0
+        self.op = assets.zeros("B", capacity)
+        self.layer = assets.zeros("B", capacity)
+        self.pen = assets.zeros("H", capacity)
+        self.slot = assets.zeros("B", capacity)
+        self.a = assets.zeros("h", capacity)
+        self.b = assets.zeros("h", capacity)
+        self.c = assets.zeros("h", capacity)
+        self.d = assets.zeros("h", capacity)
+        self.e = assets.zeros("h", capacity)
+        self.f = assets.zeros("h", capacity)
+        self._by_pen = assets.zeros("H", capacity)  # Command indices after the first pass
+        self._order = assets.zeros("H", capacity)  # ...and after the second
+        self._pen_counts = assets.zeros("H", PEN_SLOTS)
+        self._layer_counts = assets.zeros("H", LAYERS)
+        self._pen_zero = memoryview(assets.zeros("H", PEN_SLOTS))
+        self._layer_zero = memoryview(assets.zeros("H", LAYERS))
+        self._pen_view = memoryview(self._pen_counts)
+        self._layer_view = memoryview(self._layer_counts)
+        # Stats for the newest flush, and totals since reset_stats()
+        self.calls = 0
+        self.pen_changes = 0
+        self.splats = 0
+        self.dropped = 0  # Commands that did not fit, this frame so far
+        self.last_dropped = 0  # ...and in the newest flush
+        self.frames = 0
+        self.total_calls = 0
+        self.total_pen_changes = 0
+        self.total_splats = 0
+        self.total_dropped = 0
+
+    def reset_stats(self):
+        self.frames = 0
+        self.total_calls = 0
+        self.total_pen_changes = 0
+        self.total_splats = 0
+        self.total_dropped = 0
+
+    def _add(self, op, key, pen, batch, a, b, c, d=0, e=0, f=0):
+        i = self.count
+        if i >= self.capacity:
+            self.dropped += 1
+            return
+        self.count = i + 1
+        self.op[i] = op
+        self.layer[i] = key
+        self.pen[i] = pen
+        self.slot[i] = (pen ^ (pen >> 6) ^ (pen >> 12)) % ORDERED if batch else ORDERED
+        self.a[i] = a
+        self.b[i] = b
+        self.c[i] = c
+        self.d[i] = d
+        self.e[i] = e
+        self.f[i] = f
+
+    def circle(self, key, pen, x, y, r, batch=False):
+        self._add(CIRCLE, key, pen, batch, x, y, r)
+
+    def rectangle(self, key, pen, x, y, w, h, batch=False):
+        self._add(RECT, key, pen, batch, x, y, w, h)
+
+    def triangle(self, key, pen, x1, y1, x2, y2, x3, y3):
+        self._add(TRIANGLE, key, pen, False, x1, y1, x2, y2, x3, y3)
+
+    def flush(self, display, splat=None):
+        """Draw every queued command in order and empty the queue.
+
+        calls counts display primitives; commands taken by splat are counted
+        in splats instead.
+        """
+        n = self.count
+        slot, key = self.slot, self.layer
+        by_pen, order = self._by_pen, self._order
+        # Pass 1: stable counting sort by pen slot, ordered commands last
+        self._pen_view[:] = self._pen_zero
+        counts = self._pen_counts
+        for i in range(n):
+            counts[slot[i]] += 1
+        total = 0
+        for s in range(PEN_SLOTS):
+            c = counts[s]
+            counts[s] = total
+            total += c
+        for i in range(n):
+            s = slot[i]
+            by_pen[counts[s]] = i
+            counts[s] += 1
+        # Pass 2: stable counting sort by layer keeps that order within each layer
+        self._layer_view[:] = self._layer_zero
+        counts = self._layer_counts
+        for i in range(n):
+            counts[key[i]] += 1
+        total = 0
+        for k in range(LAYERS):
+            c = counts[k]
+            counts[k] = total
+            total += c
+        for j in range(n):
+            i = by_pen[j]
+            k = key[i]
+            order[counts[k]] = i
+            counts[k] += 1
+        # Draw, skipping redundant pen changes
+        op, pens = self.op, self.pen
+        a, b, c, d, e, f = self.a, self.b, self.c, self.d, self.e, self.f
+        current = -1
+        changes = 0
+        splats = 0
+        for j in range(n):
+            i = order[j]
+            pen = pens[i]
+            kind = op[i]
+            if splat is not None:
+                if kind == CIRCLE:
+                    if splat.disc(pen, a[i], b[i], c[i]):
+                        splats += 1
+                        continue
+                elif kind == RECT:
+                    if splat.rectangle(pen, a[i], b[i], c[i], d[i]):
+                        splats += 1
+                        continue
+            if pen != current:
+                display.set_pen(pen)
+                current = pen
+                changes += 1
+            if kind == CIRCLE:
+                display.circle(a[i], b[i], c[i])
+            elif kind == RECT:
+                display.rectangle(a[i], b[i], c[i], d[i])
+            else:
+                display.triangle(a[i], b[i], c[i], d[i], e[i], f[i])
+        self.count = 0
+        self.calls = n - splats
+        self.pen_changes = changes
+        self.splats = splats
+        self.frames += 1
+        self.total_calls += n - splats
+        self.total_pen_changes += changes
+        self.total_splats += splats
+        self.last_dropped = self.dropped
+        self.total_dropped += self.dropped
+        self.dropped = 0
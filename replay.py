@@ -0,0 +1,91 @@
+"""Session recording and playback.
+
+A session file is a 10-byte header (MAGIC, the random seed as a
+little-endian uint32 and the tick length in ms as a uint16) followed by one
+byte per simulation tick with a bit per button (A, B, X, Y in BUTTON_BITS
+order). Recorder latches the real buttons once at the start of each tick and
+writes the byte, so the game sees exactly the input that gets saved. Player
+reads the bytes back and sets the buttons itself. Together with the seed,
+that replays a session tick for tick.
+"""
+
+import struct
+
+MAGIC = b"PFR1"
+HEADER = "<4sIH"
+HEADER_SIZE = struct.calcsize(HEADER)
+BUTTON_BITS = (1, 2, 4, 8)  # A, B, X, Y
+FLUSH_TICKS = 256  # Ticks buffered between writes to flash
+
+
+class LatchedButton:
+    """A button whose is_pressed only changes when its recorder latches it."""
+
+    def __init__(self, button):
+        self.button = button
+        self.is_pressed = False
+
+
+class Recorder:
+    """Latches buttons once per tick and appends them to a session file."""
+
+    def __init__(self, path, buttons, seed, step_ms):
+        self.buttons = tuple(LatchedButton(b) for b in buttons)
+        self.ticks = 0
+        self._buffer = bytearray(FLUSH_TICKS)
+        self._used = 0
+        self._file = open(path, "wb")
+        self._file.write(struct.pack(HEADER, MAGIC, seed, step_ms))
+
+    def tick(self):
+        """Latch every button and record them; always True."""
+        mask = 0
+        for k in range(len(self.buttons)):
+            latched = self.buttons[k]
+            pressed = latched.button.is_pressed
+            latched.is_pressed = pressed
+            if pressed:
+                mask |= BUTTON_BITS[k]
+        self._buffer[self._used] = mask
+        self._used += 1
+        self.ticks += 1
+        if self._used == FLUSH_TICKS:
+            self.flush()
+        return True
+
+    def flush(self):
+        self._file.write(memoryview(self._buffer)[:self._used])
+        self._file.flush()
+        self._used = 0
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+class Player:
+    """Sets buttons from a session file, one byte per tick."""
+
+    def __init__(self, path, buttons):
+        self.buttons = tuple(buttons)
+        with open(path, "rb") as f:
+            magic, self.seed, self.step_ms = struct.unpack(HEADER, f.read(HEADER_SIZE))
+            if magic != MAGIC:
+                raise ValueError("not a session file: %s" % path)
+            self.masks = f.read()
+        self.ticks = 0
+
+    def __len__(self):
+        return len(self.masks)
+
+    def tick(self):
+        """Apply the next tick's buttons; False once the session has run out."""
+        if self.ticks >= len(self.masks):
+            for button in self.buttons:
+                button.is_pressed = False
+            return False
+        mask = self.masks[self.ticks]
+        for k in range(len(self.buttons)):
+            self.buttons[k].is_pressed = bool(mask & BUTTON_BITS[k])
+        self.ticks += 1
+        return True
@@ -0,0 +1,168 @@
+"""Small shapes written straight into the framebuffer.
+
+Particles are mostly discs a few pixels across and thin fragment
+rectangles, and each one used to cost a display.circle or display.rectangle
+call, plus a set_pen when the colour changed. Rasteriser copies rows of the
+current pen into the framebuffer through a memoryview instead. Disc shapes
+for every radius up to MAX_RADIUS are baked at startup as row spans, with
+the same midpoint rule PicoGraphics uses, so the pixels come out identical.
+Larger circles and anything wider than the row buffer fall through to the
+display.
+
+The rows are slices of one bytearray filled with the pen, refilled only
+when the pen changes, so a splat never builds a row of its own.
+tools/splat_check.py compares the output pixel for pixel with the display
+primitives and times both. The framebuffer holds RGB565 pens, two bytes a
+pixel, or palette entries, one byte a pixel (pixel_bytes=1, for PEN_P8).
+"""
+
+from array import array
+
+MAX_RADIUS = 4  # Largest disc drawn as a splat
+MAX_SPAN = 64  # Widest row in pixels
+
+
+def disc_spans(r):
+    """Return (dy, dx, length) for each row of a filled circle of radius r."""
+    rows = {}
+
+    def span(dx, dy, length):
+        x1, x2 = rows.get(dy, (dx, dx + length))
+        rows[dy] = (min(x1, dx), max(x2, dx + length))
+
+    # Midpoint circle filled with horizontal spans, as PicoGraphics does
+    ox, oy, err = r, 0, -r
+    while ox >= oy:
+        last_oy = oy
+        err += oy
+        oy += 1
+        err += oy
+        span(-ox, last_oy, ox * 2 + 1)
+        span(-ox, -last_oy, ox * 2 + 1)
+        if err >= 0 and ox != last_oy:
+            span(-last_oy, ox, last_oy * 2 + 1)
+            span(-last_oy, -ox, last_oy * 2 + 1)
+            err -= ox
+            ox -= 1
+            err -= ox
+    return [(dy, rows[dy][0], rows[dy][1] - rows[dy][0]) for dy in sorted(rows)]
+
+
+class Rasteriser:
+    """Writes discs and rectangles of one pen at a time into a framebuffer."""
+
+    def __init__(self, buffer, width, height, big_endian=False, pixel_bytes=2):
+        self.pixels = memoryview(buffer)
+        self.width = width
+        self.height = height
+        self.big_endian = big_endian  # Byte order of a pen value in the buffer
+        self.shift = pixel_bytes >> 1  # Pixels to bytes: 1 for RGB565, 0 for palette entries
+        self._row = bytearray(MAX_SPAN << self.shift)
+        self._spans = tuple(memoryview(self._row)[:length << self.shift] for length in range(MAX_SPAN + 1))
+        self._pen = -1
+        # Disc rows for each radius: shape k covers rows [first[k], first[k + 1])
+        dy, dx, length = [], [], []
+        first = [0]
+        for r in range(MAX_RADIUS + 1):
+            for row in disc_spans(r):
+                dy.append(row[0])
+                dx.append(row[1])
+                length.append(row[2])
+            first.append(len(dy))
+        self.disc_dy = array("b", dy)
+        self.disc_dx = array("b", dx)
+        self.disc_length = array("B", length)
+        self.disc_first = array("H", first)
+        self.count = 0  # Splats drawn so far
+
+    def set_pen(self, pen):
+        if pen == self._pen:
+            return
+        self._pen = pen
+        row, shift = self._row, self.shift
+        if not shift:
+            row[0] = pen
+        elif self.big_endian:
+            row[0], row[1] = pen >> 8, pen & 0xFF
+        else:
+            row[0], row[1] = pen & 0xFF, pen >> 8
+        # Double the filled part until the row is full
+        filled = 1 << shift
+        size = len(row)
+        while filled < size:
+            n = filled if filled * 2 <= size else size - filled
+            row[filled:filled + n] = self._spans[n >> shift]
+            filled += n
+
+    def span(self, x, y, length):
+        if y < 0 or y >= self.height:
+            return
+        if x < 0:
+            length += x
+            x = 0
+        if x + length > self.width:
+            length = self.width - x
+        if length <= 0:
+            return
+        o = (y * self.width + x) << self.shift
+        self.pixels[o:o + (length << self.shift)] = self._spans[length]
+
+    def disc(self, pen, x, y, r):
+        """Draw a filled circle; False if it is too big for a splat."""
+        if r > MAX_RADIUS:
+            return False
+        if r < 0:
+            return True
+        if pen != self._pen:
+            self.set_pen(pen)
+        width, height, shift = self.width, self.height, self.shift
+        pixels, spans = self.pixels, self._spans
+        dy, dx, length = self.disc_dy, self.disc_dx, self.disc_length
+        inside = r <= x < width - r and r <= y < height - r
+        for k in range(self.disc_first[r], self.disc_first[r + 1]):
+            row, left, n = y + dy[k], x + dx[k], length[k]
+            if not inside:  # Clip only the splats that reach an edge
+                if row < 0 or row >= height:
+                    continue
+                if left < 0:
+                    n += left
+                    left = 0
+                if left + n > width:
+                    n = width - left
+                if n <= 0:
+                    continue
+            o = (row * width + left) << shift
+            pixels[o:o + (n << shift)] = spans[n]
+        self.count += 1
+        return True
+
+    def rectangle(self, pen, x, y, w, h):
+        """Draw a filled rectangle; False if it is wider than a row."""
+        if w > MAX_SPAN:
+            return False
+        if w <= 0 or h <= 0:
+            return True
+        if pen != self._pen:
+            self.set_pen(pen)
+        width = self.width
+        if y < 0:
+            h += y
+            y = 0
+        if y + h > self.height:
+            h = self.height - y
+        if x < 0:
+            w += x
+            x = 0
+        if x + w > width:
+            w = width - x
+        if w > 0:
+            pixels, span = self.pixels, self._spans[w]
+            shift = self.shift
+            stride = width << shift
+            o = (y * width + x) << shift
+            n = w << shift
+            for _ in range(h):
+                pixels[o:o + n] = span
+                o += stride
+        self.count += 1
+        return True
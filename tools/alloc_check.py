@@ -0,0 +1,65 @@
+"""Steady-state allocation check for pico-fox.py on the desktop backend.
+
+Flies the idle_flight scenario with automatic garbage collection off (as
+with MANUAL_GC) and allocmeter installed. After a warm-up, every frame
+must stay within --budget bytes, per stage and in total. On the desktop the
+meter sees containers built during a frame but not floats (see
+allocmeter.py), so this guards against lists, dicts and the like creeping
+back into the frame. On the Pico, set METER_ALLOC = True and hold B+Y for
+the real gc.mem_alloc figures.
+
+    python tools/alloc_check.py
+    python tools/alloc_check.py --frames 600 --budget 1024
+    python tools/alloc_check.py --scenario boss_kill --palette
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bench  # noqa: E402
+import headless  # noqa: E402
+
+DEFAULT_BUDGET = 3072  # Bytes per frame; idle flight peaks near 2.6 KB, mostly the headless display counters and call temporaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scenario", default="idle_flight", choices=sorted(bench.SCENARIOS))
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=50, help="frames before measuring")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--palette", action="store_true", help="run with PALETTE on (8-bit framebuffer)")
+    args = parser.parse_args()
+
+    game = headless.load_game(seed=args.seed, flags={"PALETTE": True} if args.palette else None)
+    import allocmeter
+    import heap
+    allocmeter.install(game.__dict__)
+    game.reset_game()
+    setup, step = bench.SCENARIOS[args.scenario]
+    setup(game)
+    heap.begin()
+    try:
+        for frame in range(args.warmup + args.frames):
+            if frame == args.warmup:
+                allocmeter.reset()
+            step(game, frame)
+            game.game_frame()
+            heap.idle(game.STEP_MS, game.game_over)  # Pretend the frame left a full tick spare
+    finally:
+        heap.end()
+
+    allocmeter.report()
+    print("collections: %d (%d forced)" % (heap.collections, heap.forced))
+    over = allocmeter.peak[allocmeter.FRAME] > args.budget
+    print("%s: peak %d bytes per frame, budget %d" % ("FAIL" if over else "ok", allocmeter.peak[allocmeter.FRAME], args.budget))
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Bake the game's lookup tables into assets.bin.
+
+Loads the game on the desktop backend with assets.PATH unset, so every
+table is built by the same code the Pico would run, forces the ones that
+are built lazily, and writes them all in the format assets.table() reads.
+Copy the file to the Pico next to pico-fox.py. With --check, nothing is
+written; the existing file is compared against freshly built tables, which
+catches a blob left stale by a change to the code that makes them.
+
+    python tools/bake_assets.py
+    python tools/bake_assets.py --check
+"""
+
+import argparse
+import os
+import struct
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import assets  # noqa: E402
+
+assets.PATH = None  # Build everything, whatever is on disk
+
+import bursts  # noqa: E402
+import headless  # noqa: E402
+import meshes  # noqa: E402
+
+
+def build():
+    """Return name -> array for every baked table."""
+    headless.load_game(seed=1)
+    meshes.load_shapes()
+    bursts.load_templates()
+    return assets.built
+
+
+def write(path, tables):
+    names = sorted(tables)
+    offset = assets.HEADER_SIZE + assets.ENTRY_SIZE * len(names)
+    with open(path, "wb") as f:
+        f.write(struct.pack(assets.HEADER, assets.MAGIC, len(names)))
+        for name in names:
+            data = tables[name]
+            if len(name) > assets.NAME_SIZE:
+                raise ValueError("asset name too long: %s" % name)
+            f.write(struct.pack(assets.ENTRY, name.encode(), ord(data.typecode), len(data), offset))
+            offset += len(data) * assets.ITEM_SIZES[data.typecode]
+        for name in names:
+            f.write(tables[name].tobytes())
+
+
+def read(path):
+    """Return name -> (typecode, raw bytes) for every entry in a baked file."""
+    with open(path, "rb") as f:
+        blob = f.read()
+    magic, count = struct.unpack_from(assets.HEADER, blob)
+    if magic != assets.MAGIC:
+        raise ValueError("not an asset file: %s" % path)
+    entries = {}
+    for k in range(count):
+        name, typecode, n, offset = struct.unpack_from(assets.ENTRY, blob, assets.HEADER_SIZE + k * assets.ENTRY_SIZE)
+        size = n * assets.ITEM_SIZES[chr(typecode)]
+        entries[name.rstrip(b"\0").decode()] = (chr(typecode), blob[offset:offset + size])
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--out", default=os.path.join(ROOT, "assets.bin"))
+    parser.add_argument("--check", action="store_true", help="compare instead of writing")
+    args = parser.parse_args()
+
+    tables = build()
+    if not args.check:
+        write(args.out, tables)
+        print("%d tables, %d bytes -> %s" % (len(tables), os.path.getsize(args.out), args.out))
+        for name in sorted(tables):
+            print("  %-14s %s x %d" % (name, tables[name].typecode, len(tables[name])))
+        return 0
+
+    baked = read(args.out)
+    stale = [name for name in sorted(tables)
+             if baked.get(name) != (tables[name].typecode, tables[name].tobytes())]
+    extra = sorted(set(baked) - set(tables))
+    for name in stale:
+        print("stale: %s" % name)
+    for name in extra:
+        print("unused: %s" % name)
+    if stale:
+        print("FAIL: re-run tools/bake_assets.py")
+        return 1
+    print("ok: %d tables match %s" % (len(tables), args.out))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
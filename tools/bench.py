@@ -0,0 +1,338 @@
+"""Frame-time benchmark for pico-fox.py on the desktop backend.
+
+Runs scripted scenarios against a fresh copy of the game and reports
+per-frame timings plus the time spent in each instrumented game function.
+Results can be saved as a JSON baseline and later compared against it to
+catch frame-time regressions before flashing the board.
+
+    python tools/bench.py
+    python tools/bench.py --scenario ship_crash --frames 300
+    python tools/bench.py --palette --splats
+    python tools/bench.py --save baseline.json
+    python tools/bench.py --compare baseline.json --tolerance 0.15
+"""
+
+import argparse
+import atexit
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import encode_level  # noqa: E402
+import entities  # noqa: E402
+import headless  # noqa: E402
+import splats  # noqa: E402
+import waves  # noqa: E402
+
+# Game functions wrapped with timers. Timings are inclusive, so nested calls
+# (e.g. project_3d_to_2d inside draw_city_background) count in both places.
+PROFILED = (
+    "restore_background",
+    "draw_sky_and_horizon",
+    "draw_ground",
+    "update_city",
+    "draw_city_background",
+    "update_ship",
+    "draw_ship",
+    "draw_obstacles",
+    "draw_projectiles",
+    "draw_power_ups",
+    "draw_explosions",
+    "draw_ship_explosion",
+    "draw_game_over",
+    "flush_render_queue",
+    "step_world",
+    "update_particles",
+    "update_bursts",
+    "spawn_waves",
+    "update_projectiles",
+    "update_obstacles",
+    "update_power_ups",
+    "check_collision",
+    "project_3d_to_2d",
+)
+
+# Display calls that are not drawing
+PRESENT_CALLS = ("update", "partial_update", "create_pen", "update_pen")
+
+
+# Scenarios ---------------------------------------------------------------
+#
+# Each scenario has a setup(game) run once after reset_game() and a
+# step(game, frame) run before every game_frame().
+
+def _clear_lane(game):
+    # Keep the flight path clear so the run never turns into a crash
+    stream = game.city_stream
+    for k in range(stream.count - 1, -1, -1):
+        if abs(stream.buildings.x[stream.index(k)] - game.WIDTH // 2) <= 80:
+            stream.remove(k)
+
+
+def _idle_setup(game):
+    _clear_lane(game)
+
+
+def _idle_step(game, frame):
+    _clear_lane(game)
+
+
+def _smoke_setup(game):
+    _clear_lane(game)
+
+
+def _smoke_step(game, frame):
+    _clear_lane(game)
+    # Bank back and forth around the centre so both tilt emitters fire on top
+    # of the centre one without steering into the buildings
+    left = (frame // 4) % 2 == 0
+    game.button_b.is_pressed = left
+    game.button_y.is_pressed = not left
+
+
+CRASH_BUILDING_WIDTH = 40  # The width every building had before the city was streamed
+
+
+def _crash_setup(game):
+    # A tall building right in front of the ship; check_collision fires on frame 0
+    game.city_stream.clear()
+    game.city_stream.push(game.ship_x, 8.5, CRASH_BUILDING_WIDTH, 150, game.LIGHT_GRAY)
+
+
+def _crash_step(game, frame):
+    pass
+
+
+def _boss_setup(game):
+    _clear_lane(game)
+    game.obstacles.clear()
+    game.obstacles.spawn(game.WIDTH // 2, game.HEIGHT // 2, game.MIN_COLLISION_DISTANCE - 1.0, 15, 1, True)
+    game.projectiles.clear()
+    game.projectiles.spawn(game.WIDTH // 2, game.HEIGHT // 2, 1.0, game.CYAN)
+
+
+def _boss_step(game, frame):
+    _clear_lane(game)
+
+
+def _swarm_setup(game):
+    # A full table of monsters from point blank to mid distance, placed so
+    # they land across the screen, with every fifth one pushed off the side,
+    # plus a full table of shots and power-ups
+    _clear_lane(game)
+    _fill_swarm(game)
+
+
+def _fill_swarm(game):
+    game.obstacles.clear()
+    for i in range(game.obstacles.capacity):
+        z = 0.7 + (i % 16) * 0.6
+        # Screen offsets from the projection centre, scaled back into the world
+        dx = ((i * 37) % 61 - 30) * 4 + (400 if i % 5 == 4 else 0)
+        dy = (i * 53) % 101 - 10
+        x = game.WIDTH // 2 + dx * z / game.focal_length
+        y = game.HEIGHT // 2 + dy * z / game.focal_length
+        if i % 4 == 0:
+            game.obstacles.spawn(x, y, z, 15, 10, True)
+        else:
+            game.obstacles.spawn(x, y, z, 5, 1, False)
+    game.projectiles.clear()
+    for i in range(game.projectiles.capacity):
+        game.projectiles.spawn((i * 29) % game.WIDTH, (i * 17) % game.HEIGHT, 1.0 + (i % 19), game.CYAN)
+    game.power_ups.clear()
+    for i in range(game.power_ups.capacity):
+        game.power_ups.spawn((i * 61) % game.WIDTH, (i * 23) % game.HEIGHT, 2.0 + 2 * i)
+
+
+def _swarm_step(game, frame):
+    # Put back before every frame, so every frame has the same load
+    _clear_lane(game)
+    _fill_swarm(game)
+
+
+BULLET_HELL_OBSTACLES = 320  # Room for the whole spiral; the game's table holds 32
+_bullet_hell_path = None
+
+
+def _bullet_hell_setup(game):
+    # The stress level, encoded once and streamed from a real file like on
+    # the board, into tables big enough for everything it spawns
+    global _bullet_hell_path
+    if _bullet_hell_path is None:
+        fd, _bullet_hell_path = tempfile.mkstemp(suffix=".pfw")
+        with os.fdopen(fd, "wb") as f:
+            f.write(encode_level.encode(*encode_level.bullet_hell()))
+        atexit.register(os.remove, _bullet_hell_path)
+    _clear_lane(game)
+    game.obstacles = entities.Obstacles(BULLET_HELL_OBSTACLES)
+    game.power_ups = entities.PowerUps(32)
+    game.level = waves.Level(_bullet_hell_path, loop=True)
+    game.level_tick = 0
+    # Views sized for the bigger tables; nothing has been captured yet
+    game.frame_pipeline = game.make_pipeline(game.frame_pipeline.threaded)
+
+
+def _bullet_hell_step(game, frame):
+    _clear_lane(game)
+
+
+SCENARIOS = {
+    "idle_flight": (_idle_setup, _idle_step),
+    "heavy_smoke": (_smoke_setup, _smoke_step),
+    "ship_crash": (_crash_setup, _crash_step),
+    "boss_kill": (_boss_setup, _boss_step),
+    "swarm": (_swarm_setup, _swarm_step),
+    "bullet_hell": (_bullet_hell_setup, _bullet_hell_step),
+}
+
+
+# Measurement -------------------------------------------------------------
+
+def _instrument(game, stats):
+    clock = time.perf_counter_ns
+    for name in PROFILED:
+        fn = getattr(game, name, None)
+        if fn is None:
+            continue
+        rec = stats.setdefault(name, [0, 0])
+
+        def timed(*args, _fn=fn, _rec=rec, **kwargs):
+            t0 = clock()
+            try:
+                return _fn(*args, **kwargs)
+            finally:
+                _rec[0] += 1
+                _rec[1] += clock() - t0
+
+        setattr(game, name, timed)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run_scenario(name, frames=200, seed=1, raster=False, splat=False, palette=False):
+    """Run one scenario and return a result dict with timings in microseconds."""
+    setup, step = SCENARIOS[name]
+    game = headless.load_game(seed=seed, raster=raster, flags={"PALETTE": True} if palette else None)
+    if splat:
+        game.splat_rasteriser = splats.Rasteriser(game.framebuffer, game.WIDTH, game.HEIGHT, big_endian=True,
+                                                  pixel_bytes=game.display.pixel_bytes)
+    game.reset_game()
+    setup(game)
+    stats = {}
+    _instrument(game, stats)
+    game.display.reset_counters()
+    game.render_queue.reset_stats()
+
+    frame_ns = []
+    clock = time.perf_counter_ns
+    for frame in range(frames):
+        t0 = clock()
+        step(game, frame)
+        game.game_frame()
+        frame_ns.append(clock() - t0)
+
+    calls = game.display.calls
+    return {
+        "frames": frames,
+        "frame_mean_us": sum(frame_ns) / frames / 1000,
+        "frame_p50_us": _percentile(frame_ns, 0.50) / 1000,
+        "frame_p95_us": _percentile(frame_ns, 0.95) / 1000,
+        "frame_max_us": max(frame_ns) / 1000,
+        "draw_calls_per_frame": sum(n for k, n in calls.items() if k not in PRESENT_CALLS) / frames,
+        "pushed_pixels_per_frame": game.display.pushed_pixels / frames,
+        "create_pen_per_frame": calls.get("create_pen", 0) / frames,
+        "update_pen_per_frame": calls.get("update_pen", 0) / frames,
+        "burst_peak_spawns": game.burst_emitter.peak,
+        "level_spawns_per_frame": game.level.spawned / frames,
+        "obstacles_at_end": game.obstacles.count,
+        "queue_calls_per_frame": game.render_queue.total_calls / frames,
+        "queue_pen_changes_per_frame": game.render_queue.total_pen_changes / frames,
+        "queue_splats_per_frame": game.render_queue.total_splats / frames,
+        "queue_dropped_per_frame": game.render_queue.total_dropped / frames,
+        "functions": {
+            fn: {
+                "calls_per_frame": count / frames,
+                "mean_us": total / count / 1000 if count else 0.0,
+                "total_us_per_frame": total / frames / 1000,
+            }
+            for fn, (count, total) in stats.items() if count
+        },
+    }
+
+
+def print_report(name, result):
+    print("== %s (%d frames)" % (name, result["frames"]))
+    print("   frame  mean %8.1f us   p50 %8.1f us   p95 %8.1f us   max %8.1f us" % (
+        result["frame_mean_us"], result["frame_p50_us"], result["frame_p95_us"], result["frame_max_us"]))
+    print("   draw calls/frame %.1f   create_pen/frame %.1f   update_pen/frame %.1f   pushed px/frame %.0f" % (
+        result["draw_calls_per_frame"], result["create_pen_per_frame"], result.get("update_pen_per_frame", 0.0),
+        result["pushed_pixels_per_frame"]))
+    print("   render queue  %.1f draws/frame  %.1f pen changes/frame  %.1f splats/frame  %.1f dropped/frame" % (
+        result["queue_calls_per_frame"], result["queue_pen_changes_per_frame"],
+        result.get("queue_splats_per_frame", 0.0), result.get("queue_dropped_per_frame", 0.0)))
+    print("   burst spawns  peak %d per tick   level spawns %.1f/frame   %d obstacles at the end" % (
+        result["burst_peak_spawns"], result.get("level_spawns_per_frame", 0.0), result.get("obstacles_at_end", 0)))
+    rows = sorted(result["functions"].items(), key=lambda kv: -kv[1]["total_us_per_frame"])
+    for fn, rec in rows:
+        print("   %-32s %7.1f calls/f  %9.1f us/call  %9.1f us/f" % (
+            fn, rec["calls_per_frame"], rec["mean_us"], rec["total_us_per_frame"]))
+    print()
+
+
+def compare(results, baseline, tolerance):
+    """Print deltas against a saved baseline; return the regressed scenarios."""
+    regressed = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]["frame_mean_us"]
+        new = result["frame_mean_us"]
+        delta = (new - old) / old if old else 0.0
+        flag = ""
+        if delta > tolerance:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print("%-12s %9.1f us -> %9.1f us  (%+.1f%%)%s" % (name, old, new, delta * 100, flag))
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--raster", action="store_true", help="rasterise into a framebuffer")
+    parser.add_argument("--splats", action="store_true", help="draw small shapes with splats.Rasteriser")
+    parser.add_argument("--palette", action="store_true", help="run with PALETTE on (8-bit framebuffer)")
+    parser.add_argument("--save", metavar="FILE", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed mean frame-time increase before failing (default 0.10)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        results[name] = run_scenario(name, args.frames, args.seed, args.raster, args.splats, args.palette)
+        print_report(name, results[name])
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Frame time against city density for the streamed city in city.py.
+
+Flies straight through the city at increasing densities (buildings per
+chunk) and reports frame-time percentiles with the number of buildings
+streamed and drawn. Crashes are switched off so every run keeps flying.
+With a bounded MAX_BUILDINGS the drawn count, and with it the draw cost,
+should level off while the streamed count keeps growing.
+
+    python tools/bench_city.py
+    python tools/bench_city.py --densities 1 2 4 8 16 --frames 300
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import headless  # noqa: E402
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run(density, frames, seed):
+    game = headless.load_game(seed=seed)
+    game.check_collision = lambda: None  # Fly through everything
+    game.city_stream.density = density
+    game.reset_game()
+    view = game.frame_pipeline.front
+    streamed = drawn = 0
+    frame_ns = []
+    clock = time.perf_counter_ns
+    for _ in range(frames):
+        t0 = clock()
+        game.game_frame()
+        frame_ns.append(clock() - t0)
+        streamed += game.city_stream.count
+        drawn += view.buildings.count
+    return {
+        "streamed": streamed / frames,
+        "drawn": drawn / frames,
+        "mean_us": sum(frame_ns) / frames / 1000,
+        "p95_us": _percentile(frame_ns, 0.95) / 1000,
+        "max_us": max(frame_ns) / 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--densities", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print("density  streamed  drawn   mean us    p95 us    max us")
+    for density in args.densities:
+        r = run(density, args.frames, args.seed)
+        print("%7d  %8.1f  %5.1f  %8.1f  %8.1f  %8.1f" % (
+            density, r["streamed"], r["drawn"], r["mean_us"], r["p95_us"], r["max_us"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
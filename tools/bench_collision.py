@@ -0,0 +1,148 @@
+"""Collision scaling benchmark for pico-fox.py on the desktop backend.
+
+Fills the game with N obstacles inside the hit range and N projectiles and
+times one update_projectiles() call through the grid broadphase and entity
+tables against the old all-pairs loop over lists of dicts, for N from 10 to
+1000. Projectiles are either scattered over the whole screen or kept to the
+ship's lane (see make_entities). Both versions start from the same entities
+and must agree on the score, on which obstacles survive and on how many
+projectiles do, so the benchmark doubles as a correctness check.
+
+    python tools/bench_collision.py
+    python tools/bench_collision.py --counts 10,100,1000 --repeat 5 --layout lane
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import headless  # noqa: E402
+
+DEFAULT_COUNTS = (10, 30, 100, 300, 1000)
+LAYOUTS = ("screen", "lane")
+
+
+def brute_force(obstacles, projectiles, min_distance, focal_length):
+    """The pre-broadphase projectile loop on lists, with sqrt and in-loop removal."""
+    score = 0
+    for projectile in projectiles[:]:
+        for obstacle in obstacles[:]:
+            if obstacle['z'] <= min_distance:
+                distance = ((projectile[0] - obstacle['x']) ** 2 + (projectile[1] - obstacle['y']) ** 2) ** 0.5
+                if distance < 10 + obstacle['size'] / obstacle['z'] * focal_length:
+                    if obstacle['is_boss']:
+                        obstacle['health'] -= 1
+                        if obstacle['health'] <= 0:
+                            obstacles.remove(obstacle)
+                            score += 100
+                    else:
+                        obstacles.remove(obstacle)
+                        score += 10
+                    projectiles.remove(projectile)
+                    break
+    return score
+
+
+def make_entities(game, n, seed, layout):
+    """Return obstacle and projectile rows as tuples in table field order."""
+    rng = random.Random(seed)
+    obstacles = []
+    for _ in range(n):
+        # Spread like update_obstacles: regulars on the flanks, bosses in the middle
+        boss = rng.random() < 0.05
+        if boss:
+            x = rng.randint(game.WIDTH // 4, 3 * game.WIDTH // 4)
+        elif rng.random() < 0.5:
+            x = rng.randint(0, game.WIDTH // 4)
+        else:
+            x = rng.randint(3 * game.WIDTH // 4, game.WIDTH)
+        # Round depth to the table's float32 so both versions see the same value
+        z = array("f", [rng.uniform(1.0, game.MIN_COLLISION_DISTANCE)])[0]
+        obstacles.append((x, rng.randint(0, game.HEIGHT), z, 15 if boss else 5, 10 if boss else 1, boss))
+    # "screen" scatters projectiles everywhere so nearly all of them hit;
+    # "lane" keeps them in the ship's central lane where most of them miss
+    if layout == "lane":
+        x_range = (3 * game.WIDTH // 8, 5 * game.WIDTH // 8)
+        z = 0.1  # Far from the obstacles' z, which the old test ignored anyway
+    else:
+        x_range = (0, game.WIDTH)
+        z = 1.0
+    projectiles = [(rng.randint(*x_range), rng.randint(0, game.HEIGHT), z, game.RED) for _ in range(n)]
+    return obstacles, projectiles
+
+
+def time_best(setup, func, repeat):
+    best = None
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--counts", default=",".join(str(n) for n in DEFAULT_COUNTS),
+                        help="comma-separated entity counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per count; the best is kept")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--layout", choices=LAYOUTS, action="append",
+                        help="entity layout to run (default: all)")
+    args = parser.parse_args()
+
+    game = headless.load_game(seed=args.seed)
+    # Explosions are not part of collision cost
+    game.governor.scale = lambda count: 0
+    keys = ('x', 'y', 'z', 'size', 'health', 'is_boss')
+
+    failed = False
+    for layout in args.layout or LAYOUTS:
+        print("layout: %s" % layout)
+        print("%6s %12s %12s %8s %6s" % ("n", "all-pairs ms", "grid ms", "speedup", "hits"))
+        for n in (int(c) for c in args.counts.split(",")):
+            obstacle_rows, projectile_rows = make_entities(game, n, args.seed + n, layout)
+            lists = {}
+
+            def setup_lists():
+                lists["obstacles"] = [dict(zip(keys, row)) for row in obstacle_rows]
+                # Same move step as update_projectiles, done before timing
+                lists["projectiles"] = [[x, y, z + 0.2, color] for x, y, z, color in projectile_rows]
+
+            def reference():
+                return brute_force(lists["obstacles"], lists["projectiles"], game.MIN_COLLISION_DISTANCE, game.focal_length)
+
+            def setup_tables():
+                game.obstacles = game.entities.Obstacles(n)
+                game.projectiles = game.entities.Projectiles(n)
+                for row in obstacle_rows:
+                    game.obstacles.spawn(*row)
+                for row in projectile_rows:
+                    game.projectiles.spawn(*row)
+                game.score = 0
+
+            def grid():
+                game.update_projectiles()
+                return game.score
+
+            old_time, old_score = time_best(setup_lists, reference, args.repeat)
+            new_time, new_score = time_best(setup_tables, grid, args.repeat)
+            old_left = sorted((o['x'], o['y'], o['health']) for o in lists["obstacles"])
+            obstacles = game.obstacles
+            new_left = sorted((int(obstacles.x[i]), int(obstacles.y[i]), obstacles.health[i]) for i in range(obstacles.count))
+            hits = n - game.projectiles.count
+            print("%6d %12.3f %12.3f %7.1fx %6d" % (n, old_time * 1000, new_time * 1000, old_time / new_time, hits))
+            if (old_score, old_left, len(lists["projectiles"])) != (new_score, new_left, game.projectiles.count):
+                print("  MISMATCH: grid and all-pairs results differ at n=%d" % n)
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
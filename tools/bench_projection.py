@@ -0,0 +1,114 @@
+"""Accuracy check and throughput benchmark for projection.py.
+
+Compares projector.project against the float project_3d_to_2d over a sweep
+of points covering the game's depth range (0.1 to 20.2) and fails if any
+point that lands on screen is off by more than --max-error pixels. Then
+times both versions projecting a particle-pool-sized batch of points.
+
+CPython has a hardware FPU, so host timings only show interpreter overhead;
+the saving from dropping the divides shows up on the RP2040, where every
+float divide is done in software.
+
+    python tools/bench_projection.py
+    python tools/bench_projection.py --points 2000 --repeat 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import headless  # noqa: E402
+
+
+def sweep_depths():
+    # Fine steps up close, where 1/z is steepest, then coarser
+    z = 0.1
+    while z < 20.3:
+        yield z
+        z += 0.003 if z < 2 else 0.037
+
+
+def check_accuracy(game, max_error):
+    width, height = game.WIDTH, game.HEIGHT
+    xs = [x - width // 2 for x in range(-40, width + 41, 7)] + [0.37, -0.37, 13.6, -13.6, 95.25, -95.25]
+    ys = [0, 0.5, 1.25, 7.8, 25, 50, 77.7, 100, 150]
+    compared = exact = worst = 0
+    worst_point = None
+    for z in sweep_depths():
+        for x in xs:
+            for y in ys:
+                rx, ry = game.project_3d_to_2d(x, y, z)
+                if not (0 <= rx < width and 0 <= ry < height):
+                    continue
+                fx, fy = game.projector.project(x, y, z)
+                error = max(abs(fx - rx), abs(fy - ry))
+                compared += 1
+                if error == 0:
+                    exact += 1
+                if error > worst:
+                    worst, worst_point = error, (x, y, z)
+    print("accuracy: %d on-screen points, %.2f%% exact, max error %d px%s" % (
+        compared, 100.0 * exact / compared, worst,
+        "" if worst_point is None else " at x=%g y=%g z=%.3f" % worst_point))
+    return worst <= max_error
+
+
+def time_best(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--points", type=int, default=640, help="batch size (default: particle pool capacity)")
+    parser.add_argument("--repeat", type=int, default=10, help="timing runs; the best is kept")
+    parser.add_argument("--max-error", type=int, default=1, help="allowed on-screen error in pixels")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    game = headless.load_game(seed=args.seed)
+    ok = check_accuracy(game, args.max_error)
+
+    rng = random.Random(args.seed)
+    n = args.points
+    xs = array("f", (rng.uniform(0, game.WIDTH) for _ in range(n)))
+    ys = array("f", (rng.uniform(0, game.HEIGHT) for _ in range(n)))
+    zs = array("f", (rng.uniform(0.5, 20.0) for _ in range(n)))
+    out_x = array("h", bytes(2 * n))
+    out_y = array("h", bytes(2 * n))
+    half = game.WIDTH // 2
+
+    def float_loop():
+        project = game.project_3d_to_2d
+        for i in range(n):
+            out_x[i], out_y[i] = project(xs[i] - half, ys[i], zs[i])
+
+    def fixed_loop():
+        project = game.projector.project
+        for i in range(n):
+            out_x[i], out_y[i] = project(xs[i] - half, ys[i], zs[i])
+
+    def fixed_batch():
+        game.projector.project_batch(xs, ys, zs, n, out_x, out_y, -half)
+
+    base = time_best(float_loop, args.repeat)
+    print("throughput: %d points" % n)
+    for name, func in (("float project_3d_to_2d", float_loop), ("fixed project", fixed_loop),
+                       ("fixed project_batch", fixed_batch)):
+        elapsed = time_best(func, args.repeat)
+        print("  %-24s %8.1f us  %6.1f ns/point  %5.2fx" % (name, elapsed * 1e6, elapsed * 1e9 / n, base / elapsed))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Measure boot-to-first-frame time on the desktop backend.
+
+Each sample runs in a fresh interpreter, since a module is only imported
+once per process: import the game, reset it and draw the first frame. The
+samples are taken with assets.bin and then with assets.PATH unset, so the
+difference is what baking saves. Desktop Python is far faster than the
+RP2040, so compare the two columns rather than reading the numbers as
+device times; on the Pico the game prints its own figure after the first
+frame.
+
+    python tools/bake_assets.py && python tools/boot_time.py
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _child(use_assets):
+    start = time.perf_counter_ns()
+    sys.path.insert(0, ROOT)
+    import assets
+    assets.PATH = os.path.join(ROOT, "assets.bin") if use_assets else None
+    import headless
+    headless.utime.sleep_enabled = False
+    game = headless.load_game(seed=1)
+    game.reset_game()
+    game.game_frame()
+    elapsed = time.perf_counter_ns() - start
+    print("%d %d %d" % (elapsed, assets.loaded, len(assets.built)))
+
+
+def _sample(use_assets):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", "1" if use_assets else "0"],
+                         check=True, capture_output=True, text=True).stdout.split()
+    return int(out[0]), int(out[1]), int(out[2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=9)
+    parser.add_argument("--child", choices=("0", "1"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        _child(args.child == "1")
+        return 0
+
+    if not os.path.exists(os.path.join(ROOT, "assets.bin")):
+        print("no assets.bin; run tools/bake_assets.py first")
+        return 1
+    for label, use_assets in (("baked", True), ("built", False)):
+        samples = [_sample(use_assets) for _ in range(args.runs)]
+        times = sorted(s[0] for s in samples)
+        print("%-6s median %.1f ms  best %.1f ms  (%d tables loaded, %d built)" % (
+            label, times[len(times) // 2] / 1e6, times[0] / 1e6, samples[0][1], samples[0][2]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
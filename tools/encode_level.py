@@ -0,0 +1,159 @@
+"""Encode a level description into the binary format waves.Level streams.
+
+A level source is text, one spawn per line:
+
+    # tick  kind      x    y    z     size  health
+    50      obstacle  30   60   12.5  5     1
+    1125    boss      120  50   12.0  15    10
+    200     power_up  100  40   12.0
+
+Ticks are STEP_MS (40 ms) apart, so 25 make a second. x and y are screen
+pixels, z is the spawn depth. Power-ups take no size or health. A line
+"length N" sets the level length in ticks, after which a looping level
+starts over; it defaults to one tick past the last spawn. --bullet-hell
+writes the stress level instead: a dense spiral of monsters with bosses and
+power-ups mixed in, for tools/bench.py --scenario bullet_hell. --dump lists
+the records of an encoded file. With --check, nothing is written; the
+existing file is compared against a fresh encoding of the source, which
+catches a committed level left stale by an edit to its text.
+
+    python tools/encode_level.py levels/classic.txt --out classic.pfw
+    python tools/encode_level.py levels/classic.txt --check
+    python tools/encode_level.py --bullet-hell --out bullet_hell.pfw
+    python tools/encode_level.py --dump classic.pfw
+"""
+
+import argparse
+import math
+import os
+import struct
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import waves  # noqa: E402
+
+KINDS = {"obstacle": waves.OBSTACLE, "boss": waves.BOSS, "power_up": waves.POWER_UP}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+
+
+def parse(text):
+    """Return (records, length) from a level source; records are (tick, kind, x, y, z, size, health)."""
+    records = []
+    length = None
+    for number, line in enumerate(text.splitlines(), 1):
+        fields = line.split("#")[0].split()
+        if not fields:
+            continue
+        try:
+            if fields[0] == "length":
+                length = int(fields[1])
+                continue
+            kind = KINDS[fields[1]]
+            size, health = (int(fields[5]), int(fields[6])) if kind != waves.POWER_UP else (0, 0)
+            records.append((int(fields[0]), kind, int(fields[2]), int(fields[3]), float(fields[4]), size, health))
+        except (KeyError, IndexError, ValueError):
+            raise ValueError("line %d: cannot parse %r" % (number, line))
+    if length is None:
+        length = max(r[0] for r in records) + 1 if records else 1
+    return records, length
+
+
+def encode(records, length):
+    """Return the level file for records, sorted by tick."""
+    records = sorted(records, key=lambda r: r[0])
+    last = records[-1][0] if records else 0
+    if last > 0xFFFF or length > 0xFFFF:
+        raise ValueError("level longer than 65535 ticks")
+    if length <= last:
+        raise ValueError("length %d does not cover the spawn at tick %d" % (length, last))
+    out = [struct.pack(waves.HEADER, waves.MAGIC, len(records), length)]
+    for tick, kind, x, y, z, size, health in records:
+        if kind != waves.POWER_UP and not 1 <= health <= 255:
+            # The game counts health down in a byte, so 0 would wrap on the first hit
+            raise ValueError("tick %d: %s health %d is not in 1..255" % (tick, KIND_NAMES[kind], health))
+        out.append(struct.pack(waves.RECORD, tick, kind, size, x, y, int(round(z * 256)), health))
+    return b"".join(out)
+
+
+def decode(blob):
+    """Return (records, length) from a level file."""
+    magic, count, length = struct.unpack_from(waves.HEADER, blob)
+    if magic != waves.MAGIC:
+        raise ValueError("not a level file")
+    records = []
+    for k in range(count):
+        tick, kind, size, x, y, z, health = struct.unpack_from(
+            waves.RECORD, blob, waves.HEADER_SIZE + k * waves.RECORD_SIZE)
+        records.append((tick, kind, x, y, z / 256, size, health))
+    return records, length
+
+
+def bullet_hell(seconds=60, width=240, height=135):
+    """Return (records, length) for the stress level.
+
+    Every tick four monsters leave the centre on a turning spiral, every
+    second a boss joins them and every half second a power-up, so the
+    obstacle table holds about 300 monsters at once.
+    """
+    records = []
+    ticks = seconds * 25
+    for tick in range(ticks):
+        for arm in range(4):
+            angle = tick * 0.23 + arm * math.pi / 2
+            x = width // 2 + int(math.cos(angle) * 100)
+            y = height // 2 + int(math.sin(angle) * 55)
+            records.append((tick, waves.OBSTACLE, x, y, 15.0, 5, 1))
+        if tick % 25 == 0:
+            records.append((tick, waves.BOSS, width // 2, height // 2, 15.0, 15, 10))
+        if tick % 12 == 6:
+            records.append((tick, waves.POWER_UP, (tick * 37) % width, (tick * 23) % height, 12.0, 0, 0))
+    return records, ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("source", nargs="?", help="level source text")
+    parser.add_argument("--out", help="level file to write")
+    parser.add_argument("--bullet-hell", action="store_true", help="write the stress level")
+    parser.add_argument("--seconds", type=int, default=60, help="stress level length")
+    parser.add_argument("--dump", metavar="FILE", help="list the records of a level file")
+    parser.add_argument("--check", action="store_true", help="compare instead of writing")
+    args = parser.parse_args()
+
+    if args.dump:
+        with open(args.dump, "rb") as f:
+            records, length = decode(f.read())
+        print("%d records, %d ticks" % (len(records), length))
+        for tick, kind, x, y, z, size, health in records:
+            print("%6d  %-8s  %4d %4d  %6.2f  %3d %3d" % (tick, KIND_NAMES.get(kind, kind), x, y, z, size, health))
+        return 0
+    if args.bullet_hell:
+        records, length = bullet_hell(args.seconds)
+    elif args.source:
+        with open(args.source) as f:
+            records, length = parse(f.read())
+    else:
+        parser.error("give a level source, --bullet-hell or --dump")
+    out = args.out or os.path.splitext(os.path.basename(args.source or "bullet_hell"))[0] + ".pfw"
+    blob = encode(records, length)
+    if args.check:
+        try:
+            with open(out, "rb") as f:
+                current = f.read()
+        except OSError:
+            current = None
+        if current != blob:
+            print("FAIL: %s is %s; re-run without --check" % (out, "stale" if current is not None else "missing"))
+            return 1
+        print("ok: %d records match %s" % (len(records), out))
+        return 0
+    with open(out, "wb") as f:
+        f.write(blob)
+    print("%d records, %d ticks, %d bytes -> %s" % (len(records), length, len(blob), out))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Heap footprint of the entity tables against the old lists of dicts/lists.
+
+Builds every entity kind at its table capacity twice: once as the list of
+dicts (buildings, obstacles) or lists (projectiles, power-ups) the game used
+to keep, and once as the entities.Table the game keeps now. The bytes each
+one holds are measured with tracemalloc. Numbers are CPython's; MicroPython
+objects are smaller, but the tables' share is just their array storage,
+which is the same on both.
+
+    python tools/entity_footprint.py
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import entities  # noqa: E402
+
+# (name, table class, capacity, old representation of one entity)
+KINDS = (
+    ("buildings", entities.Buildings, 8,
+     lambda i: {"x": i * 50, "y": 0, "z": 10.0 + i * 0.5, "width": 40, "height": 100 + i, "color": 0xA514}),
+    ("obstacles", entities.Obstacles, 32,
+     lambda i: {"x": i * 7, "y": i * 3, "z": 12.0 - i * 0.25, "size": 5, "health": 1, "is_boss": False}),
+    ("projectiles", entities.Projectiles, 32, lambda i: [i * 7, i * 3, 1.0 + i * 0.5, 0xF800]),
+    ("power_ups", entities.PowerUps, 8, lambda i: [i * 20, i * 10, 10.0 + i * 0.5]),
+)
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return used
+
+
+def main():
+    print("%-12s %5s %12s %12s %12s" % ("entity", "count", "lists bytes", "table bytes", "array bytes"))
+    total_old = total_new = 0
+    for name, table_class, capacity, make in KINDS:
+        old = measure(lambda: [make(i) for i in range(capacity)])
+        new = measure(lambda: table_class(capacity))
+        raw = sum(column.itemsize * len(column) for column in table_class(capacity).columns)
+        total_old += old
+        total_new += new
+        print("%-12s %5d %12d %12d %12d" % (name, capacity, old, new, raw))
+    print("%-12s %5s %12d %12d" % ("total", "", total_old, total_new))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Check IRQ button sampling and measure press-to-present latency.
+
+Loads the game with an inputs.Sampler in place of the polled buttons, as
+IRQ_INPUT = True does on the Pico, then taps buttons between frames through
+the headless pins. Each tap is released again before the next snapshot, so
+a frame-start poll of the pin would never see it; the sampler must still
+hand every one to the game. The run is made twice: with the hard IRQs the
+sampler uses, and with soft IRQs held back until the tap is over, the way a
+soft IRQ waits out a long display.update(). A handler that read the pin
+level instead of the edge would see only a release there. The
+press-to-present latency the sampler records is printed at the end,
+measured on the host clock, so it shows the frame cost on this machine
+rather than on the board.
+
+    python tools/input_latency.py --frames 300
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import headless  # noqa: E402
+import inputs  # noqa: E402
+
+
+def run(frames, every, hard):
+    """Tap buttons between frames; return (taps, caught, polled, sampler)."""
+    game = headless.load_game(seed=1)
+    sampler = inputs.Sampler(hard=hard)
+    game.input_sampler = sampler
+    game.button_a, game.button_b, game.button_x, game.button_y = sampler.buttons
+    game.reset_game()
+    pins = sampler._pins
+
+    taps = caught = polled = 0
+    for frame in range(frames):
+        if frame % every == 0:
+            pin = pins[(frame // every) % 2 + 1]  # Alternate B and Y so the report chord stays off
+            pin.drive(0)
+            pin.drive(1)  # Released before the frame starts
+            taps += 1
+            bit = 1 << pins.index(pin)
+            polled += pin.value() == 0
+            headless.Pin.run_soft_irqs()  # A soft handler only runs now, after the tap is over
+            caught += bool(sampler.snapshot() & bit)
+        else:
+            sampler.snapshot()
+        game.game_frame()
+    return taps, caught, polled, sampler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--every", type=int, default=5, help="frames between taps")
+    args = parser.parse_args()
+
+    headless.utime.sleep_enabled = False
+    headless.Pin.defer_soft = True
+    failed = False
+    for label, hard in (("hard IRQ", True), ("late soft IRQ", False)):
+        taps, caught, polled, sampler = run(args.frames, args.every, hard)
+        print("%-14s taps %d  caught by the sampler %d  seen by a frame-start poll %d" % (label, taps, caught, polled))
+        if caught != taps:
+            print("FAIL: the sampler dropped %d taps" % (taps - caught))
+            failed = True
+    sampler.report()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Compare the RGB565 and 8-bit palette framebuffers.
+
+Runs every benchmark scenario in raster mode twice, with PALETTE off and
+on, and checks that the simulation matches tick for tick. Pen values differ
+between the modes, so the check covers positions, counts and colour
+indices, which must not. Then it
+prints, per mode, the framebuffer size, palette entries handed out, the
+mean frame time, the time spent in step_world (the update), pixels pushed
+and palette rewrites per frame. A second table times the splat path in
+both modes. Desktop times only show the direction of a change; on the board
+the game prints heap free and palette use after the first frame, and the
+PROFILE HUD splits update from draw. Exits non-zero if the runs diverge or
+the palette overflows.
+
+    python tools/palette_modes.py
+    python tools/palette_modes.py --frames 200 --scenario ship_crash
+"""
+
+import argparse
+import os
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench  # noqa: E402
+import headless  # noqa: E402
+import jitter  # noqa: E402
+import palette  # noqa: E402
+import splats  # noqa: E402
+
+
+def sim_state(game):
+    """CRC of the state both modes must share: pen values differ, so only colour indices count."""
+    pool = game.particle_pool
+    n = pool.count
+    crc = zlib.crc32(repr((game.ship_x, game.ship_y, game.ship_rotation, game.game_over, game.score,
+                           game.city_stream.count, game.obstacles.count, game.projectiles.count)).encode())
+    for column in (pool.x, pool.y, pool.z, pool.color, pool.life):
+        crc = zlib.crc32(bytes(memoryview(column)[:n]), crc)
+    return crc
+
+
+def run_game(name, frames, seed, palette_mode, splat):
+    """Run one scenario; return (per-frame checksums, stats dict)."""
+    setup, step = bench.SCENARIOS[name]
+    jitter.seed(seed)
+    game = headless.load_game(seed=seed, raster=True, flags={"PALETTE": True} if palette_mode else None)
+    if splat:
+        game.splat_rasteriser = splats.Rasteriser(game.framebuffer, game.WIDTH, game.HEIGHT, big_endian=True,
+                                                  pixel_bytes=game.display.pixel_bytes)
+    entries = palette.used
+    game.new_session(seed)
+    setup(game)
+    update_ns = [0]
+    step_world = game.step_world
+
+    def timed_step():
+        t0 = time.perf_counter_ns()
+        step_world()
+        update_ns[0] += time.perf_counter_ns() - t0
+
+    game.step_world = timed_step
+    game.display.reset_counters()
+    checksums = []
+    start = time.perf_counter_ns()
+    for frame in range(frames):
+        step(game, frame)
+        game.game_frame()
+        checksums.append(sim_state(game))
+    elapsed = time.perf_counter_ns() - start
+    return checksums, {
+        "framebuffer": len(game.framebuffer),
+        "entries": entries,
+        "frame_us": elapsed / frames / 1000,
+        "update_us": update_ns[0] / frames / 1000,
+        "pushed": game.display.pushed_pixels / frames,
+        "rewrites": game.display.calls.get("update_pen", 0) / frames,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scenario", action="append", choices=sorted(bench.SCENARIOS))
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    failed = False
+    print("scenario     mode     fb bytes  entries   frame us  update us   pushed px/f  rewrites/f")
+    for name in args.scenario or bench.SCENARIOS:
+        direct, before = run_game(name, args.frames, args.seed, False, False)
+        try:
+            indexed, after = run_game(name, args.frames, args.seed, True, False)
+        except RuntimeError as e:
+            print("%-12s P8       %s" % (name, e))
+            failed = True
+            continue
+        for mode, stats in (("RGB565", before), ("P8", after)):
+            print("%-12s %-7s %9d  %7d  %9.1f  %9.1f  %12.0f  %10.2f" % (
+                name, mode, stats["framebuffer"], stats["entries"], stats["frame_us"], stats["update_us"],
+                stats["pushed"], stats["rewrites"]))
+        mismatch = next((i for i, (a, b) in enumerate(zip(direct, indexed)) if a != b), None)
+        if mismatch is not None:
+            print("%-12s DIFFERS at frame %d" % (name, mismatch))
+            failed = True
+
+    print()
+    print("splats       mode      frame us")
+    for name in args.scenario or bench.SCENARIOS:
+        for mode, palette_mode in (("RGB565", False), ("P8", True)):
+            _, stats = run_game(name, args.frames, args.seed, palette_mode, True)
+            print("%-12s %-7s %9.1f" % (name, mode, stats["frame_us"]))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
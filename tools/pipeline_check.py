@@ -0,0 +1,67 @@
+"""Check that the pipelined and single-core frame loops simulate identically.
+
+Runs every benchmark scenario twice on the desktop backend: once with the
+single-core fallback and once with the simulation on a second thread, as on
+core 1 of the Pico. The world state is checksummed after every frame and the
+first divergence, if any, is reported. Exits non-zero on a mismatch.
+
+    python tools/pipeline_check.py
+    python tools/pipeline_check.py --frames 500 --scenario ship_crash
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench  # noqa: E402
+import headless  # noqa: E402
+
+
+def run(name, frames, seed, threaded):
+    """Return (per-frame checksums, seconds) for one scenario run."""
+    setup, step = bench.SCENARIOS[name]
+    game = headless.load_game(seed=seed)
+    game.frame_pipeline = game.make_pipeline(threaded)
+    game.reset_game()
+    setup(game)
+    checksums = []
+    start = time.perf_counter()
+    try:
+        for frame in range(frames):
+            step(game, frame)
+            game.game_frame()
+            checksums.append(headless.state_checksum(game))
+    finally:
+        game.frame_pipeline.stop()
+    return checksums, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scenario", action="append", choices=sorted(bench.SCENARIOS),
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name in args.scenario or bench.SCENARIOS:
+        single, single_s = run(name, args.frames, args.seed, threaded=False)
+        piped, piped_s = run(name, args.frames, args.seed, threaded=True)
+        mismatch = next((i for i, (a, b) in enumerate(zip(single, piped)) if a != b), None)
+        if mismatch is None:
+            status = "identical"
+        else:
+            status = "DIVERGED at frame %d" % mismatch
+            failed = True
+        print("%-12s %4d frames  single %6.3f s  pipelined %6.3f s  %s" % (
+            name, args.frames, single_s, piped_s, status))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
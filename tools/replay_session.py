@@ -0,0 +1,123 @@
+"""Record and replay game sessions on the desktop backend.
+
+play runs a session file (made on the Pico with RECORD = True, or by
+record) through a fresh copy of the game, one tick per frame. It prints
+frame-time percentiles and the final state checksum, and can save the
+per-frame checksums as CSV. With --compare it checks them against a CSV
+from an earlier run and names the first frame where the simulation
+diverged, so an optimisation that changes behaviour shows up straight away.
+
+record makes a session without a board, from a scripted pilot that weaves
+through the city, fires the occasional crash and restarts with A.
+
+    python tools/replay_session.py record weave.pfr --frames 600
+    python tools/replay_session.py play weave.pfr --checksums before.csv
+    python tools/replay_session.py play weave.pfr --compare before.csv
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import headless  # noqa: E402
+import replay  # noqa: E402
+
+
+def _buttons(game):
+    return (game.button_a, game.button_b, game.button_x, game.button_y)
+
+
+def _pilot(game, frame):
+    # Weave left and right, drift up and down, and restart after a crash
+    phase = frame % 96
+    game.button_b.is_pressed = phase < 24
+    game.button_y.is_pressed = 48 <= phase < 72
+    game.button_a.is_pressed = game.game_over or (frame // 40) % 3 == 0
+    game.button_x.is_pressed = (frame // 40) % 3 == 1
+
+
+def record(path, frames, seed):
+    game = headless.load_game(seed=seed)
+    game.input_log = replay.Recorder(path, _buttons(game), seed, game.STEP_MS)
+    game.new_session(seed)
+    for frame in range(frames):
+        _pilot(game, frame)
+        game.game_frame()
+    game.input_log.close()
+    print("recorded %d ticks with seed %d to %s" % (game.input_log.ticks, seed, path))
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def play(path, raster=False):
+    """Replay a session; return (frame_ns, checksums)."""
+    game = headless.load_game(raster=raster)
+    player = replay.Player(path, _buttons(game))
+    game.input_log = player
+    game.new_session(player.seed)
+    frame_ns = []
+    checksums = []
+    clock = time.perf_counter_ns
+    for _ in range(len(player)):
+        t0 = clock()
+        game.game_frame()
+        frame_ns.append(clock() - t0)
+        checksums.append(headless.state_checksum(game))
+    return frame_ns, checksums
+
+
+def _read_checksums(path):
+    with open(path) as f:
+        rows = [line.split(",") for line in f.read().splitlines()[1:]]
+    return [int(row[2], 16) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    rec = commands.add_parser("record", help="record a scripted session")
+    rec.add_argument("path")
+    rec.add_argument("--frames", type=int, default=600)
+    rec.add_argument("--seed", type=int, default=1)
+    ply = commands.add_parser("play", help="replay a session")
+    ply.add_argument("path")
+    ply.add_argument("--raster", action="store_true", help="rasterise into a framebuffer")
+    ply.add_argument("--checksums", metavar="CSV", help="write frame, us and checksum per frame")
+    ply.add_argument("--compare", metavar="CSV", help="fail at the first checksum that differs")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.path, args.frames, args.seed)
+        return 0
+
+    frame_ns, checksums = play(args.path, args.raster)
+    n = len(frame_ns)
+    print("%d frames  mean %.1f us  p50 %.1f us  p95 %.1f us  max %.1f us  final checksum %08x" % (
+        n, sum(frame_ns) / n / 1000, _percentile(frame_ns, 0.50) / 1000,
+        _percentile(frame_ns, 0.95) / 1000, max(frame_ns) / 1000, checksums[-1]))
+    if args.checksums:
+        with open(args.checksums, "w") as f:
+            f.write("frame,us,checksum\n")
+            for frame in range(n):
+                f.write("%d,%.1f,%08x\n" % (frame, frame_ns[frame] / 1000, checksums[frame]))
+    if args.compare:
+        expected = _read_checksums(args.compare)
+        for frame in range(min(n, len(expected))):
+            if checksums[frame] != expected[frame]:
+                print("DIVERGED at frame %d" % frame)
+                return 1
+        if n != len(expected):
+            print("DIVERGED: %d frames against %d" % (n, len(expected)))
+            return 1
+        print("identical to %s" % args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Check splats.Rasteriser against the display primitives and time both.
+
+First, every benchmark scenario is run twice in raster mode, once with the
+render queue drawing through display calls and once with SPLATS on, with
+the RGB565 framebuffer and again with PALETTE on. The framebuffers must
+match after every frame. Then 100, 500 and 2000 random
+particles (discs up to MAX_RADIUS, thin fragment rectangles, some
+overhanging the screen edge) are drawn both ways into bare framebuffers,
+compared pixel for pixel and timed. The headless primitives rasterise in
+Python, so the primitive column overstates their cost on the board; the
+calls column is what each path asks of PicoGraphics. Exits non-zero on any
+pixel difference.
+
+    python tools/splat_check.py
+    python tools/splat_check.py --frames 100 --counts 100 500 2000 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench  # noqa: E402
+import headless  # noqa: E402
+import jitter  # noqa: E402
+import splats  # noqa: E402
+
+
+def run_game(name, frames, seed, splat, palette=False):
+    """Return the framebuffer after each frame of one scenario."""
+    setup, step = bench.SCENARIOS[name]
+    jitter.seed(seed)  # The ground texture takes its speckles from jitter at load
+    game = headless.load_game(seed=seed, raster=True, flags={"PALETTE": True} if palette else None)
+    if splat:
+        game.splat_rasteriser = splats.Rasteriser(game.framebuffer, game.WIDTH, game.HEIGHT, big_endian=True,
+                                                  pixel_bytes=game.display.pixel_bytes)
+    game.new_session(seed)
+    setup(game)
+    buffers = []
+    for frame in range(frames):
+        step(game, frame)
+        game.game_frame()
+        buffers.append(bytes(game.framebuffer))
+    return buffers, game.render_queue.total_splats
+
+
+def make_particles(n, width, height, seed):
+    rng = random.Random(seed)
+    shapes = []
+    for _ in range(n):
+        pen = headless.rgb565(rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        x, y = rng.randrange(-4, width + 4), rng.randrange(-4, height + 4)
+        if rng.random() < 0.7:
+            shapes.append((0, pen, x, y, rng.randrange(splats.MAX_RADIUS + 1)))
+        else:
+            shapes.append((1, pen, x, y, rng.randrange(-3, 9), rng.randrange(-3, 9)))
+    return shapes
+
+
+def draw_primitives(display, shapes):
+    pen = -1
+    for shape in shapes:
+        if shape[1] != pen:
+            pen = shape[1]
+            display.set_pen(pen)
+        if shape[0] == 0:
+            display.circle(shape[2], shape[3], shape[4])
+        else:
+            display.rectangle(shape[2], shape[3], shape[4], shape[5])
+
+
+def draw_splats(rasteriser, shapes):
+    for shape in shapes:
+        if shape[0] == 0:
+            rasteriser.disc(shape[1], shape[2], shape[3], shape[4])
+        else:
+            rasteriser.rectangle(shape[1], shape[2], shape[3], shape[4], shape[5])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for mode, palette in (("RGB565", False), ("P8", True)):
+        for name in bench.SCENARIOS:
+            plain, _ = run_game(name, args.frames, args.seed, False, palette)
+            splatted, taken = run_game(name, args.frames, args.seed, True, palette)
+            mismatch = next((i for i, (a, b) in enumerate(zip(plain, splatted)) if a != b), None)
+            status = "identical" if mismatch is None else "DIFFERS at frame %d" % mismatch
+            failed |= mismatch is not None
+            print("%-12s %-6s %4d frames  %6d splats  %s" % (name, mode, args.frames, taken, status))
+
+    print()
+    print("particles   primitives      splats   speedup   display calls")
+    for n in args.counts:
+        display = headless.PicoGraphics(raster=True)
+        rasteriser = splats.Rasteriser(bytearray(display.width * display.height * 2),
+                                       display.width, display.height, big_endian=True)
+        shapes = make_particles(n, display.width, display.height, args.seed + n)
+        draw_primitives(display, shapes)
+        draw_splats(rasteriser, shapes)
+        same = bytes(display.buffer) == bytes(rasteriser.pixels)
+        failed |= not same
+        timings = []
+        for draw, target in ((draw_primitives, display), (draw_splats, rasteriser)):
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter_ns()
+                draw(target, shapes)
+                elapsed = time.perf_counter_ns() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings.append(best)
+        calls = sum(display.calls.values()) // (args.repeat + 1)
+        print("%9d  %8.2f ms  %8.2f ms  %7.1fx   %d -> 0   %s" % (
+            n, timings[0] / 1e6, timings[1] / 1e6, timings[0] / timings[1], calls,
+            "identical" if same else "DIFFERS"))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Level data: obstacle, boss and power-up spawns streamed from flash.
+
+A level file holds MAGIC, the record count (uint32) and the level length in
+ticks (uint16), then one RECORD_SIZE-byte record per spawn, sorted by tick:
+the tick it spawns on (uint16), its kind, size, x and y (int16, screen
+pixels), z in 1/256ths (uint16) and health. tools/encode_level.py writes
+them from a text description.
+
+Level keeps the file open and reads BATCH records at a time with readinto
+into one preallocated buffer, just ahead of the tick being played, so a
+level of any length costs the same RAM. Records are decoded by hand rather
+than with struct so spawning allocates nothing. A missing file is an empty
+level.
+"""
+
+import struct
+
+MAGIC = b"PFW1"
+HEADER = "<4sIH"
+HEADER_SIZE = struct.calcsize(HEADER)
+RECORD = "<HBBhhHBx"  # tick, kind, size, x, y, z * 256, health
+RECORD_SIZE = struct.calcsize(RECORD)
+BATCH = 16  # Records read per readinto
+
+# Record kinds
+OBSTACLE = 0
+BOSS = 1
+POWER_UP = 2
+
+
+class Level:
+    """Sequential reader for one level file; next() yields the records due by a tick."""
+
+    def __init__(self, path, loop=False, batch=BATCH):
+        self.loop = loop  # Start over, length ticks later, after the last record
+        self.buffer = bytearray(batch * RECORD_SIZE)
+        self.records = 0
+        self.length = 0
+        self.spawned = 0  # Records handed out so far
+        self._file = None
+        try:
+            self._file = open(path, "rb")
+        except (OSError, TypeError):
+            return
+        magic, self.records, self.length = struct.unpack(HEADER, self._file.read(HEADER_SIZE))
+        if magic != MAGIC:
+            self._file.close()
+            self._file = None
+            self.records = 0
+        self.restart()
+
+    def restart(self):
+        """Go back to the first record and tick 0."""
+        self.base = 0  # Tick the current pass started on
+        self._left = self.records  # Records not yet read from the file
+        self._pos = 0
+        self._end = 0
+        if self._file is not None:
+            self._file.seek(HEADER_SIZE)
+
+    def _fill(self):
+        if not self._left:
+            if not self.loop or not self.records:
+                return False
+            self._file.seek(HEADER_SIZE)
+            self._left = self.records
+            self.base += self.length
+        n = self._file.readinto(self.buffer) // RECORD_SIZE
+        if n > self._left:
+            n = self._left
+        if not n:
+            self._left = 0
+            return False
+        self._left -= n
+        self._pos = 0
+        self._end = n * RECORD_SIZE
+        return True
+
+    def next(self, tick):
+        """Decode the next record into kind, x, y, z, size and health; False if none is due by tick."""
+        if self._pos == self._end and not self._fill():
+            return False
+        b, o = self.buffer, self._pos
+        if tick < self.base + (b[o] | b[o + 1] << 8):
+            return False
+        self.kind = b[o + 2]
+        self.size = b[o + 3]
+        x = b[o + 4] | b[o + 5] << 8
+        y = b[o + 6] | b[o + 7] << 8
+        self.x = x - 0x10000 if x & 0x8000 else x
+        self.y = y - 0x10000 if y & 0x8000 else y
+        self.z = (b[o + 8] | b[o + 9] << 8) / 256
+        self.health = b[o + 10]
+        self._pos = o + RECORD_SIZE
+        self.spawned += 1
+        return True